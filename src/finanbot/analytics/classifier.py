@@ -0,0 +1,157 @@
+"""
+Category classifier: multinomial naive Bayes over hashed features.
+
+Each transaction becomes a bag of integer features:
+
+    w:<token>      words of the notes (lowercased, accents stripped)
+    a:<bucket>     order of magnitude of the amount, log2(|cents| + 1)
+    acct:<uuid>    the account
+    type:<type>    expense / income / transfer
+
+Feature strings are hashed (crc32, stable across processes) into
+N_FEATURES buckets. A batch is a flat (row, feature) pair list, so fitting is
+one bincount over (category, feature) and inference one gather plus one
+bincount per batch, whatever its size. The fitted model only keeps the
+features it has seen: categories x seen features float32 log-probabilities,
+typically well under a few MB per user.
+"""
+
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from typing import Sequence
+from uuid import UUID
+
+import numpy as np
+
+N_FEATURES = 1 << 20
+ALPHA = 1.0  # Laplace smoothing
+_TOKEN = re.compile(r"[a-z]{2,}")
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode()) & (N_FEATURES - 1)
+
+
+def tokens(notes: str | None) -> list[str]:
+    if not notes:
+        return []
+    folded = unicodedata.normalize("NFKD", notes.lower())
+    return _TOKEN.findall(folded.encode("ascii", "ignore").decode())
+
+
+# Amount buckets are few; hash each once
+_AMOUNT_FEATURES = np.array([_hash(f"a:{b}") for b in range(64)], dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class FeatureBatch:
+    """Sparse binary design matrix as (row, feature) pairs."""
+
+    rows: np.ndarray
+    features: np.ndarray
+    size: int
+
+
+def featurize(
+    notes: Sequence[str | None],
+    amount_cents: np.ndarray,
+    accounts: Sequence[UUID],
+    types: Sequence[str],
+) -> FeatureBatch:
+    n = len(notes)
+    rows: list[int] = []
+    features: list[int] = []
+    seen: dict[str, int] = {}
+    for i, text in enumerate(notes):
+        for token in set(tokens(text)):
+            feature = seen.get(token)
+            if feature is None:
+                feature = seen[token] = _hash(f"w:{token}")
+            rows.append(i)
+            features.append(feature)
+
+    index = np.arange(n, dtype=np.int64)
+    magnitude = np.abs(np.asarray(amount_cents, dtype=np.float64))
+    bucket = np.minimum(np.log2(magnitude + 1).astype(np.int64), 63)
+    lookup: dict[object, int] = {}
+    account_features = np.fromiter(
+        (lookup.setdefault(a, _hash(f"acct:{a}")) for a in accounts),
+        dtype=np.int64,
+        count=n,
+    )
+    type_features = np.fromiter(
+        (lookup.setdefault(t, _hash(f"type:{t}")) for t in types),
+        dtype=np.int64,
+        count=n,
+    )
+    return FeatureBatch(
+        rows=np.concatenate([np.array(rows, np.int64), index, index, index]),
+        features=np.concatenate(
+            [
+                np.array(features, np.int64),
+                _AMOUNT_FEATURES[bucket],
+                account_features,
+                type_features,
+            ]
+        ),
+        size=n,
+    )
+
+
+@dataclass(frozen=True)
+class CategoryModel:
+    categories: tuple[UUID, ...]
+    features: np.ndarray  # sorted hashed features seen in training
+    log_prob: np.ndarray  # categories x features, float32
+    log_prior: np.ndarray  # per category
+    trained_on: int
+
+    @property
+    def nbytes(self) -> int:
+        return self.features.nbytes + self.log_prob.nbytes + self.log_prior.nbytes
+
+    def predict(self, batch: FeatureBatch) -> tuple[np.ndarray, np.ndarray]:
+        """Best category code and its posterior probability, per row."""
+        k = len(self.categories)
+        col = np.searchsorted(self.features, batch.features)
+        col = np.minimum(col, len(self.features) - 1)
+        known = self.features[col] == batch.features
+        rows, col = batch.rows[known], col[known]
+
+        # scores[row, k] = prior[k] + sum of log_prob[k, feature] over row's
+        # known features; one bincount over (row, category) cells
+        cells = (rows[:, None] * k + np.arange(k)).ravel()
+        weights = self.log_prob[:, col].T.ravel()
+        scores = np.bincount(cells, weights=weights, minlength=batch.size * k)
+        scores = scores.reshape(batch.size, k) + self.log_prior
+
+        best = scores.argmax(axis=1)
+        # softmax probability of the winner, computed stably
+        shifted = np.exp(scores - scores[np.arange(batch.size), best][:, None])
+        confidence = 1.0 / shifted.sum(axis=1)
+        return best, confidence
+
+
+def fit(batch: FeatureBatch, labels: np.ndarray, categories: Sequence[UUID]):
+    """`labels` are per-row codes into `categories` (at least two)."""
+    k = len(categories)
+    if k < 2:
+        raise ValueError("a classifier needs at least two categories")
+    features, col = np.unique(batch.features, return_inverse=True)
+    n_features = len(features)
+    counts = np.bincount(
+        labels[batch.rows] * n_features + col, minlength=k * n_features
+    ).reshape(k, n_features)
+    log_prob = np.log(counts + ALPHA) - np.log(
+        counts.sum(axis=1, keepdims=True) + ALPHA * n_features
+    )
+    class_counts = np.bincount(labels, minlength=k)
+    return CategoryModel(
+        categories=tuple(categories),
+        features=features,
+        log_prob=log_prob.astype(np.float32),
+        log_prior=np.log(class_counts / class_counts.sum()),
+        trained_on=batch.size,
+    )
@@ -0,0 +1,341 @@
+"""
+Columnar, in-memory view of a user's transactions for analytics.
+
+Rows are projected in SQL (epoch seconds, integer cents, raw ids) and packed
+straight into NumPy arrays, so no ORM objects or Decimals are ever built:
+
+    occurred_at   datetime64[s] (UTC)                 8 bytes/row
+    amount_cents  int64, as stored (sign included)    8
+    account       int16 code into `accounts`          2
+    category      int16 code into `categories`, -1 = none
+    type          int8 code into TYPES                1
+    currency      int8 code into `currencies`         1
+    ids           V16 raw UUID bytes (opt-in)         16
+
+About 22 bytes per row without ids: ten years of a busy household (~50k
+rows) is ~1 MB. The group-by helpers below are bincount based and aggregate
+that in a few milliseconds.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Sequence
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import BigInteger, Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.orm_models import Transaction as TransactionModel
+from models.orm_models import TransactionType
+
+TYPES = tuple(t.value for t in TransactionType)
+EXPENSE, INCOME, TRANSFER = (
+    TYPES.index(TransactionType.EXPENSE.value),
+    TYPES.index(TransactionType.INCOME.value),
+    TYPES.index(TransactionType.TRANSFER.value),
+)
+NO_CATEGORY = -1
+FETCH_SIZE = 50_000
+
+
+def columnar_stmt(
+    user_id: UUID,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+    with_ids: bool = False,
+):
+    """Projection the loader packs: epoch seconds and cents come from SQL."""
+    columns = [
+        func.floor(func.extract("epoch", TransactionModel.occurred_at)).cast(
+            BigInteger
+        ),
+        func.round(TransactionModel.amount * 100).cast(BigInteger),
+        TransactionModel.account_id,
+        TransactionModel.category_id,
+        TransactionModel.type,
+        TransactionModel.currency,
+    ]
+    if with_ids:
+        columns.append(TransactionModel.id)
+    stmt = (
+        select(*columns)
+        .where(TransactionModel.user_id == user_id)
+        .order_by(TransactionModel.occurred_at, TransactionModel.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(TransactionModel.occurred_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(TransactionModel.occurred_at < date_to)
+    if account_id is not None:
+        stmt = stmt.where(TransactionModel.account_id == account_id)
+    return stmt
+
+
+@dataclass(frozen=True)
+class TransactionColumns:
+    occurred_at: np.ndarray
+    amount_cents: np.ndarray
+    account: np.ndarray
+    category: np.ndarray
+    type: np.ndarray
+    currency: np.ndarray
+    accounts: tuple[UUID, ...]
+    categories: tuple[UUID, ...]
+    currencies: tuple[str, ...]
+    ids: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.amount_cents)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (
+            self.occurred_at,
+            self.amount_cents,
+            self.account,
+            self.category,
+            self.type,
+            self.currency,
+        )
+        extra = self.ids.nbytes if self.ids is not None else 0
+        return sum(a.nbytes for a in arrays) + extra
+
+    def take(self, selector: np.ndarray) -> "TransactionColumns":
+        """Subset by boolean mask or index array; lookup tables are shared."""
+        return TransactionColumns(
+            occurred_at=self.occurred_at[selector],
+            amount_cents=self.amount_cents[selector],
+            account=self.account[selector],
+            category=self.category[selector],
+            type=self.type[selector],
+            currency=self.currency[selector],
+            accounts=self.accounts,
+            categories=self.categories,
+            currencies=self.currencies,
+            ids=self.ids[selector] if self.ids is not None else None,
+        )
+
+    def transaction_ids(self) -> list[UUID]:
+        if self.ids is None:
+            raise ValueError("loaded without ids; pass with_ids=True")
+        return [UUID(bytes=raw) for raw in self.ids.tolist()]
+
+    def signed_cents(self) -> np.ndarray:
+        """Balance effect per row; same rules as db.aggregates.signed_amount."""
+        magnitude = np.abs(self.amount_cents)
+        return np.where(
+            self.type == EXPENSE,
+            -magnitude,
+            np.where(self.type == INCOME, magnitude, self.amount_cents),
+        )
+
+    def months(self) -> np.ndarray:
+        """Month index since 1970-01 (datetime64[M] as int64)."""
+        return self.occurred_at.astype("datetime64[M]").astype(np.int64)
+
+    def days(self) -> np.ndarray:
+        """Day index since 1970-01-01."""
+        return self.occurred_at.astype("datetime64[D]").astype(np.int64)
+
+
+@dataclass
+class _Builder:
+    with_ids: bool
+    chunks: list[tuple[np.ndarray, ...]] = field(default_factory=list)
+    accounts: dict[UUID, int] = field(default_factory=dict)
+    categories: dict[UUID, int] = field(default_factory=dict)
+    currencies: dict[str, int] = field(default_factory=dict)
+
+    def add(self, rows: Sequence[Row]) -> None:
+        if not rows:
+            return
+        n = len(rows)
+        cols = list(zip(*rows, strict=True))
+        type_codes = {name: i for i, name in enumerate(TYPES)}
+        account_code = self.accounts.setdefault
+        category_code = self.categories.setdefault
+        currency_code = self.currencies.setdefault
+        chunk = (
+            np.fromiter(cols[0], dtype=np.int64, count=n).astype("datetime64[s]"),
+            np.fromiter(cols[1], dtype=np.int64, count=n),
+            np.fromiter(
+                (account_code(a, len(self.accounts)) for a in cols[2]),
+                dtype=np.int16,
+                count=n,
+            ),
+            np.fromiter(
+                (
+                    NO_CATEGORY if c is None else category_code(c, len(self.categories))
+                    for c in cols[3]
+                ),
+                dtype=np.int16,
+                count=n,
+            ),
+            np.fromiter((type_codes[t] for t in cols[4]), dtype=np.int8, count=n),
+            np.fromiter(
+                (currency_code(c, len(self.currencies)) for c in cols[5]),
+                dtype=np.int8,
+                count=n,
+            ),
+        )
+        if self.with_ids:
+            chunk += (np.array([u.bytes for u in cols[6]], dtype="V16"),)
+        self.chunks.append(chunk)
+
+    def build(self) -> TransactionColumns:
+        empty = (
+            np.empty(0, "datetime64[s]"),
+            np.empty(0, np.int64),
+            np.empty(0, np.int16),
+            np.empty(0, np.int16),
+            np.empty(0, np.int8),
+            np.empty(0, np.int8),
+            np.empty(0, "V16"),
+        )
+        if self.chunks:
+            merged = [np.concatenate(parts) for parts in zip(*self.chunks, strict=True)]
+        else:
+            merged = list(empty)
+        return TransactionColumns(
+            occurred_at=merged[0],
+            amount_cents=merged[1],
+            account=merged[2],
+            category=merged[3],
+            type=merged[4],
+            currency=merged[5],
+            accounts=tuple(self.accounts),
+            categories=tuple(self.categories),
+            currencies=tuple(self.currencies),
+            ids=merged[6] if self.with_ids else None,
+        )
+
+
+def from_rows(
+    partitions: Iterable[Sequence[Row]], with_ids: bool = False
+) -> TransactionColumns:
+    """Pack partitions of `columnar_stmt` rows."""
+    builder = _Builder(with_ids)
+    for rows in partitions:
+        builder.add(rows)
+    return builder.build()
+
+
+def load_transactions(
+    db: Session,
+    user_id: UUID,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+    with_ids: bool = False,
+) -> TransactionColumns:
+    stmt = columnar_stmt(user_id, date_from, date_to, account_id, with_ids)
+    result = db.execute(stmt.execution_options(yield_per=FETCH_SIZE))
+    return from_rows(result.partitions(), with_ids)
+
+
+async def load_transactions_async(
+    db: AsyncSession,
+    user_id: UUID,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+    with_ids: bool = False,
+) -> TransactionColumns:
+    stmt = columnar_stmt(user_id, date_from, date_to, account_id, with_ids)
+    result = await db.stream(stmt.execution_options(yield_per=FETCH_SIZE))
+    builder = _Builder(with_ids)
+    partitions: AsyncIterator[Sequence[Row]] = result.partitions()
+    async for rows in partitions:
+        builder.add(rows)
+    return builder.build()
+
+
+# -- vectorized group-by ---------------------------------------------------------
+
+# Dense bincount over the full key space while it stays this small; beyond
+# that, keys are compacted with np.unique first.
+_DENSE_LIMIT = 1 << 22
+
+
+def group_sum(
+    keys: Sequence[np.ndarray], values: np.ndarray | None = None
+) -> tuple[list[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Group rows by one or more integer key columns and sum `values`.
+
+    Returns (distinct key columns, sums, counts), ordered by key. Sums of
+    integer values come back as int64 (exact below 2**53, i.e. any realistic
+    amount in cents).
+    """
+    keys = [np.asarray(k, dtype=np.int64) for k in keys]
+    n = len(keys[0]) if keys else 0
+    if n == 0:
+        empty = np.empty(0, np.int64)
+        return [empty for _ in keys], empty, empty
+
+    lows = [int(k.min()) for k in keys]
+    dims = [int(k.max()) - low + 1 for k, low in zip(keys, lows, strict=True)]
+    flat = np.ravel_multi_index(
+        [k - low for k, low in zip(keys, lows, strict=True)], dims
+    )
+
+    weights = None if values is None else np.asarray(values, dtype=np.float64)
+    if int(np.prod(dims, dtype=np.float64)) <= max(_DENSE_LIMIT, n):
+        counts = np.bincount(flat, minlength=int(np.prod(dims)))
+        occupied = np.flatnonzero(counts)
+        sums = (
+            counts
+            if weights is None
+            else np.bincount(flat, weights=weights, minlength=len(counts))
+        )
+        uniq, counts, sums = occupied, counts[occupied], sums[occupied]
+    else:
+        uniq, inverse = np.unique(flat, return_inverse=True)
+        counts = np.bincount(inverse)
+        sums = counts if weights is None else np.bincount(inverse, weights=weights)
+
+    if values is not None and np.issubdtype(np.asarray(values).dtype, np.integer):
+        sums = np.rint(sums).astype(np.int64)
+    distinct = [
+        col + low for col, low in zip(np.unravel_index(uniq, dims), lows, strict=True)
+    ]
+    return distinct, sums, counts
+
+
+def totals_by_account(cols: TransactionColumns) -> dict[UUID, int]:
+    """Signed balance effect (cents) per account."""
+    if not len(cols):
+        return {}
+    sums = np.bincount(
+        cols.account, weights=cols.signed_cents(), minlength=len(cols.accounts)
+    )
+    return {
+        account: int(round(total))
+        for account, total in zip(cols.accounts, sums, strict=True)
+    }
+
+
+def monthly_totals(
+    cols: TransactionColumns,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Plain amount sums per (month, type), like finances.monthly_rollups.
+    Returns (months as datetime64[M], type codes, cents).
+    """
+    (months, types), sums, _ = group_sum([cols.months(), cols.type], cols.amount_cents)
+    return months.astype("datetime64[M]"), types, sums
+
+
+def category_totals(
+    cols: TransactionColumns, tx_type: str = TransactionType.EXPENSE.value
+) -> dict[UUID | None, int]:
+    """Sum of `tx_type` amounts per category (None = uncategorized)."""
+    mask = cols.type == TYPES.index(tx_type)
+    (codes,), sums, _ = group_sum([cols.category[mask]], cols.amount_cents[mask])
+    return {
+        (cols.categories[code] if code != NO_CATEGORY else None): int(total)
+        for code, total in zip(codes.tolist(), sums.tolist(), strict=True)
+    }
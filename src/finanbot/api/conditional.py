@@ -0,0 +1,80 @@
+"""
+Conditional GET: validators derived from updated_at and a cache of
+serialized responses keyed by the same version.
+
+Routes look up a cheap version first (a row's updated_at, or the per-user
+change counter from crud.user_watermark_stmt for lists). A client presenting
+the matching ETag or a recent enough If-Modified-Since gets 304 without the
+rows being read; anyone else gets the body from the cache when this version
+was already serialized.
+
+List versions come from a counter every commit moves forward (migration
+0013). A row's updated_at is its last writer's start time, which is enough
+for one row: its writers serialize on the row lock.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+
+from fastapi import Request, Response, status
+
+from core.config import get_settings
+from utils.cache import TTLCache
+
+
+def make_etag(*parts: object) -> str:
+    """Weak ETag: it names a version of the data, not exact bytes."""
+    raw = "|".join(str(p) for p in parts).encode()
+    return f'W/"{hashlib.sha1(raw, usedforsecurity=False).hexdigest()[:20]}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None
+) -> bool:
+    """If-None-Match takes precedence over If-Modified-Since (RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {_opaque(t) for t in if_none_match.split(",")}
+        return "*" in tags or _opaque(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def validators(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+@lru_cache(maxsize=None)
+def response_cache() -> TTLCache[tuple, tuple[bytes, dict[str, str]]]:
+    """(kind, ..., version) -> (JSON body, extra headers)"""
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.response_cache_size,
+        ttl=settings.response_cache_ttl_seconds,
+    )
@@ -0,0 +1,16 @@
+"""Dependencies shared by the v1 routers."""
+
+from uuid import UUID
+
+# The API is single-user until bearer tokens (core.security) are wired in;
+# this is the user every route acts for.
+DEFAULT_USER_ID = UUID("00000000-0000-0000-0000-000000000000")
+
+
+def current_user_id() -> UUID:
+    """
+    Id of the user the request acts for. Routes take it as a dependency
+    rather than a client-supplied parameter, so authentication can replace
+    it in one place (or a test override).
+    """
+    return DEFAULT_USER_ID
@@ -0,0 +1,38 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from api.deps import current_user_id
+from db.session import get_db
+from models.schemas import CategorySuggestion, ReclassifyResult
+from services import classification_service
+
+router = APIRouter(prefix="/classification", tags=["classification"])
+db = Depends(get_db)
+current_user = Depends(current_user_id)
+
+
+@router.get("/suggestions", response_model=list[CategorySuggestion])
+def category_suggestions(
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    user_id: UUID = current_user,
+    db: Session = db,
+):
+    """Best category guess for the newest uncategorized transactions."""
+    return classification_service.suggest_categories(db, user_id=user_id, limit=limit)
+
+
+@router.post("/reclassify", response_model=ReclassifyResult)
+def reclassify(
+    min_confidence: Annotated[float | None, Query(ge=0.0, le=1.0)] = None,
+    user_id: UUID = current_user,
+    db: Session = db,
+):
+    """Assign every uncategorized transaction the model is confident about."""
+    return classification_service.reclassify_uncategorized(
+        db,
+        user_id=user_id,
+        min_confidence=min_confidence,
+    )
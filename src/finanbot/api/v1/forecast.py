@@ -0,0 +1,34 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from api.deps import current_user_id
+from db.session import get_db
+from models.schemas import ForecastRead
+from services import forecast_service
+
+router = APIRouter(prefix="/forecast", tags=["forecast"])
+db = Depends(get_db)
+current_user = Depends(current_user_id)
+
+
+@router.get("/", response_model=ForecastRead)
+def forecast_balances(
+    horizon_days: Annotated[int, Query(ge=7, le=365)] = 90,
+    lookback_months: Annotated[int, Query(ge=3, le=120)] = 24,
+    user_id: UUID = current_user,
+    db: Session = db,
+):
+    """
+    Projected daily balance of every account. Sync on purpose: the fit is
+    CPU-bound NumPy work and runs in the threadpool. Cached until the user's
+    transactions or accounts change.
+    """
+    return forecast_service.get_forecast(
+        db,
+        user_id=user_id,
+        horizon_days=horizon_days,
+        lookback_months=lookback_months,
+    )
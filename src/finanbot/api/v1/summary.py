@@ -0,0 +1,46 @@
+from datetime import date
+from uuid import UUID
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.deps import current_user_id
+from db import async_crud
+from db.session import get_async_db
+from models.schemas import CategorySummaryRow, MonthlySummaryRow
+
+router = APIRouter(prefix="/summary", tags=["summary"])
+async_db = Depends(get_async_db)
+current_user = Depends(current_user_id)
+
+
+@router.get("/monthly", response_model=list[MonthlySummaryRow])
+async def monthly_summary(
+    month_from: date | None = None,
+    month_to: date | None = None,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
+):
+    """Per-month totals by category, type and currency, from the rollup table."""
+    return await async_crud.monthly_summary(
+        db,
+        user_id=user_id,
+        month_from=month_from,
+        month_to=month_to,
+    )
+
+
+@router.get("/categories", response_model=list[CategorySummaryRow])
+async def category_summary(
+    month_from: date | None = None,
+    month_to: date | None = None,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
+):
+    """Totals per category, each including the spending of its whole subtree."""
+    return await async_crud.category_summary(
+        db,
+        user_id=user_id,
+        month_from=month_from,
+        month_to=month_to,
+    )
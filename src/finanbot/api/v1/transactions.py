@@ -1,62 +1,386 @@
+import io
+import tempfile
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Annotated, Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db import crud
-from db.session import get_db
+from api import conditional
+from api.deps import current_user_id
+from attachments import storage
+from core.config import get_settings
+from db import async_crud
+from db.pagination import InvalidCursorError
+from db.session import get_async_db, get_db
+from models.orm_models import TransactionType
 from models.schemas import (
+    StatementImportResult,
+    TransactionBulkResult,
     TransactionCreate,
     TransactionRead,
     TransactionUpdate,
 )
+from repositories import transaction_filter, transaction_repo
+from repositories.transaction_filter import TransactionFilter
+from services import export_service, import_service
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 db = Depends(get_db)
+async_db = Depends(get_async_db)
+current_user = Depends(current_user_id)
+
+# Statement uploads stay in memory up to this size, then spill to disk
+IMPORT_SPOOL_BYTES = 1024 * 1024
 
 
 @router.post("/", response_model=TransactionRead, status_code=status.HTTP_201_CREATED)
-def create_transaction(transaction: TransactionCreate, db: Session = db):
-    tx = crud.create_transaction(
-        db,
-        user_id=UUID("00000000-0000-0000-0000-000000000000"),
-        transaction=transaction,
+async def create_transaction(
+    transaction: TransactionCreate,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
+):
+    tx = await async_crud.create_transaction(
+        db, user_id=user_id, transaction=transaction
     )
     return tx
 
 
+@router.post("/bulk", response_model=TransactionBulkResult)
+def create_transactions_bulk(
+    payloads: Annotated[list[dict[str, Any]], Body()],
+    batch_size: Annotated[int | None, Query(ge=1, le=10_000)] = None,
+    user_id: UUID = current_user,
+    db: Session = db,
+):
+    """
+    Ingest many transactions in one database transaction. Rows are validated
+    individually; failures are reported per index instead of rejecting the
+    whole request.
+
+    Kept synchronous on purpose: a large import is CPU and I/O heavy and is
+    better isolated on the threadpool than run on the event loop.
+    """
+    return transaction_repo.bulk_create_transactions(
+        db,
+        user_id=user_id,
+        payloads=payloads,
+        batch_size=batch_size,
+    )
+
+
+@router.post("/import", response_model=StatementImportResult)
+async def import_statement(
+    request: Request,
+    account_id: UUID,
+    format: Literal["ofx", "csv"] = "csv",
+    encoding: str = "utf-8",
+    currency: str = "BRL",
+    user_id: UUID = current_user,
+    db: Session = db,
+):
+    """
+    Import a bank statement sent as the raw request body. Lines already
+    imported are skipped, so sending an overlapping statement is safe.
+
+    The body is spooled (memory, then disk) and parsed as a stream on the
+    threadpool; batches are committed as they go, so after a parse error the
+    corrected file can simply be sent again. Bodies over IMPORT_MAX_BYTES are
+    rejected with 413.
+    """
+    max_bytes = get_settings().import_max_bytes
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            spool.close()
+            raise HTTPException(
+                status_code=413,
+                detail=f"Statement exceeds {max_bytes} bytes",
+            )
+        spool.write(chunk)
+    spool.seek(0)
+    try:
+        text = io.TextIOWrapper(spool, encoding=encoding, errors="replace", newline="")
+    except LookupError as err:
+        spool.close()
+        raise HTTPException(status_code=400, detail=str(err)) from err
+    with text:
+        try:
+            return await run_in_threadpool(
+                import_service.import_statement,
+                db,
+                user_id,
+                account_id,
+                text,
+                format,
+                currency,
+            )
+        except import_service.StatementParseError as err:
+            raise HTTPException(status_code=400, detail=str(err)) from err
+        except import_service.UnknownAccountError as err:
+            raise HTTPException(status_code=404, detail=str(err)) from err
+
+
+@router.get("/export")
+async def export_transactions(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
+):
+    """
+    Stream the user's transactions as CSV or NDJSON. Rows are read through a
+    server-side cursor and written chunk by chunk, so memory stays flat.
+    """
+    partitions = async_crud.stream_transactions(
+        db,
+        user_id=user_id,
+        date_from=date_from,
+        date_to=date_to,
+        account_id=account_id,
+    )
+    if format == "csv":
+        body = export_service.csv_chunks(partitions)
+        media_type = "text/csv"
+    else:
+        body = export_service.ndjson_chunks(partitions)
+        media_type = "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format}"'
+        },
+    )
+
+
+@router.get("/search", response_model=list[TransactionRead])
+async def search_transactions(
+    response: Response,
+    q: Annotated[str, Query(min_length=2, max_length=200)],
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
+):
+    """
+    Search notes, most relevant first. `q` accepts web-search syntax
+    (`uber -eats`, `"conta de luz"`) and tolerates typos. The next page
+    token comes back in `X-Next-Cursor`.
+    """
+    try:
+        rows, next_cursor = await async_crud.search_transactions(
+            db,
+            user_id=user_id,
+            query=q,
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+        )
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
 @router.get("/{tx_id}", response_model=TransactionRead)
-def get_transaction(tx_id: UUID, db: Session = db):
-    tx = crud.get_transaction(db, tx_id)
-    if not tx:
+async def get_transaction(tx_id: UUID, request: Request, db: AsyncSession = async_db):
+    """
+    Supports conditional GET: the ETag and Last-Modified follow the row's
+    updated_at, which is all that is read when the client is up to date.
+    """
+    version = await async_crud.get_transaction_version(db, tx_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Transaction not found")
-    return tx
+    headers = conditional.validators(conditional.make_etag(tx_id, version), version)
+    if conditional.is_not_modified(request, headers["ETag"], version):
+        return conditional.not_modified(headers)
+
+    cache = conditional.response_cache()
+    key = ("transaction", tx_id, version)
+    cached = cache.get(key)
+    if cached is None:
+        tx = await async_crud.get_transaction(db, tx_id)
+        if not tx:
+            raise HTTPException(status_code=404, detail="Transaction not found")
+        cached = (TransactionRead.model_validate(tx).model_dump_json().encode(), {})
+        cache.set(key, cached)
+    return Response(cached[0], media_type="application/json", headers=headers)
 
 
 @router.get("/", response_model=list[TransactionRead])
-def list_transactions(
-    db: Session = db,
-    user_id_arg=None,
+async def list_transactions(
+    request: Request,
     limit: int = 100,
     offset: int = 0,
+    cursor: str | None = None,
+    account_id: Annotated[list[UUID] | None, Query()] = None,
+    category_id: UUID | None = None,
+    type: Annotated[list[TransactionType] | None, Query()] = None,
+    currency: Annotated[str | None, Query(min_length=3, max_length=3)] = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    amount_min: Decimal | None = None,
+    amount_max: Decimal | None = None,
+    user_id: UUID = current_user,
+    db: AsyncSession = async_db,
 ):
-    user_id = (
-        user_id_arg if user_id_arg else UUID("00000000-0000-0000-0000-000000000000")
+    """
+    Without `offset`, pages by keyset and returns the next page token in the
+    `X-Next-Cursor` header; pass it back as `cursor`. `offset` keeps the legacy
+    LIMIT/OFFSET behaviour.
+
+    Filters combine with AND; `account_id` and `type` may be repeated, and
+    `category_id` includes the category's whole subtree. Filtered pages also
+    come with a cursor, whichever way they were reached.
+
+    Conditional GET is keyed on the user's watermark (a change counter bumped
+    by every write to their transactions and accounts), so polling an
+    unchanged list costs one primary-key lookup and returns 304.
+    """
+    try:
+        spec = TransactionFilter(
+            account_ids=tuple(sorted(set(account_id or ()))),
+            category_id=category_id,
+            types=tuple(sorted({t.value for t in type or ()})),
+            currency=currency.upper() if currency else None,
+            date_from=date_from,
+            date_to=date_to,
+            amount_min=amount_min,
+            amount_max=amount_max,
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err)) from err
+
+    watermark = await async_crud.get_user_watermark(db, user_id)
+    page = (user_id, limit, offset, cursor, spec)
+    headers = conditional.validators(
+        conditional.make_etag(*page, watermark.version), watermark.changed_at
     )
-    return crud.list_transactions(db, user_id=user_id, limit=limit, offset=offset)
+    if conditional.is_not_modified(request, headers["ETag"], watermark.changed_at):
+        return conditional.not_modified(headers)
+
+    cache = conditional.response_cache()
+    key = ("transactions", *page, watermark)
+    cached = cache.get(key)
+    if cached is None:
+        cached = await _list_page(db, user_id, limit, offset, cursor, spec)
+        cache.set(key, cached)
+    body, extra = cached
+    return Response(body, media_type="application/json", headers=headers | extra)
+
+
+_TRANSACTION_LIST = TypeAdapter(list[TransactionRead])
+
+
+async def _list_page(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    spec: TransactionFilter,
+) -> tuple[bytes, dict[str, str]]:
+    """Serialized page plus its X-Next-Cursor header, if any."""
+    extra = {}
+    next_cursor = None
+    try:
+        if spec:
+            rows, next_cursor = await transaction_filter.list_transactions_async(
+                db, user_id, spec, limit=limit, cursor=cursor, offset=offset
+            )
+        elif offset and not cursor:
+            rows = await async_crud.list_transactions(
+                db, user_id=user_id, limit=limit, offset=offset
+            )
+        else:
+            rows, next_cursor = await async_crud.list_transactions_page(
+                db, user_id=user_id, limit=limit, cursor=cursor
+            )
+    except InvalidCursorError as err:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from err
+    if next_cursor:
+        extra["X-Next-Cursor"] = next_cursor
+    items = _TRANSACTION_LIST.validate_python(rows, from_attributes=True)
+    return _TRANSACTION_LIST.dump_json(items), extra
 
 
 @router.patch("/{tx_id}", response_model=TransactionUpdate)
-def update_transaction(tx_id: UUID, patch: TransactionUpdate, db: Session = db):
-    updated = crud.update_transaction(db, tx_id, patch.model_dump(exclude_unset=True))
+async def update_transaction(
+    tx_id: UUID, patch: TransactionUpdate, db: AsyncSession = async_db
+):
+    updated = await async_crud.update_transaction(
+        db, tx_id, patch.model_dump(exclude_unset=True)
+    )
     if not updated:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return updated
 
 
 @router.delete("/{tx_id}", response_model=TransactionRead)
-def delete_transaction(tx_id: UUID, db: Session = db):
-    deleted = crud.delete_transaction(db, tx_id)
+async def delete_transaction(tx_id: UUID, db: AsyncSession = async_db):
+    deleted = await async_crud.delete_transaction(db, tx_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return deleted
+
+
+def _attachment_file(
+    stored_path: str, tx_id: UUID
+) -> tuple[Path, str, dict[str, str]] | None:
+    """Path, media type and headers of an attachment; blocking file access."""
+    path = storage.resolve_attachment(stored_path, tx_id)
+    if path is None:
+        return None
+    headers = {}
+    digest = storage.digest_of(path)
+    if digest:
+        headers["ETag"] = f'"{digest}"'
+    return path, storage.sniff_media_type(path), headers
+
+
+@router.get("/{tx_id}/attachment")
+async def download_attachment(tx_id: UUID, db: AsyncSession = async_db):
+    """
+    Serve a transaction's attachment. FileResponse honours HTTP Range and
+    hands the file to the server (pathsend / sendfile) when it supports it,
+    so the body never passes through Python buffers.
+
+    Only files of the attachment store are served, whatever path the row
+    holds.
+    """
+    tx = await async_crud.get_transaction(db, tx_id)
+    if not tx or not tx.attachment_path:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    found = await run_in_threadpool(_attachment_file, tx.attachment_path, tx_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    path, media_type, headers = found
+    return FileResponse(
+        path, media_type=media_type, filename=f"{tx_id}", headers=headers
+    )
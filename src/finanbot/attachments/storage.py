@@ -1,32 +1,244 @@
-import shutil
+"""
+Content-addressed attachment storage.
+
+Uploads are streamed in chunks into a temporary file while being hashed, then
+moved to objects/<sha256[:2]>/<sha256>. Identical receipts are therefore stored
+once. Each transaction referencing a blob owns a marker file at
+refs/<sha256>/<tx_id>; a blob is deleted when its last reference is released.
+
+Writes that go with a database transaction stage the upload first
+(`stage_attachment`), store `StagedAttachment.path` in the row, and only
+`commit_attachment` (or `discard_attachment`) once the row is written.
+
+Committing a reference and releasing the last one both run under a file lock
+shared by all digests with the same two-hex-digit prefix (locks/<sha256[:2]>),
+so a blob is never unlinked while a concurrent commit of the same content is
+adding a reference to it.
+"""
+
+import hashlib
+import os
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import BinaryIO, cast
 from uuid import UUID
 
 from fastapi import UploadFile
 
-from src.finanbot.core.config import get_settings
+from core.config import get_settings
+
+# Subdirectories of settings.attachments_path, resolved on use so that
+# importing this module does not load the settings
+OBJECTS_DIR = "objects"
+REFS_DIR = "refs"
+TMP_DIR = "tmp"
+LOCKS_DIR = "locks"
+
+CHUNK_SIZE = 1024 * 1024
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+_SIGNATURES = (
+    (b"%PDF", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+class AttachmentTooLargeError(ValueError):
+    """Raised when an upload exceeds settings.attachment_max_bytes."""
+
 
-settings = get_settings()
-ATTACHMENTS_DIR = Path(settings.ATTACHMENTS_DIR)
+if sys.platform == "win32":
+    import msvcrt
+
+    def _lock_fd(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+    def _unlock_fd(fd: int) -> None:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _root() -> Path:
+    return Path(get_settings().attachments_path)
 
 
 def get_attachment_path(tx_id: UUID) -> Path:
-    return ATTACHMENTS_DIR / f"{tx_id}.pdf"
+    """Location used before content addressing; still honoured on delete."""
+    return _root() / f"{tx_id}.pdf"
+
+
+def object_path(digest: str) -> Path:
+    return _root() / OBJECTS_DIR / digest[:2] / digest
+
+
+def _ref_path(digest: str, tx_id: UUID) -> Path:
+    return _root() / REFS_DIR / digest / str(tx_id)
+
+
+@contextmanager
+def _digest_lock(digest: str):
+    """
+    Exclusive across threads and processes for one digest. Locks are striped
+    over 256 files that are never removed, so there is nothing to clean up.
+    """
+    lock_dir = _root() / LOCKS_DIR
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_dir / digest[:2], os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _lock_fd(fd)
+        try:
+            yield
+        finally:
+            _unlock_fd(fd)
+    finally:
+        os.close(fd)
+
+
+def digest_of(path: str | Path) -> str | None:
+    path = Path(path)
+    if path.parent.parent != _root() / OBJECTS_DIR or not _DIGEST.fullmatch(path.name):
+        return None
+    return path.name
+
+
+def resolve_attachment(path: str | Path, tx_id: UUID) -> Path | None:
+    """
+    The file a stored attachment_path stands for, rebuilt under the store
+    root: the blob of its digest, or `tx_id`'s legacy file. None for any
+    other path and for files that are gone.
+    """
+    digest = digest_of(path)
+    if digest is not None:
+        resolved = object_path(digest)
+    elif Path(path) == get_attachment_path(tx_id):
+        resolved = get_attachment_path(tx_id)
+    else:
+        return None
+    return resolved if resolved.is_file() else None
+
+
+@dataclass(frozen=True)
+class StagedAttachment:
+    """An upload written to tmp/ and hashed, not yet referenced by anything."""
+
+    tmp_path: Path
+    digest: str
+    size: int
+
+    @property
+    def path(self) -> str:
+        """Where the blob lands once committed; safe to store beforehand."""
+        return str(object_path(self.digest))
+
+
+def stage_attachment(file: UploadFile) -> StagedAttachment:
+    """
+    Stream an upload into a temporary file while hashing it. Nothing is
+    visible in objects/ or refs/ until `commit_attachment`; call
+    `discard_attachment` if the surrounding database transaction fails.
+    """
+    tmp_dir = _root() / TMP_DIR
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    max_bytes = get_settings().attachment_max_bytes
+    sha = hashlib.sha256()
+    size = 0
+
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := file.file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLargeError(
+                        f"Attachment exceeds {max_bytes} bytes"
+                    )
+                sha.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return StagedAttachment(Path(tmp_name), sha.hexdigest(), size)
+
+
+def commit_attachment(staged: StagedAttachment, tx_id: UUID) -> str:
+    """
+    Reference a staged upload from `tx_id` and move it into place; returns
+    the blob path.
+
+    Holds the digest lock, so a concurrent release of the same content either
+    finishes first or sees the new reference.
+    """
+    try:
+        with _digest_lock(staged.digest):
+            ref = _ref_path(staged.digest, tx_id)
+            ref.parent.mkdir(parents=True, exist_ok=True)
+            ref.touch()
+
+            final = object_path(staged.digest)
+            final.parent.mkdir(parents=True, exist_ok=True)
+            # Same content under the same name: replacing is as cheap as
+            # unlinking the temp file and never leaves a window without it.
+            os.replace(staged.tmp_path, final)
+    except BaseException:
+        discard_attachment(staged)
+        raise
+    return str(final)
+
+
+def discard_attachment(staged: StagedAttachment) -> None:
+    staged.tmp_path.unlink(missing_ok=True)
 
 
 def save_attachment(file: UploadFile, tx_id: UUID) -> str:
-    ATTACHMENTS_DIR.mkdir(parents=True, exist_ok=True)
-    file_path = get_attachment_path(tx_id)
+    """Stage and commit in one go; returns the blob path."""
+    return commit_attachment(stage_attachment(file), tx_id)
+
+
+def release_attachment(path: str | Path, tx_id: UUID) -> None:
+    """Drop `tx_id`'s reference and delete the blob once nothing uses it."""
+    digest = digest_of(path)
+    if digest is None:
+        # Only the legacy file of this transaction lives outside objects/
+        if Path(path) == get_attachment_path(tx_id):
+            Path(path).unlink(missing_ok=True)
+        return
+
+    with _digest_lock(digest):
+        _ref_path(digest, tx_id).unlink(missing_ok=True)
+        try:
+            # rmdir only succeeds when no other transaction references the blob
+            (_root() / REFS_DIR / digest).rmdir()
+        except OSError:
+            return
+        object_path(digest).unlink(missing_ok=True)
 
-    with file_path.open("wb") as raw_buffer:
-        buffer = cast(BinaryIO, raw_buffer)
-        shutil.copyfileobj(file.file, buffer)
 
-    return str(file_path)
+def delete_attachment(tx_id: UUID, path: str | None = None) -> None:
+    if path:
+        release_attachment(path, tx_id)
+        return
+    legacy = get_attachment_path(tx_id)
+    if legacy.exists():
+        legacy.unlink()
 
 
-def delete_attachment(tx_id: UUID) -> None:
-    file_path = get_attachment_path(tx_id)
-    if file_path.exists():
-        file_path.unlink()
+def sniff_media_type(path: str | Path) -> str:
+    with open(path, "rb") as fh:
+        head = fh.read(8)
+    for signature, media_type in _SIGNATURES:
+        if head.startswith(signature):
+            return media_type
+    return "application/octet-stream"
@@ -19,10 +19,50 @@ class Settings(BaseSettings):
     secret_key: str = Field(..., env="SECRET_KEY")
     jwt_algorithm: str = Field("HS256", env="JWT_ALGORITHM")
     access_token_expires_minutes: int = Field(15, env="ACCESS_TOKEN_EXPIRES_MINUTES")
+    # Verified-token cache used by get_current_user (entries never outlive
+    # the token's own exp)
+    token_cache_size: int = 10_000
+    token_cache_ttl_seconds: int = 300
+
+    # Password hashing: bcrypt cost factor and size of the hashing thread pool.
+    # Stored hashes below the configured cost are upgraded on next login.
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
 
     # Filesystem locations (use Path for convenience)
     attachments_dir: Path = Field(Path("/data/attachments"), env="ATTACHMENTS_DIR")
     backup_dir: Path = Field(Path("/data/backups"), env="BACKUP_DIR")
+    attachment_max_bytes: int = 20 * 1024 * 1024
+
+    # Bulk transaction ingest: rows per multi-row INSERT
+    bulk_insert_batch_size: int = 1000
+    # Largest statement body POST /transactions/import accepts
+    import_max_bytes: int = 50 * 1024 * 1024
+
+    # Connection pools (db/engines.py), shared by every engine in the process.
+    # Size for the worker concurrency; see engines.pool_stats() for waits.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    # Log statements slower than this (ms) with their fingerprint; unset = off
+    slow_query_ms: Optional[float] = None
+
+    # Balance forecasts, cached per user until their data changes; the TTL
+    # also caps how long a forecast made "today" is served
+    forecast_cache_size: int = 1024
+    forecast_cache_ttl_seconds: int = 600
+
+    # Serialized GET responses, keyed by the data version they were built from
+    response_cache_size: int = 512
+    response_cache_ttl_seconds: int = 300
+
+    # Category classifier: fitted models cached per user, auto-assignment
+    # threshold and rows per reclassification batch
+    classifier_cache_size: int = 256
+    classifier_cache_ttl_seconds: int = 1800
+    classifier_min_confidence: float = 0.8
+    classifier_batch_size: int = 10_000
 
     # Optional DB schema name
     tbl_schema: Optional[str] = Field(None, env="DB_SCHEMA")
@@ -36,6 +76,12 @@ class Settings(BaseSettings):
             raise ValueError("POSTGRES_PORT must be an integer between 1 and 65535")
         return v
 
+    @field_validator("bcrypt_rounds")
+    def _validate_bcrypt_rounds(cls, v: int) -> int:
+        if not (4 <= v <= 31):
+            raise ValueError("BCRYPT_ROUNDS must be between 4 and 31")
+        return v
+
     @field_validator("secret_key")
     def _validate_secret_key(cls, v: str) -> str:
         if not v:
@@ -45,18 +91,21 @@ class Settings(BaseSettings):
         return v
 
     @computed_field
+    @property
     def database_url(self) -> str:
         """Synchronous SQLAlchemy / psycopg2 URL (escaped password)."""
         pwd = quote_plus(self.postgres_password)
         return f"postgresql://{self.postgres_user}:{pwd}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
     @computed_field
+    @property
     def async_database_url(self) -> str:
         """Async DB driver URL (asyncpg / SQLAlchemy async)."""
         pwd = quote_plus(self.postgres_password)
         return f"postgresql+asyncpg://{self.postgres_user}:{pwd}@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
 
     @computed_field
+    @property
     def attachments_path(self) -> Path:
         """Resolved Path for attachments_dir (expanduser + resolve)."""
         return self.attachments_dir.expanduser().resolve()
@@ -0,0 +1,287 @@
+"""
+In-process metrics: per-request SQL accounting, HTTP latency histograms and a
+Prometheus text endpoint.
+
+- `instrument_engine()` hooks an engine's cursor events. Every statement is
+  counted and timed globally and, through a contextvar, against the request
+  that issued it. Statements slower than SLOW_QUERY_MS are logged with a
+  fingerprint (literals and parameters stripped) so repeats group together.
+- `MetricsMiddleware` opens that per-request scope and records latency, query
+  count and SQL time per route template (never per raw path).
+- `render()` produces the Prometheus text format, including collectors
+  registered by other modules (db.engines adds connection pool gauges).
+  api/metrics.py serves it as GET /metrics.
+
+Metrics live in the process; with several workers, scrape each one.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("finanbot.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, Prometheus style."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Iterable[float],
+        labelnames: tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = labelnames
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts..., +Inf count, sum]
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def collect(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for labels, series in items:
+            base = format_labels(self.labelnames, labels)
+            counts = series[: len(self.buckets)]  # then +Inf count and sum
+            for bound, value in zip(self.buckets, counts, strict=True):
+                le = format_labels(self.labelnames + ("le",), labels + (_num(bound),))
+                lines.append(f"{self.name}_bucket{le} {value}")
+            inf = format_labels(self.labelnames + ("le",), labels + ("+Inf",))
+            lines.append(f"{self.name}_bucket{inf} {series[-2]}")
+            lines.append(f"{self.name}_count{base} {series[-2]}")
+            lines.append(f"{self.name}_sum{base} {series[-1]}")
+        return lines
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+        for v in values
+    )
+    return (
+        "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped, strict=True)) + "}"
+    )
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the last body chunk is sent.",
+    LATENCY_BUCKETS,
+    ("method", "route", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    COUNT_BUCKETS,
+    ("method", "route"),
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per HTTP request.",
+    LATENCY_BUCKETS,
+    ("method", "route"),
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency by operation.",
+    QUERY_BUCKETS,
+    ("operation",),
+)
+_HISTOGRAMS = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, QUERY_LATENCY)
+
+# Extra collectors (name -> callable returning exposition lines)
+_collectors: dict[str, Callable[[], list[str]]] = {}
+
+
+def register_collector(name: str, collect: Callable[[], list[str]]) -> None:
+    _collectors[name] = collect
+
+
+def render() -> str:
+    lines: list[str] = []
+    for histogram in _HISTOGRAMS:
+        lines.extend(histogram.collect())
+    for collect in list(_collectors.values()):
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+# -- per-request SQL accounting ------------------------------------------------
+
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def route(self) -> str:
+        # Route template ("/transactions/{tx_id}"), set once routing matched
+        return getattr(self.scope.get("route"), "path", None) or "unmatched"
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "finanbot_request_stats", default=None
+)
+
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER = re.compile(r"%\([^)]+\)s|%s|\$\d+|(?<!:):\w+")
+_PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    """
+    Normalized statement and a short hash of it. Literals and bind
+    parameters become `?` and IN-lists of any length collapse to `(?+)`, so
+    the same query with different values shares a fingerprint.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PARAMETER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PARAMETER_LIST.sub("(?+)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    digest = hashlib.sha1(normalized.encode(), usedforsecurity=False).hexdigest()
+    return normalized, digest[:12]
+
+
+def _operation(statement: str) -> str:
+    head = statement.lstrip().split(None, 1)
+    verb = head[0].upper() if head else ""
+    if verb == "WITH":
+        return "cte"
+    if verb in {"SELECT", "INSERT", "UPDATE", "DELETE"}:
+        return verb.lower()
+    return "other"
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float | None = None) -> None:
+    """
+    Time every statement on `engine` (for async engines pass
+    `engine.sync_engine`). `slow_query_ms` enables the slow-query log.
+    """
+    slow_seconds = slow_query_ms / 1000 if slow_query_ms else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        QUERY_LATENCY.observe(elapsed, _operation(statement))
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+        if slow_seconds is not None and elapsed >= slow_seconds:
+            normalized, digest = fingerprint(statement)
+            slow_query_logger.warning(
+                "slow query %s %.1f ms route=%s: %s",
+                digest,
+                elapsed * 1000,
+                stats.route if stats else "-",
+                normalized,
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        # after_cursor_execute does not fire for failed statements
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+# -- HTTP ----------------------------------------------------------------------
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware, so streamed responses are timed to the last chunk
+    and the request's contextvar is visible to the whole handler.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, stats.route, str(status_code))
+            REQUEST_QUERIES.observe(stats.queries, method, stats.route)
+            REQUEST_DB_TIME.observe(stats.db_seconds, method, stats.route)
+            logger.debug(
+                "%s %s %s %.1f ms, %d queries in %.1f ms",
+                method,
+                stats.route,
+                status_code,
+                elapsed * 1000,
+                stats.queries,
+                stats.db_seconds * 1000,
+            )
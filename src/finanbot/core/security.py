@@ -1,5 +1,10 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
@@ -7,22 +12,157 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from jose.exceptions import JWTError
 from passlib.context import CryptContext
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.finanbot.models.orm_models import User
-from src.finanbot.core.config import get_settings
+from core import metrics
+from core.config import get_settings
+from models.orm_models import User
+from utils.cache import TTLCache
 
-settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to cache."""
+
+    id: UUID
+    username: str
+    email: Optional[str]
+    display_name: Optional[str]
+
+    @classmethod
+    def from_orm(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            display_name=user.display_name,
+        )
+
+
+# The hashing context, executor and token cache are sized from the settings,
+# so they are built on first use rather than at import.
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context() -> CryptContext:
+    settings = get_settings()
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.bcrypt_rounds,
+        # hashes below the configured cost are reported by needs_update()
+        bcrypt__min_rounds=settings.bcrypt_rounds,
+    )
+
+
+@lru_cache(maxsize=None)
+def _hash_executor() -> ThreadPoolExecutor:
+    # bcrypt releases the GIL while hashing, so a bounded thread pool gives
+    # real parallelism without stalling the event loop.
+    return ThreadPoolExecutor(
+        max_workers=get_settings().password_hash_workers,
+        thread_name_prefix="pwd-hash",
+    )
+
+
+@lru_cache(maxsize=None)
+def _token_cache() -> TTLCache[str, tuple[dict[str, Any], CurrentUser]]:
+    """token -> (verified claims, user snapshot)"""
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds
+    )
+
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+async def _run_hashing(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor(), fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a login and, when the stored hash is outdated (lower cost factor
+    or deprecated scheme), return a fresh hash for the caller to persist.
+    Returns (valid, new_hash_or_None).
+    """
+    return await _run_hashing(
+        get_pwd_context().verify_and_update, plain_password, hashed_password
+    )
+
+
+def _login_stmt(username: str):
+    return select(User.id, User.password_hash).where(User.username == username)
+
+
+def _rehash_stmt(user_id: UUID, old_hash: str, new_hash: str):
+    # Matches nothing if the password changed while the login was verified
+    return (
+        update(User)
+        .where(User.id == user_id, User.password_hash == old_hash)
+        .values(password_hash=new_hash)
+    )
+
+
+def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    """
+    The user `password` logs in as, or None.
+
+    The lookup's transaction ends before bcrypt runs, so verifying holds no
+    row lock, transaction or pooled connection; an outdated stored hash is
+    then replaced by a conditional UPDATE. Unknown users cost a dummy verify,
+    so response times do not tell which usernames exist.
+    """
+    row = db.execute(_login_stmt(username)).one_or_none()
+    db.rollback()
+    if row is None or row.password_hash is None:
+        get_pwd_context().dummy_verify()
+        return None
+    valid, new_hash = get_pwd_context().verify_and_update(password, row.password_hash)
+    if not valid:
+        return None
+    if new_hash is not None:
+        db.execute(_rehash_stmt(row.id, row.password_hash, new_hash))
+        db.commit()
+    return db.get(User, row.id)
+
+
+async def authenticate_user_async(
+    db: AsyncSession, username: str, password: str
+) -> Optional[User]:
+    row = (await db.execute(_login_stmt(username))).one_or_none()
+    await db.rollback()
+    if row is None or row.password_hash is None:
+        await _run_hashing(get_pwd_context().dummy_verify)
+        return None
+    valid, new_hash = await verify_and_update_password(password, row.password_hash)
+    if not valid:
+        return None
+    if new_hash is not None:
+        await db.execute(_rehash_stmt(row.id, row.password_hash, new_hash))
+        await db.commit()
+    return await db.get(User, row.id)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -31,6 +171,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Caller should include 'sub' when appropriate.
     Uses UTC times for expiry.
     """
+    settings = get_settings()
     to_encode = data.copy()
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.access_token_expires_minutes)
@@ -64,14 +205,63 @@ def _credentials_exception() -> HTTPException:
     )
 
 
+def invalidate_user(user_id: UUID) -> int:
+    """Forget every cached token of `user_id`; returns how many were dropped."""
+    if not _token_cache.cache_info().currsize:
+        return 0  # cache never built, nothing to forget
+    return _token_cache().discard_where(lambda _, entry: entry[1].id == user_id)
+
+
+def token_cache_stats() -> dict[str, float]:
+    return _token_cache().stats()
+
+
+def _token_cache_metrics() -> list[str]:
+    if not _token_cache.cache_info().currsize:
+        return []  # not built yet; building it here would need the settings
+    gauges = {
+        "token_cache_entries": "size",
+        "token_cache_max_entries": "maxsize",
+        "token_cache_hits_total": "hits",
+        "token_cache_misses_total": "misses",
+        "token_cache_evictions_total": "evictions",
+    }
+    stats = token_cache_stats()
+    lines = []
+    for name, field_name in gauges.items():
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {stats[field_name]}")
+    return lines
+
+
+metrics.register_collector("token_cache", _token_cache_metrics)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    invalidate_user(target.id)
+
+
 def get_current_user(
     token: str,
     db: Session,
-) -> User:
+) -> CurrentUser:
     """
     Resolve the current user from the bearer token.
     Raises 401 on any validation error.
+
+    Verified tokens are cached with their user snapshot until the earlier of
+    the token's expiry and settings.token_cache_ttl_seconds, so repeat
+    requests skip both signature verification and the users lookup.
     """
+    cache = _token_cache()
+    cached = cache.get(token)
+    if cached is not None:
+        return cached[1]
+
+    settings = get_settings()
     credentials_exception = _credentials_exception()
 
     try:
@@ -96,4 +286,8 @@ def get_current_user(
     if user is None:
         raise credentials_exception
 
-    return user
+    current = CurrentUser.from_orm(user)
+    exp = payload.get("exp")
+    if exp is not None:
+        cache.set(token, (payload, current), ttl=float(exp) - time.time())
+    return current
@@ -0,0 +1,191 @@
+"""
+Derived aggregates maintained alongside transaction writes.
+
+Every write path in db.crud / db.async_crud describes what it changed as
+(old, new) snapshot pairs and executes the statements returned by
+`effect_statements` in the same database transaction, so aggregates never
+drift from the rows they summarize.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Iterable, NamedTuple
+from uuid import UUID
+
+from sqlalchemy import Executable, Row, case, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from models.orm_models import Account, MonthlyRollup, TransactionType
+from models.orm_models import Transaction as TransactionModel
+
+# Columns whose change can move an aggregate. Updates touching none of these
+# (e.g. notes, attachment_path) skip the snapshot read entirely.
+AGGREGATE_FIELDS = frozenset(
+    {"account_id", "amount", "type", "category_id", "occurred_at", "currency"}
+)
+
+
+class TxSnapshot(NamedTuple):
+    user_id: UUID
+    account_id: UUID
+    category_id: UUID | None
+    occurred_at: datetime
+    amount: Decimal
+    currency: str
+    type: str
+
+
+SNAPSHOT_COLUMNS = (
+    TransactionModel.user_id,
+    TransactionModel.account_id,
+    TransactionModel.category_id,
+    TransactionModel.occurred_at,
+    TransactionModel.amount,
+    TransactionModel.currency,
+    TransactionModel.type,
+)
+
+
+def snapshot(source: Any) -> TxSnapshot:
+    """Build a snapshot from an ORM row, a SNAPSHOT_COLUMNS Row or a values dict."""
+    if isinstance(source, Row):
+        return TxSnapshot(*source)
+    if isinstance(source, dict):
+        return TxSnapshot(*(source[c.key] for c in SNAPSHOT_COLUMNS))
+    return TxSnapshot(*(getattr(source, c.key) for c in SNAPSHOT_COLUMNS))
+
+
+def _decimal(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def signed_amount(tx_type: str, amount: Any) -> Decimal:
+    """
+    Effect of a transaction on its account balance.
+
+    Expenses always debit and incomes always credit, whatever sign the amount
+    was stored with. Transfers carry their direction in the amount's sign.
+    """
+    value = _decimal(amount)
+    if tx_type == TransactionType.EXPENSE.value:
+        return -abs(value)
+    if tx_type == TransactionType.INCOME.value:
+        return abs(value)
+    return value
+
+
+def signed_amount_expr():
+    """SQL equivalent of `signed_amount`, for set-based recomputation."""
+    return case(
+        (
+            TransactionModel.type == TransactionType.EXPENSE.value,
+            -func.abs(TransactionModel.amount),
+        ),
+        (
+            TransactionModel.type == TransactionType.INCOME.value,
+            func.abs(TransactionModel.amount),
+        ),
+        else_=TransactionModel.amount,
+    )
+
+
+def balance_deltas(
+    changes: Iterable[tuple[TxSnapshot | None, TxSnapshot | None]],
+) -> dict[UUID, Decimal]:
+    deltas: dict[UUID, Decimal] = defaultdict(Decimal)
+    for old, new in changes:
+        if old is not None:
+            deltas[old.account_id] -= signed_amount(old.type, old.amount)
+        if new is not None:
+            deltas[new.account_id] += signed_amount(new.type, new.amount)
+    return {account_id: d for account_id, d in deltas.items() if d}
+
+
+RollupKey = tuple[UUID, date, UUID | None, str, str]
+
+
+def rollup_month(occurred_at: datetime) -> date:
+    """First day of the UTC month, matching month_expr() on the SQL side."""
+    if occurred_at.tzinfo is None:
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    return occurred_at.astimezone(timezone.utc).date().replace(day=1)
+
+
+def month_expr():
+    return func.date(
+        func.date_trunc("month", func.timezone("UTC", TransactionModel.occurred_at))
+    )
+
+
+def rollup_deltas(
+    changes: Iterable[tuple[TxSnapshot | None, TxSnapshot | None]],
+) -> dict[RollupKey, tuple[Decimal, int]]:
+    deltas: dict[RollupKey, list] = defaultdict(lambda: [Decimal(0), 0])
+    for old, new in changes:
+        for tx, sign in ((old, -1), (new, 1)):
+            if tx is None:
+                continue
+            key = (
+                tx.user_id,
+                rollup_month(tx.occurred_at),
+                tx.category_id,
+                tx.type,
+                tx.currency,
+            )
+            deltas[key][0] += sign * _decimal(tx.amount)
+            deltas[key][1] += sign
+    return {k: (total, count) for k, (total, count) in deltas.items() if total or count}
+
+
+def _rollup_upsert(deltas: dict[RollupKey, tuple[Decimal, int]]):
+    rows = [
+        {
+            "user_id": key[0],
+            "month": key[1],
+            "category_id": key[2],
+            "type": key[3],
+            "currency": key[4],
+            "total": total,
+            "tx_count": count,
+        }
+        for key, (total, count) in sorted(deltas.items(), key=lambda kv: str(kv[0]))
+    ]
+    # Keys are the mapped attribute names ("type" -> tra_type)
+    stmt = pg_insert(MonthlyRollup).values(rows)
+    return stmt.on_conflict_do_update(
+        constraint="uq_monthly_rollups_key",
+        set_={
+            "total": MonthlyRollup.total + stmt.excluded.total,
+            "tx_count": MonthlyRollup.tx_count + stmt.excluded.tx_count,
+        },
+    )
+
+
+def effect_statements(
+    changes: Iterable[tuple[TxSnapshot | None, TxSnapshot | None]],
+) -> list[Executable]:
+    """
+    Statements applying the aggregate deltas of `changes`.
+
+    Deltas are folded per account and per rollup key first, so a batch of any
+    size costs one UPDATE per touched account plus a single multi-row upsert
+    into monthly_rollups. Keys are written in a stable order to keep lock
+    acquisition consistent across concurrent writers.
+    """
+    changes = list(changes)
+    deltas = balance_deltas(changes)
+    statements: list[Executable] = [
+        update(Account)
+        .where(Account.id == account_id)
+        .values(balance=Account.balance + deltas[account_id])
+        for account_id in sorted(deltas, key=str)
+    ]
+    rollups = rollup_deltas(changes)
+    if rollups:
+        statements.append(_rollup_upsert(rollups))
+    return statements
+
+
+def touches_aggregates(patch: dict[str, Any]) -> bool:
+    return not AGGREGATE_FIELDS.isdisjoint(patch)
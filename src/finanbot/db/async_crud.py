@@ -0,0 +1,158 @@
+"""
+Async counterparts of db.crud for routes running on the event loop.
+
+The SQL is built by the statement builders in db.crud; only execution differs.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import aggregates, crud
+from models.orm_models import MonthlyRollup
+from models.orm_models import Transaction as TransactionModel
+from models.schemas import TransactionCreate
+
+
+async def _apply_effects(db: AsyncSession, changes) -> None:
+    for stmt in aggregates.effect_statements(changes):
+        await db.execute(stmt)
+
+
+async def create_transaction(
+    db: AsyncSession,
+    user_id: UUID,
+    transaction: TransactionCreate,
+    attachment_path: str | None = None,
+    commit: bool = True,
+) -> TransactionModel:
+    stmt = crud.insert_transaction_stmt(user_id, transaction, attachment_path)
+    tx = (await db.execute(stmt)).scalar_one()
+    await _apply_effects(db, [(None, aggregates.snapshot(tx))])
+    if commit:
+        await db.commit()
+    return tx
+
+
+async def get_transaction(db: AsyncSession, tx_id: UUID) -> TransactionModel | None:
+    result = await db.execute(crud.get_transaction_stmt(tx_id))
+    return result.scalar_one_or_none()
+
+
+async def get_transaction_version(db: AsyncSession, tx_id: UUID) -> datetime | None:
+    result = await db.execute(crud.transaction_version_stmt(tx_id))
+    return result.scalar_one_or_none()
+
+
+async def list_transactions(
+    db: AsyncSession, user_id: UUID, limit: int = 100, offset: int = 0
+) -> Sequence[TransactionModel]:
+    result = await db.execute(crud.list_transactions_stmt(user_id, limit, offset))
+    return result.scalars().all()
+
+
+async def list_transactions_page(
+    db: AsyncSession, user_id: UUID, limit: int = 100, cursor: str | None = None
+) -> tuple[Sequence[TransactionModel], str | None]:
+    result = await db.execute(crud.list_transactions_page_stmt(user_id, limit, cursor))
+    rows = result.scalars().all()
+    return rows, crud.next_page_cursor(rows, limit)
+
+
+async def search_transactions(
+    db: AsyncSession,
+    user_id: UUID,
+    query: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> tuple[list[TransactionModel], str | None]:
+    stmt = crud.search_transactions_stmt(
+        user_id, query, limit, cursor, date_from, date_to
+    )
+    rows = (await db.execute(stmt)).all()
+    return [tx for tx, _ in rows], crud.next_search_cursor(rows, limit)
+
+
+async def stream_transactions(
+    db: AsyncSession,
+    user_id: UUID,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+    chunk_size: int = 1000,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield projected rows in chunks from a server-side cursor, so memory use is
+    bounded by `chunk_size` regardless of how many rows match.
+    """
+    stmt = crud.export_transactions_stmt(user_id, date_from, date_to, account_id)
+    result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+async def update_transaction(
+    db: AsyncSession, tx_id: UUID, patch: dict[str, Any], commit: bool = True
+) -> TransactionModel | None:
+    old = None
+    if aggregates.touches_aggregates(patch):
+        old = (await db.execute(crud.lock_snapshot_stmt(tx_id))).first()
+        if old is None:
+            return None
+
+    result = await db.execute(crud.update_transaction_stmt(tx_id, patch))
+    tx = result.scalar_one_or_none()
+    if tx is not None and old is not None:
+        changes = [(aggregates.snapshot(old), aggregates.snapshot(tx))]
+        await _apply_effects(db, changes)
+    if commit:
+        await db.commit()
+    return tx
+
+
+async def delete_transaction(
+    db: AsyncSession, tx_id: UUID, commit: bool = True
+) -> TransactionModel | None:
+    result = await db.execute(crud.delete_transaction_stmt(tx_id))
+    tx = result.scalar_one_or_none()
+    if tx is not None:
+        await _apply_effects(db, [(aggregates.snapshot(tx), None)])
+    if commit:
+        await db.commit()
+    return tx
+
+
+async def get_user_watermark(db: AsyncSession, user_id: UUID) -> crud.Watermark:
+    result = await db.execute(crud.user_watermark_stmt(user_id))
+    return crud.Watermark.of(result.one_or_none())
+
+
+async def get_account_balance(db: AsyncSession, account_id: UUID) -> Decimal | None:
+    result = await db.execute(crud.account_balance_stmt(account_id))
+    return result.scalar_one_or_none()
+
+
+async def monthly_summary(
+    db: AsyncSession,
+    user_id: UUID,
+    month_from: date | None = None,
+    month_to: date | None = None,
+) -> Sequence[MonthlyRollup]:
+    result = await db.execute(crud.monthly_summary_stmt(user_id, month_from, month_to))
+    return result.scalars().all()
+
+
+async def category_summary(
+    db: AsyncSession,
+    user_id: UUID,
+    month_from: date | None = None,
+    month_to: date | None = None,
+) -> Sequence[Row]:
+    result = await db.execute(crud.category_summary_stmt(user_id, month_from, month_to))
+    return result.all()
@@ -1,74 +1,614 @@
-from typing import Any, Sequence
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, NamedTuple, Sequence
 from uuid import UUID
 
-from sqlalchemy import delete, insert, select, update
+from sqlalchemy import (
+    Row,
+    Uuid,
+    cast,
+    delete,
+    and_,
+    func,
+    insert,
+    literal,
+    not_,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
 
+from db import aggregates
+from db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from models.orm_models import (
+    Account,
+    CategoryClosure,
+    MonthlyRollup,
+    UserDataVersion,
+)
 from models.orm_models import Transaction as TransactionModel
 from models.schemas import TransactionCreate
 
 
-def create_transaction(
-    db: Session, user_id: UUID, transaction: TransactionCreate
-) -> TransactionModel:
-    stmt = (
-        insert(TransactionModel)
-        .values(
-            user_id=user_id,
-            account_id=transaction.account_id,
-            category_id=transaction.category_id,
-            occurred_at=transaction.occurred_at,
-            amount=transaction.amount,
-            currency=transaction.currency,
-            type=transaction.type,
-            notes=transaction.notes,
+def _transaction_values(user_id: UUID, transaction: TransactionCreate) -> dict:
+    return {
+        "user_id": user_id,
+        "account_id": transaction.account_id,
+        "category_id": transaction.category_id,
+        "occurred_at": transaction.occurred_at,
+        "amount": transaction.amount,
+        "currency": transaction.currency,
+        "type": transaction.type,
+        "notes": transaction.notes,
+    }
+
+
+# Statement builders are shared with db.async_crud so both paths issue the
+# exact same SQL.
+#
+# Write functions commit by default. With commit=False they only execute
+# their statements, so a caller can combine several writes (and side effects
+# such as attachment files) into one transaction and commit or roll back
+# once.
+
+
+def insert_transaction_stmt(
+    user_id: UUID, transaction: TransactionCreate, attachment_path: str | None = None
+):
+    values = _transaction_values(user_id, transaction)
+    if attachment_path is not None:
+        values["attachment_path"] = attachment_path
+    return insert(TransactionModel).values(**values).returning(TransactionModel)
+
+
+def import_transactions_stmt():
+    """
+    Multi-row insert that skips lines already imported, via the unique
+    (user_id, import_hash) index. Returns the snapshots of the rows written.
+    """
+    return (
+        pg_insert(TransactionModel)
+        .on_conflict_do_nothing(
+            index_elements=[TransactionModel.user_id, TransactionModel.import_hash],
+            index_where=TransactionModel.import_hash.is_not(None),
         )
-        .returning(TransactionModel)
+        .returning(*aggregates.SNAPSHOT_COLUMNS)
     )
-    result = db.execute(stmt)
-    db.commit()
-    return result.scalar_one()
 
 
-def get_transaction(db: Session, tx_id: UUID) -> TransactionModel | None:
-    stmt = select(TransactionModel).where(TransactionModel.id == tx_id)
-    result = db.execute(stmt)
-    return result.scalar_one_or_none()
+def get_transaction_stmt(tx_id: UUID):
+    return select(TransactionModel).where(TransactionModel.id == tx_id)
 
 
-def list_transactions(
-    db: Session, user_id: UUID, limit: int = 100, offset: int = 0
-) -> Sequence[TransactionModel]:
-    stmt = (
+def transaction_version_stmt(tx_id: UUID):
+    return select(TransactionModel.updated_at).where(TransactionModel.id == tx_id)
+
+
+def list_transactions_stmt(user_id: UUID, limit: int, offset: int):
+    return (
         select(TransactionModel)
         .where(TransactionModel.user_id == user_id)
         .order_by(TransactionModel.occurred_at.desc())
         .limit(limit)
         .offset(offset)
     )
-    return db.execute(stmt).scalars().all()
 
 
-def update_transaction(
-    db: Session, tx_id: UUID, patch: dict[str, Any]
-) -> TransactionModel | None:
+def list_transactions_page_stmt(user_id: UUID, limit: int, cursor: str | None):
+    stmt = (
+        select(TransactionModel)
+        .where(TransactionModel.user_id == user_id)
+        .order_by(TransactionModel.occurred_at.desc(), TransactionModel.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        occurred_at, tx_id = decode_page_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(TransactionModel.occurred_at, TransactionModel.id)
+            < tuple_(occurred_at, tx_id)
+        )
+    return stmt
+
+
+def decode_page_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """(occurred_at, transactions_id) of a `next_page_cursor` token."""
+    occurred_at, tx_id = decode_cursor(cursor, 2)
+    if not isinstance(occurred_at, datetime) or not isinstance(tx_id, UUID):
+        raise InvalidCursorError("Malformed cursor")
+    return occurred_at, tx_id
+
+
+def next_page_cursor(rows: Sequence[TransactionModel], limit: int) -> str | None:
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.occurred_at, last.id)
+
+
+# Text search configuration of transactions.notes_tsv (migration 0009)
+SEARCH_CONFIG = "portuguese"
+
+# A websearch_to_tsquery token: an optionally negated "phrase" (closing quote
+# optional, as there) or bare word
+_SEARCH_TOKEN = re.compile(r'(-?)"([^"]*)"?|(-?)(\S+)')
+
+
+class SearchTerms(NamedTuple):
+    """`query` split the way websearch_to_tsquery reads it."""
+
+    words: list[str]  # plain words, the only part matched by similarity
+    phrases: list[str]
+    exclusions: list[str]  # -words and -"phrases"
+
+    @classmethod
+    def parse(cls, query: str) -> "SearchTerms":
+        terms = cls([], [], [])
+        for match in _SEARCH_TOKEN.finditer(query):
+            negated_phrase, phrase, negated_word, word = match.groups()
+            if phrase is not None:
+                target = terms.exclusions if negated_phrase else terms.phrases
+                if phrase.strip():
+                    target.append(phrase.strip())
+            elif not word.strip("-") or word.lower() == "or":
+                continue  # operators only
+            elif negated_word:
+                terms.exclusions.append(word)
+            else:
+                terms.words.append(word)
+        return terms
+
+
+def _phrases_tsquery(phrases: list[str], separator: str = " "):
+    """websearch_to_tsquery of `phrases`, each quoted (all of them by default)."""
+    quoted = separator.join(f'"{p}"' for p in phrases)
+    return func.websearch_to_tsquery(SEARCH_CONFIG, quoted)
+
+
+def search_transactions_stmt(
+    user_id: UUID,
+    query: str,
+    limit: int,
+    cursor: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+):
+    """
+    Notes matching `query` as full text (websearch syntax: words, "phrases",
+    -exclusions) or, for typos, by trigram word similarity of its plain
+    words; rows found that way still need every phrase and no exclusion.
+    Rows come with their relevance, best first, then newest first;
+    keyset-paged on (rank, occurred_at, transactions_id).
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    matched = TransactionModel.notes_tsv.bool_op("@@")(tsquery)
+    rank = func.ts_rank_cd(TransactionModel.notes_tsv, tsquery)
+
+    terms = SearchTerms.parse(query)
+    if terms.words:
+        words = " ".join(terms.words)
+        similar = [literal(words).bool_op("<%")(TransactionModel.notes)]
+        if terms.phrases:
+            required = _phrases_tsquery(terms.phrases)
+            similar.append(TransactionModel.notes_tsv.bool_op("@@")(required))
+        if terms.exclusions:
+            excluded = _phrases_tsquery(terms.exclusions, " or ")
+            similar.append(not_(TransactionModel.notes_tsv.bool_op("@@")(excluded)))
+        matched = or_(matched, and_(*similar))
+        rank = func.greatest(rank, func.word_similarity(words, TransactionModel.notes))
+
     stmt = (
+        select(TransactionModel, rank.label("rank"))
+        .where(TransactionModel.user_id == user_id, matched)
+        .order_by(
+            rank.desc(), TransactionModel.occurred_at.desc(), TransactionModel.id.desc()
+        )
+        .limit(limit)
+    )
+    if date_from is not None:
+        stmt = stmt.where(TransactionModel.occurred_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(TransactionModel.occurred_at < date_to)
+    if cursor:
+        last_rank, occurred_at, tx_id = decode_search_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(rank, TransactionModel.occurred_at, TransactionModel.id)
+            < tuple_(last_rank, occurred_at, tx_id)
+        )
+    return stmt
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, datetime, UUID]:
+    """(rank, occurred_at, transactions_id) of a `next_search_cursor` token."""
+    last_rank, occurred_at, tx_id = decode_cursor(cursor, 3)
+    if (
+        not isinstance(last_rank, (int, float))
+        or not isinstance(occurred_at, datetime)
+        or not isinstance(tx_id, UUID)
+    ):
+        raise InvalidCursorError("Malformed cursor")
+    return last_rank, occurred_at, tx_id
+
+
+def next_search_cursor(rows: Sequence[Row], limit: int) -> str | None:
+    if not rows or len(rows) < limit:
+        return None
+    tx, rank = rows[-1]
+    return encode_cursor(rank, tx.occurred_at, tx.id)
+
+
+EXPORT_COLUMNS = (
+    TransactionModel.id,
+    TransactionModel.occurred_at,
+    TransactionModel.account_id,
+    TransactionModel.category_id,
+    TransactionModel.type,
+    TransactionModel.amount,
+    TransactionModel.currency,
+    TransactionModel.notes,
+)
+
+
+def export_transactions_stmt(
+    user_id: UUID,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    account_id: UUID | None = None,
+):
+    """Column projection (no ORM entities) for streaming exports, oldest first."""
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(TransactionModel.user_id == user_id)
+        .order_by(TransactionModel.occurred_at, TransactionModel.id)
+    )
+    if date_from is not None:
+        stmt = stmt.where(TransactionModel.occurred_at >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(TransactionModel.occurred_at < date_to)
+    if account_id is not None:
+        stmt = stmt.where(TransactionModel.account_id == account_id)
+    return stmt
+
+
+def update_transaction_stmt(tx_id: UUID, patch: dict[str, Any]):
+    return (
         update(TransactionModel)
         .where(TransactionModel.id == tx_id)
         .values(**patch)
         .returning(TransactionModel)
     )
-    result = db.execute(stmt)
-    db.commit()
-    return result.scalar_one_or_none()
 
 
-def delete_transaction(db: Session, tx_id: UUID) -> TransactionModel | None:
-    stmt = (
+def delete_transaction_stmt(tx_id: UUID):
+    return (
         delete(TransactionModel)
         .where(TransactionModel.id == tx_id)
         .returning(TransactionModel)
     )
-    result = db.execute(stmt)
+
+
+def lock_snapshot_stmt(tx_id: UUID):
+    """Current aggregate-relevant values of a row, locked until commit."""
+    return (
+        select(*aggregates.SNAPSHOT_COLUMNS)
+        .where(TransactionModel.id == tx_id)
+        .with_for_update()
+    )
+
+
+def assign_categories_stmt(tx_ids: Sequence[UUID], category_ids: Sequence[UUID]):
+    """
+    Set category_id row by row from two parallel arrays: one statement and two
+    bind parameters for any batch size. Rows categorized meanwhile are left
+    alone.
+    """
+    pairs = (
+        func.unnest(
+            cast(list(tx_ids), ARRAY(Uuid)), cast(list(category_ids), ARRAY(Uuid))
+        )
+        .table_valued("tx_id", "category_id")
+        .render_derived()
+    )
+    return (
+        update(TransactionModel)
+        .where(
+            TransactionModel.id == pairs.c.tx_id,
+            TransactionModel.category_id.is_(None),
+        )
+        .values(category_id=pairs.c.category_id)
+        .returning(*aggregates.SNAPSHOT_COLUMNS)
+    )
+
+
+def owned_account_stmt(user_id: UUID, account_id: UUID):
+    return select(Account.id).where(
+        Account.id == account_id, Account.user_id == user_id
+    )
+
+
+def account_balance_stmt(account_id: UUID):
+    return select(Account.balance).where(Account.id == account_id)
+
+
+def user_watermark_stmt(user_id: UUID):
+    """
+    The user's change counter. Triggers bump it once per statement touching
+    their transactions or accounts, and each commit leaves a higher value, so
+    unlike max(updated_at) a long transaction committing late still moves it.
+    """
+    return select(UserDataVersion.version, UserDataVersion.changed_at).where(
+        UserDataVersion.user_id == user_id
+    )
+
+
+class Watermark(NamedTuple):
+    """Version of a user's data; (0, None) until their first write."""
+
+    version: int
+    changed_at: datetime | None
+
+    @classmethod
+    def of(cls, row: Row | None) -> "Watermark":
+        return cls(0, None) if row is None else cls(row.version, row.changed_at)
+
+
+def monthly_summary_stmt(
+    user_id: UUID, month_from: date | None = None, month_to: date | None = None
+):
+    """Reads only monthly_rollups; cost grows with months, not transactions."""
+    stmt = (
+        select(MonthlyRollup)
+        .where(MonthlyRollup.user_id == user_id, MonthlyRollup.tx_count != 0)
+        .order_by(MonthlyRollup.month, MonthlyRollup.type, MonthlyRollup.currency)
+    )
+    if month_from is not None:
+        stmt = stmt.where(MonthlyRollup.month >= month_from.replace(day=1))
+    if month_to is not None:
+        stmt = stmt.where(MonthlyRollup.month <= month_to.replace(day=1))
+    return stmt
+
+
+def category_summary_stmt(
+    user_id: UUID, month_from: date | None = None, month_to: date | None = None
+):
+    """
+    Totals per category including all of its descendants: one join of the
+    rollups against the closure table, no recursion.
+    """
+    stmt = (
+        select(
+            CategoryClosure.ancestor_id.label("category_id"),
+            MonthlyRollup.type,
+            MonthlyRollup.currency,
+            func.sum(MonthlyRollup.total).label("total"),
+            func.sum(MonthlyRollup.tx_count).label("tx_count"),
+        )
+        .join(
+            CategoryClosure,
+            CategoryClosure.descendant_id == MonthlyRollup.category_id,
+        )
+        .where(MonthlyRollup.user_id == user_id)
+        .group_by(
+            CategoryClosure.ancestor_id, MonthlyRollup.type, MonthlyRollup.currency
+        )
+    )
+    if month_from is not None:
+        stmt = stmt.where(MonthlyRollup.month >= month_from.replace(day=1))
+    if month_to is not None:
+        stmt = stmt.where(MonthlyRollup.month <= month_to.replace(day=1))
+    return stmt
+
+
+def apply_effects(db: Session, changes) -> None:
+    for stmt in aggregates.effect_statements(changes):
+        db.execute(stmt)
+
+
+def create_transaction(
+    db: Session,
+    user_id: UUID,
+    transaction: TransactionCreate,
+    attachment_path: str | None = None,
+    commit: bool = True,
+) -> TransactionModel:
+    stmt = insert_transaction_stmt(user_id, transaction, attachment_path)
+    tx = db.execute(stmt).scalar_one()
+    apply_effects(db, [(None, aggregates.snapshot(tx))])
+    if commit:
+        db.commit()
+    return tx
+
+
+def create_transactions_bulk(
+    db: Session,
+    user_id: UUID,
+    transactions: Sequence[TransactionCreate],
+    batch_size: int = 1000,
+) -> tuple[int, list[tuple[int, str]]]:
+    """
+    Insert many transactions with multi-row INSERTs and a single commit.
+
+    Each batch runs inside a SAVEPOINT. When a batch is rejected by the
+    database, it is retried row by row so that only the offending rows are
+    dropped. Returns the number of inserted rows and (index, error) pairs,
+    indexed by position in `transactions`.
+    """
+    written: list[dict] = []
+    errors: list[tuple[int, str]] = []
+
+    for start in range(0, len(transactions), batch_size):
+        batch = transactions[start : start + batch_size]
+        rows = [_transaction_values(user_id, tx) for tx in batch]
+        try:
+            with db.begin_nested():
+                db.execute(insert(TransactionModel), rows)
+            written.extend(rows)
+            continue
+        except DBAPIError:
+            pass
+
+        for offset, row in enumerate(rows):
+            try:
+                with db.begin_nested():
+                    db.execute(insert(TransactionModel), [row])
+                written.append(row)
+            except DBAPIError as err:
+                errors.append((start + offset, str(err.orig).strip()))
+
+    # One delta per touched account for the whole import
+    apply_effects(db, ((None, aggregates.snapshot(row)) for row in written))
     db.commit()
+    return len(written), errors
+
+
+def import_transactions(
+    db: Session,
+    user_id: UUID,
+    rows: Sequence[tuple[TransactionCreate, str]],
+    commit: bool = True,
+) -> int:
+    """
+    Insert (transaction, import_hash) pairs, skipping hashes the user already
+    has. Aggregates move only for the rows actually written; returns how many
+    that was.
+    """
+    if not rows:
+        return 0
+    values = [
+        {**_transaction_values(user_id, tx), "import_hash": import_hash}
+        for tx, import_hash in rows
+    ]
+    written = db.execute(import_transactions_stmt(), values).all()
+    apply_effects(db, ((None, aggregates.snapshot(row)) for row in written))
+    if commit:
+        db.commit()
+    return len(written)
+
+
+def get_transaction(db: Session, tx_id: UUID) -> TransactionModel | None:
+    result = db.execute(get_transaction_stmt(tx_id))
     return result.scalar_one_or_none()
+
+
+def list_transactions(
+    db: Session, user_id: UUID, limit: int = 100, offset: int = 0
+) -> Sequence[TransactionModel]:
+    stmt = list_transactions_stmt(user_id, limit, offset)
+    return db.execute(stmt).scalars().all()
+
+
+def list_transactions_page(
+    db: Session, user_id: UUID, limit: int = 100, cursor: str | None = None
+) -> tuple[Sequence[TransactionModel], str | None]:
+    """
+    Keyset pagination over (occurred_at, transactions_id), newest first.
+
+    Served by idx_transactions_user_occurred_cover, so every page costs the same
+    no matter how deep the client is. Returns the page and the cursor for the
+    next one (None when there are no more rows).
+    """
+    stmt = list_transactions_page_stmt(user_id, limit, cursor)
+    rows = db.execute(stmt).scalars().all()
+    return rows, next_page_cursor(rows, limit)
+
+
+def search_transactions(
+    db: Session,
+    user_id: UUID,
+    query: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+) -> tuple[list[TransactionModel], str | None]:
+    """Ranked notes search; returns the page and the next cursor."""
+    stmt = search_transactions_stmt(user_id, query, limit, cursor, date_from, date_to)
+    rows = db.execute(stmt).all()
+    return [tx for tx, _ in rows], next_search_cursor(rows, limit)
+
+
+def update_transaction(
+    db: Session, tx_id: UUID, patch: dict[str, Any], commit: bool = True
+) -> TransactionModel | None:
+    old = None
+    if aggregates.touches_aggregates(patch):
+        old = db.execute(lock_snapshot_stmt(tx_id)).first()
+        if old is None:
+            return None
+
+    updated = db.execute(update_transaction_stmt(tx_id, patch)).scalar_one_or_none()
+    if updated is not None and old is not None:
+        apply_effects(db, [(aggregates.snapshot(old), aggregates.snapshot(updated))])
+    if commit:
+        db.commit()
+    return updated
+
+
+def delete_transaction(
+    db: Session, tx_id: UUID, commit: bool = True
+) -> TransactionModel | None:
+    deleted = db.execute(delete_transaction_stmt(tx_id)).scalar_one_or_none()
+    if deleted is not None:
+        apply_effects(db, [(aggregates.snapshot(deleted), None)])
+    if commit:
+        db.commit()
+    return deleted
+
+
+def assign_categories(
+    db: Session, assignments: Sequence[tuple[UUID, UUID]], commit: bool = True
+) -> int:
+    """
+    Categorize uncategorized transactions from (tx_id, category_id) pairs and
+    move their rollups along, in one transaction. Returns the rows changed.
+    """
+    if not assignments:
+        return 0
+    tx_ids, category_ids = zip(*assignments, strict=True)
+    rows = db.execute(assign_categories_stmt(tx_ids, category_ids)).all()
+    changes = []
+    for row in rows:
+        new = aggregates.snapshot(row)
+        changes.append((new._replace(category_id=None), new))
+    apply_effects(db, changes)
+    if commit:
+        db.commit()
+    return len(rows)
+
+
+def owns_account(db: Session, user_id: UUID, account_id: UUID) -> bool:
+    return db.execute(owned_account_stmt(user_id, account_id)).first() is not None
+
+
+def get_account_balance(db: Session, account_id: UUID) -> Decimal | None:
+    """Maintained balance: a primary-key lookup, not a sum over history."""
+    return db.execute(account_balance_stmt(account_id)).scalar_one_or_none()
+
+
+def get_user_watermark(db: Session, user_id: UUID) -> Watermark:
+    return Watermark.of(db.execute(user_watermark_stmt(user_id)).one_or_none())
+
+
+def monthly_summary(
+    db: Session,
+    user_id: UUID,
+    month_from: date | None = None,
+    month_to: date | None = None,
+) -> Sequence[MonthlyRollup]:
+    stmt = monthly_summary_stmt(user_id, month_from, month_to)
+    return db.execute(stmt).scalars().all()
+
+
+def category_summary(
+    db: Session,
+    user_id: UUID,
+    month_from: date | None = None,
+    month_to: date | None = None,
+) -> Sequence[Row]:
+    stmt = category_summary_stmt(user_id, month_from, month_to)
+    return db.execute(stmt).all()
@@ -0,0 +1,275 @@
+"""
+Process-wide engine registry.
+
+Every SQLAlchemy engine in the process comes from here, so the API sessions,
+services and PostgresUtils share one pool per (database, schema) instead of
+each opening their own. Pool sizing comes from Settings (DB_POOL_*).
+
+Pools are instrumented: `pool_stats()` reports, per engine, how many
+connections are checked out and how long callers waited to get one. Sustained
+non-zero waits mean the pool is smaller than the worker concurrency.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, cast
+
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from core import metrics
+from core.config import get_settings
+
+# Upper bounds (seconds) of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    timeouts: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * len(WAIT_BUCKETS))
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.buckets[i] += 1
+                    break
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.total_wait,
+                "wait_seconds_max": self.max_wait,
+                "wait_seconds_avg": (
+                    self.total_wait / self.checkouts if self.checkouts else 0.0
+                ),
+                "wait_buckets": dict(zip(WAIT_BUCKETS, self.buckets, strict=True)),
+            }
+
+
+if TYPE_CHECKING:
+    # Mixed into QueuePool subclasses only; lets super() resolve for checkers
+    _PoolBase = QueuePool
+else:
+    _PoolBase = object
+
+
+class _InstrumentedPoolMixin(_PoolBase):
+    """Times `_do_get`, i.e. the wait for a free (or newly opened) connection."""
+
+    wait_stats: PoolWaitStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # Pool.recreate() runs on dispose(); keep counting into the same stats
+        pool = cast(_InstrumentedPoolMixin, super().recreate())
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_lock = threading.Lock()
+_engines: dict[tuple[str, str | None], Engine] = {}
+_async_engines: dict[tuple[str, str | None], AsyncEngine] = {}
+
+
+def _pool_kwargs() -> dict:
+    settings = get_settings()
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": True,
+    }
+
+
+def get_engine(url: str | None = None, schema: str | None = None) -> Engine:
+    """
+    Shared sync engine for `url` (the configured database by default).
+
+    With `schema`, connections start with that `search_path`; each distinct
+    schema gets its own pool because the option is fixed per connection.
+    """
+    url = url or get_settings().database_url
+    key = (url, schema)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            connect_args = {"options": f"-c search_path={schema}"} if schema else {}
+            engine = create_engine(
+                url,
+                poolclass=InstrumentedQueuePool,
+                connect_args=connect_args,
+                **_pool_kwargs(),
+            )
+            metrics.instrument_engine(engine, get_settings().slow_query_ms)
+            _engines[key] = engine
+    return engine
+
+
+def get_async_engine(url: str | None = None, schema: str | None = None) -> AsyncEngine:
+    """Async (asyncpg) counterpart of get_engine()."""
+    url = url or get_settings().async_database_url
+    key = (url, schema)
+    engine = _async_engines.get(key)
+    if engine is not None:
+        return engine
+    with _lock:
+        engine = _async_engines.get(key)
+        if engine is None:
+            connect_args = (
+                {"server_settings": {"search_path": schema}} if schema else {}
+            )
+            engine = create_async_engine(
+                url,
+                poolclass=InstrumentedAsyncQueuePool,
+                connect_args=connect_args,
+                **_pool_kwargs(),
+            )
+            metrics.instrument_engine(engine.sync_engine, get_settings().slow_query_ms)
+            _async_engines[key] = engine
+    return engine
+
+
+def _describe(kind: str, key: tuple[str, str | None], pool) -> dict:
+    url, schema = key
+    stats = {
+        "engine": kind,
+        "url": make_url(url).render_as_string(hide_password=True),
+        "schema": schema,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.snapshot())
+    return stats
+
+
+def pool_stats() -> list[dict]:
+    """In-use counts and checkout wait times for every registered engine."""
+    with _lock:
+        sync_items = list(_engines.items())
+        async_items = list(_async_engines.items())
+    return [_describe("sync", key, e.pool) for key, e in sync_items] + [
+        _describe("async", key, e.sync_engine.pool) for key, e in async_items
+    ]
+
+
+def _pool_metrics() -> list[str]:
+    gauges = {
+        "db_pool_size": "size",
+        "db_pool_checked_out": "checked_out",
+        "db_pool_overflow": "overflow",
+        "db_pool_checkouts_total": "checkouts",
+        "db_pool_checkout_timeouts_total": "timeouts",
+    }
+    pools = pool_stats()
+    lines = []
+    for name, field_name in gauges.items():
+        kind = "counter" if name.endswith("_total") else "gauge"
+        lines.append(f"# TYPE {name} {kind}")
+        for stats in pools:
+            labels = metrics.format_labels(
+                ("engine", "url", "schema"),
+                (stats["engine"], stats["url"], stats["schema"] or ""),
+            )
+            lines.append(f"{name}{labels} {stats.get(field_name, 0)}")
+
+    name = "db_pool_checkout_wait_seconds"
+    lines.append(f"# TYPE {name} histogram")
+    for stats in pools:
+        if "wait_buckets" not in stats:
+            continue
+        label_values = (stats["engine"], stats["url"], stats["schema"] or "")
+        cumulative = 0
+        for bound, count in stats["wait_buckets"].items():
+            cumulative += count
+            labels = metrics.format_labels(
+                ("engine", "url", "schema", "le"), label_values + (str(bound),)
+            )
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = metrics.format_labels(
+            ("engine", "url", "schema", "le"), label_values + ("+Inf",)
+        )
+        lines.append(f"{name}_bucket{labels} {stats['checkouts']}")
+        labels = metrics.format_labels(("engine", "url", "schema"), label_values)
+        lines.append(f"{name}_count{labels} {stats['checkouts']}")
+        lines.append(f"{name}_sum{labels} {stats['wait_seconds_total']}")
+    return lines
+
+
+metrics.register_collector("db_pools", _pool_metrics)
+
+
+def _take_engines() -> tuple[list[Engine], list[AsyncEngine]]:
+    """Empty the registry and return what it held."""
+    with _lock:
+        sync_engines = list(_engines.values())
+        async_engines = list(_async_engines.values())
+        _engines.clear()
+        _async_engines.clear()
+    return sync_engines, async_engines
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection, e.g. after fork or outside a loop."""
+    sync_engines, async_engines = _take_engines()
+    for engine in sync_engines:
+        engine.dispose()
+    for engine in async_engines:
+        # close=False dereferences the connections instead of awaiting their
+        # close, which is what we want outside the event loop / after fork
+        engine.sync_engine.dispose(close=False)
+
+
+async def dispose_engines_async() -> None:
+    """Shutdown from the event loop: async pools are closed, not dropped."""
+    sync_engines, async_engines = _take_engines()
+    for engine in sync_engines:
+        engine.dispose()
+    for engine in async_engines:
+        await engine.dispose()
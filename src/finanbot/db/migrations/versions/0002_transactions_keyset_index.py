@@ -0,0 +1,32 @@
+"""Composite index backing keyset pagination of transactions.
+
+(user_id, occurred_at DESC, transactions_id DESC) matches the ORDER BY used by
+crud.list_transactions_page, so each page is a bounded index range scan.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_transactions_keyset_index"
+down_revision = "0001_rename_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_occurred_id
+ON finances.transactions (user_id, occurred_at DESC, transactions_id DESC);
+"""
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "finances.idx_transactions_user_occurred_id;"
+        )
@@ -0,0 +1,58 @@
+"""Incrementally maintained account balances.
+
+Adds accounts.opening_balance. Until now `balance` was only ever set by hand,
+so its current value is taken as the opening balance, and `balance` is then
+brought up to date with the signed sum of the account's transactions. From
+here on the crud write paths keep it current.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_account_balances"
+down_revision = "0002_transactions_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                 WHERE table_schema = 'finances'
+                 AND table_name = 'accounts'
+                 AND column_name = 'opening_balance') THEN
+    ALTER TABLE finances.accounts
+        ADD COLUMN opening_balance NUMERIC(18, 2) NOT NULL DEFAULT 0;
+
+    UPDATE finances.accounts SET opening_balance = balance;
+
+    UPDATE finances.accounts a
+    SET balance = a.opening_balance + s.total
+    FROM (
+        SELECT account_id,
+               SUM(CASE tra_type
+                     WHEN 'expense' THEN -abs(amount)
+                     WHEN 'income' THEN abs(amount)
+                     ELSE amount
+                   END) AS total
+        FROM finances.transactions
+        GROUP BY account_id
+    ) s
+    WHERE s.account_id = a.accounts_id;
+  END IF;
+END
+$$;
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+UPDATE finances.accounts SET balance = opening_balance;
+ALTER TABLE finances.accounts DROP COLUMN IF EXISTS opening_balance;
+"""
+    )
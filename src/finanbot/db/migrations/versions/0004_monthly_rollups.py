@@ -0,0 +1,56 @@
+"""Monthly rollup table for dashboard summaries.
+
+One row per (user_id, month, category_id, tra_type, currency) holding the sum
+and count of matching transactions. Maintained incrementally by the crud write
+paths; backfilled here and rebuildable with services.rollup_service.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_monthly_rollups"
+down_revision = "0003_account_balances"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE TABLE IF NOT EXISTS finances.monthly_rollups (
+    monthly_rollups_id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    user_id UUID NOT NULL REFERENCES finances.users (
+        users_id
+    ) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    category_id UUID REFERENCES finances.categories (
+        categories_id
+    ) ON DELETE CASCADE,
+    tra_type TEXT NOT NULL,
+    currency CHAR(3) NOT NULL,
+    total NUMERIC(18, 2) NOT NULL DEFAULT 0,
+    tx_count BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT uq_monthly_rollups_key
+        UNIQUE NULLS NOT DISTINCT (user_id, month, category_id, tra_type, currency)
+);
+
+INSERT INTO finances.monthly_rollups (
+    user_id, month, category_id, tra_type, currency, total, tx_count
+)
+SELECT
+    user_id,
+    date(date_trunc('month', timezone('UTC', occurred_at))),
+    category_id,
+    tra_type,
+    currency,
+    SUM(amount),
+    COUNT(*)
+FROM finances.transactions
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT ON CONSTRAINT uq_monthly_rollups_key DO NOTHING;
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS finances.monthly_rollups;")
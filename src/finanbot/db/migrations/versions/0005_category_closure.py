@@ -0,0 +1,118 @@
+"""Category closure table for subtree rollups.
+
+finances.category_closure holds one row per (ancestor, descendant) pair,
+including each category paired with itself at depth 0. It is maintained by
+triggers on finances.categories, so every writer (crud, seeds, manual SQL)
+keeps it current when categories are created or re-parented. Deleting a
+category cascades its closure rows, and ON DELETE SET NULL on its children
+fires the re-parent trigger, which detaches them.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_category_closure"
+down_revision = "0004_monthly_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE TABLE IF NOT EXISTS finances.category_closure (
+    ancestor_id UUID NOT NULL REFERENCES finances.categories (
+        categories_id
+    ) ON DELETE CASCADE,
+    descendant_id UUID NOT NULL REFERENCES finances.categories (
+        categories_id
+    ) ON DELETE CASCADE,
+    depth INTEGER NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_category_closure_descendant
+ON finances.category_closure (descendant_id, ancestor_id);
+
+CREATE OR REPLACE FUNCTION finances.category_closure_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO finances.category_closure (ancestor_id, descendant_id, depth)
+  SELECT NEW.categories_id, NEW.categories_id, 0
+  UNION ALL
+  SELECT ancestor_id, NEW.categories_id, depth + 1
+  FROM finances.category_closure
+  WHERE descendant_id = NEW.parent_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION finances.category_closure_move()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.parent_id IS NOT NULL AND EXISTS (
+    SELECT 1 FROM finances.category_closure
+    WHERE ancestor_id = NEW.categories_id AND descendant_id = NEW.parent_id
+  ) THEN
+    RAISE EXCEPTION 'category % cannot be moved under its own subtree',
+      NEW.categories_id;
+  END IF;
+
+  -- Detach the moved subtree from its old ancestors
+  DELETE FROM finances.category_closure c
+  USING finances.category_closure sub, finances.category_closure sup
+  WHERE sub.ancestor_id = NEW.categories_id
+    AND sup.descendant_id = NEW.categories_id
+    AND sup.ancestor_id <> NEW.categories_id
+    AND c.ancestor_id = sup.ancestor_id
+    AND c.descendant_id = sub.descendant_id;
+
+  -- Attach it under the new parent's ancestors
+  INSERT INTO finances.category_closure (ancestor_id, descendant_id, depth)
+  SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+  FROM finances.category_closure sup
+  CROSS JOIN finances.category_closure sub
+  WHERE sup.descendant_id = NEW.parent_id
+    AND sub.ancestor_id = NEW.categories_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_categories_closure_insert ON finances.categories;
+CREATE TRIGGER trg_categories_closure_insert
+AFTER INSERT ON finances.categories
+FOR EACH ROW EXECUTE FUNCTION finances.category_closure_insert();
+
+DROP TRIGGER IF EXISTS trg_categories_closure_move ON finances.categories;
+CREATE TRIGGER trg_categories_closure_move
+AFTER UPDATE OF parent_id ON finances.categories
+FOR EACH ROW
+WHEN (OLD.parent_id IS DISTINCT FROM NEW.parent_id)
+EXECUTE FUNCTION finances.category_closure_move();
+
+-- Backfill from the existing tree
+INSERT INTO finances.category_closure (ancestor_id, descendant_id, depth)
+WITH RECURSIVE tree AS (
+    SELECT categories_id AS ancestor_id, categories_id AS descendant_id, 0 AS depth
+    FROM finances.categories
+    UNION ALL
+    SELECT t.ancestor_id, c.categories_id, t.depth + 1
+    FROM tree t
+    JOIN finances.categories c ON c.parent_id = t.descendant_id
+)
+SELECT ancestor_id, descendant_id, depth FROM tree
+ON CONFLICT DO NOTHING;
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+DROP TRIGGER IF EXISTS trg_categories_closure_move ON finances.categories;
+DROP TRIGGER IF EXISTS trg_categories_closure_insert ON finances.categories;
+DROP FUNCTION IF EXISTS finances.category_closure_move();
+DROP FUNCTION IF EXISTS finances.category_closure_insert();
+DROP TABLE IF EXISTS finances.category_closure;
+"""
+    )
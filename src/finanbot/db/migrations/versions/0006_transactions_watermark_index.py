@@ -0,0 +1,32 @@
+"""Index for a user's latest transaction change (the cache watermark).
+
+crud.user_watermark_stmt reads max(updated_at) per user; with
+(user_id, updated_at DESC) that is a single index probe instead of a scan of
+the user's history.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006_transactions_watermark_index"
+down_revision = "0005_category_closure"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_updated
+ON finances.transactions (user_id, updated_at DESC);
+"""
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS finances.idx_transactions_user_updated;"
+        )
@@ -0,0 +1,35 @@
+"""Partial index over uncategorized transactions.
+
+The reclassification job pages through a user's rows with category_id IS
+NULL in primary-key order. Indexing only those rows keeps each page an index
+range scan however large the categorized history grows, and the index stays
+small as the backlog is worked off.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_transactions_uncategorized_index"
+down_revision = "0006_transactions_watermark_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_uncategorized
+ON finances.transactions (user_id, transactions_id)
+WHERE category_id IS NULL;
+"""
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "finances.idx_transactions_user_uncategorized;"
+        )
@@ -0,0 +1,41 @@
+"""Content hash of imported statement lines.
+
+transactions.import_hash is set only for rows written by the statement
+importer: sha256 over (account, date, amount, memo, occurrence). The unique
+partial index lets the importer insert with ON CONFLICT DO NOTHING, so
+re-importing an overlapping or identical statement skips known lines in the
+same statement that writes the new ones.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_transactions_import_hash"
+down_revision = "0007_transactions_uncategorized_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE finances.transactions "
+        "ADD COLUMN IF NOT EXISTS import_hash CHAR(64);"
+    )
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_transactions_user_import_hash
+ON finances.transactions (user_id, import_hash)
+WHERE import_hash IS NOT NULL;
+"""
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "finances.uq_transactions_user_import_hash;"
+        )
+    op.execute("ALTER TABLE finances.transactions DROP COLUMN IF EXISTS import_hash;")
@@ -0,0 +1,52 @@
+"""Full-text and fuzzy search over transaction notes.
+
+- notes_tsv: generated tsvector (portuguese configuration, so "mercados"
+  finds "mercado"), indexed with GIN for `@@` queries.
+- a pg_trgm GIN index on notes for typo-tolerant `<%` word-similarity
+  matches ("mercdo", "uber eats").
+
+Adding a stored generated column rewrites the table once; the indexes are
+then built concurrently.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009_transactions_notes_search"
+down_revision = "0008_transactions_import_hash"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    op.execute(
+        """
+ALTER TABLE finances.transactions
+    ADD COLUMN IF NOT EXISTS notes_tsv tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('portuguese'::regconfig, coalesce(notes, ''))
+    ) STORED;
+"""
+    )
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_notes_tsv
+ON finances.transactions USING gin (notes_tsv);
+"""
+        )
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_notes_trgm
+ON finances.transactions USING gin (notes gin_trgm_ops);
+"""
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index in ("idx_transactions_notes_trgm", "idx_transactions_notes_tsv"):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS finances.{index};")
+    op.execute("ALTER TABLE finances.transactions DROP COLUMN IF EXISTS notes_tsv;")
@@ -0,0 +1,63 @@
+"""Covering indexes for filtered transaction lists.
+
+repositories.transaction_filter pages the ids of matching rows first, then
+reads those rows by primary key. Every filter column is in each of these
+indexes, so the id scan is index-only whatever combination is requested:
+
+- idx_transactions_user_occurred_cover: (user_id, occurred_at DESC,
+  transactions_id DESC) INCLUDE the filter columns. Same keys as
+  idx_transactions_user_occurred_id (0002), which it replaces.
+- idx_transactions_user_account_occurred: account first, for account screens.
+- idx_transactions_user_category_occurred: category first, for category
+  subtree screens (probed once per descendant from category_closure).
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010_transactions_filter_indexes"
+down_revision = "0009_transactions_notes_search"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "idx_transactions_user_occurred_cover": """
+(user_id, occurred_at DESC, transactions_id DESC)
+INCLUDE (account_id, category_id, tra_type, currency, amount)
+""",
+    "idx_transactions_user_account_occurred": """
+(user_id, account_id, occurred_at DESC, transactions_id DESC)
+INCLUDE (category_id, tra_type, currency, amount)
+""",
+    "idx_transactions_user_category_occurred": """
+(user_id, category_id, occurred_at DESC, transactions_id DESC)
+INCLUDE (account_id, tra_type, currency, amount)
+""",
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}\n"
+                f"ON finances.transactions {definition.strip()};"
+            )
+        # The covering index serves every query the keyset index did
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "finances.idx_transactions_user_occurred_id;"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_occurred_id
+ON finances.transactions (user_id, occurred_at DESC, transactions_id DESC);
+"""
+        )
+        for name in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS finances.{name};")
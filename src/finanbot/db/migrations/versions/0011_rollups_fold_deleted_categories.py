@@ -0,0 +1,57 @@
+"""Keep monthly rollups of deleted categories as uncategorized totals.
+
+Deleting a category sets its transactions' category_id to NULL, but the
+CASCADE on monthly_rollups.category_id dropped the category's rollup rows, so
+those amounts vanished from the summaries until a full rebuild. A BEFORE
+DELETE trigger on finances.categories now merges them into the matching
+NULL-category rows first, so the maintained rollups stay equal to a
+recompute whoever issues the delete.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011_rollups_fold_deleted_categories"
+down_revision = "0010_transactions_filter_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE OR REPLACE FUNCTION finances.monthly_rollups_fold_category()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- Source rows are unique per (user, month, type, currency) for one
+  -- category, so each NULL-category row is hit at most once
+  INSERT INTO finances.monthly_rollups AS r (
+      user_id, month, category_id, tra_type, currency, total, tx_count
+  )
+  SELECT user_id, month, NULL, tra_type, currency, total, tx_count
+  FROM finances.monthly_rollups
+  WHERE category_id = OLD.categories_id
+  ON CONFLICT ON CONSTRAINT uq_monthly_rollups_key DO UPDATE
+  SET total = r.total + EXCLUDED.total,
+      tx_count = r.tx_count + EXCLUDED.tx_count;
+
+  DELETE FROM finances.monthly_rollups WHERE category_id = OLD.categories_id;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_categories_fold_rollups ON finances.categories;
+CREATE TRIGGER trg_categories_fold_rollups
+BEFORE DELETE ON finances.categories
+FOR EACH ROW EXECUTE FUNCTION finances.monthly_rollups_fold_category();
+"""
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+DROP TRIGGER IF EXISTS trg_categories_fold_rollups ON finances.categories;
+DROP FUNCTION IF EXISTS finances.monthly_rollups_fold_category();
+"""
+    )
@@ -0,0 +1,25 @@
+"""Password hashes of users.
+
+users.password_hash holds the passlib hash core.security verifies logins
+against; NULL means the user cannot log in with a password. A login against
+a hash below the configured bcrypt cost rewrites it in the same transaction.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0012_users_password_hash"
+down_revision = "0011_rollups_fold_deleted_categories"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER TABLE finances.users "
+        "ADD COLUMN IF NOT EXISTS password_hash VARCHAR(255);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE finances.users DROP COLUMN IF EXISTS password_hash;")
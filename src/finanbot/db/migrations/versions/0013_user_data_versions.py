@@ -0,0 +1,126 @@
+"""Per-user change counter (the cache watermark).
+
+The watermark used to be max(updated_at) over the user's transactions and
+accounts. updated_at is now(), the writing transaction's start time, so a long
+transaction committing after a shorter, newer one never moved it, and clients
+holding the list's ETag kept getting 304.
+
+finances.user_data_versions holds a counter per user, bumped by statement
+triggers on transactions and accounts (one upsert per statement and user,
+whatever the row count). Bumps of one user serialize on that row, so every
+commit leaves a higher version, and changed_at (clock_timestamp(), never
+going backwards) orders the same way.
+
+Nothing reads max(updated_at) any more, so idx_transactions_user_updated
+(0006) is dropped rather than maintained on every transaction write.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013_user_data_versions"
+down_revision = "0012_users_password_hash"
+branch_labels = None
+depends_on = None
+
+TABLES = ("transactions", "accounts")
+EVENTS = ("insert", "update", "delete")
+
+
+def _transition(event: str) -> str:
+    # A trigger with transition tables may only fire on a single event
+    return {
+        "insert": "REFERENCING NEW TABLE AS new_rows",
+        "update": "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+        "delete": "REFERENCING OLD TABLE AS old_rows",
+    }[event]
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+CREATE TABLE IF NOT EXISTS finances.user_data_versions (
+  user_id UUID PRIMARY KEY
+    REFERENCES finances.users (users_id) ON DELETE CASCADE,
+  version BIGINT NOT NULL,
+  changed_at TIMESTAMPTZ NOT NULL
+);
+
+INSERT INTO finances.user_data_versions (user_id, version, changed_at)
+SELECT users_id, 1, clock_timestamp() FROM finances.users
+ON CONFLICT (user_id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION finances.bump_user_data_versions(user_ids UUID[])
+RETURNS VOID AS $$
+  -- Users deleted in the same statement (cascades) are skipped; sorted so
+  -- concurrent multi-user statements lock in the same order
+  INSERT INTO finances.user_data_versions AS v (user_id, version, changed_at)
+  SELECT u.users_id, 1, clock_timestamp()
+  FROM finances.users u
+  WHERE u.users_id = ANY(user_ids)
+  ORDER BY u.users_id
+  ON CONFLICT (user_id) DO UPDATE
+  SET version = v.version + 1,
+      changed_at = greatest(
+        clock_timestamp(), v.changed_at + interval '1 microsecond'
+      );
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION finances.user_data_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM finances.bump_user_data_versions(
+      ARRAY(SELECT DISTINCT user_id FROM new_rows));
+  ELSIF TG_OP = 'UPDATE' THEN
+    PERFORM finances.bump_user_data_versions(ARRAY(
+      SELECT user_id FROM old_rows UNION SELECT user_id FROM new_rows));
+  ELSE
+    PERFORM finances.bump_user_data_versions(
+      ARRAY(SELECT DISTINCT user_id FROM old_rows));
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+    )
+    for table in TABLES:
+        for event in EVENTS:
+            name = f"trg_{table}_data_version_{event}"
+            op.execute(
+                f"""
+DROP TRIGGER IF EXISTS {name} ON finances.{table};
+CREATE TRIGGER {name}
+AFTER {event.upper()} ON finances.{table}
+{_transition(event)}
+FOR EACH STATEMENT EXECUTE FUNCTION finances.user_data_changed();
+"""
+            )
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS finances.idx_transactions_user_updated;"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_updated
+ON finances.transactions (user_id, updated_at DESC);
+"""
+        )
+    for table in TABLES:
+        for event in EVENTS:
+            op.execute(
+                f"DROP TRIGGER IF EXISTS trg_{table}_data_version_{event} "
+                f"ON finances.{table};"
+            )
+    op.execute(
+        """
+DROP FUNCTION IF EXISTS finances.user_data_changed();
+DROP FUNCTION IF EXISTS finances.bump_user_data_versions(UUID[]);
+DROP TABLE IF EXISTS finances.user_data_versions;
+"""
+    )
@@ -0,0 +1,52 @@
+"""
+Opaque keyset cursors.
+
+A cursor is the sort key of the last row of a page, serialized as JSON and
+base64-encoded so clients treat it as an opaque token.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded."""
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = []
+    for value in values:
+        if isinstance(value, datetime):
+            payload.append({"dt": value.isoformat()})
+        elif isinstance(value, UUID):
+            payload.append({"uuid": str(value)})
+        else:
+            payload.append(value)
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != size:
+            raise InvalidCursorError("Malformed cursor")
+        values: list[Any] = []
+        for item in payload:
+            if isinstance(item, dict) and "dt" in item:
+                values.append(datetime.fromisoformat(item["dt"]))
+            elif isinstance(item, dict) and "uuid" in item:
+                values.append(UUID(item["uuid"]))
+            else:
+                values.append(item)
+        return tuple(values)
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError) as err:
+        # JSONDecodeError / UnicodeDecodeError are ValueError subclasses
+        raise InvalidCursorError("Malformed cursor") from err
@@ -1,21 +1,61 @@
-from typing import Generator
+"""
+Session factories.
 
-from sqlalchemy import create_engine
+Nothing here touches the settings or the database driver at import time: the
+engines and sessionmakers are built on first use, so importing the API (or a
+CLI tool, or Alembic) stays cheap. `engine`, `async_engine`, `SessionLocal`
+and `AsyncSessionLocal` remain importable as module attributes.
+"""
+
+from functools import lru_cache
+from typing import AsyncGenerator, Generator
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session as SessionType
 from sqlalchemy.orm import sessionmaker
 
-from core.config import get_settings
+from db.engines import get_async_engine, get_engine
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(
+        bind=get_engine(), autocommit=False, autoflush=False, future=True
+    )
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker() -> async_sessionmaker:
+    # expire_on_commit=False: attributes cannot be lazily refreshed outside the
+    # event loop, so returned rows must stay loaded after commit.
+    return async_sessionmaker(
+        bind=get_async_engine(), autoflush=False, expire_on_commit=False
+    )
 
-engine = create_engine(
-    get_settings().database_url, future=True, echo=False, pool_pre_ping=True
-)
 
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "SessionLocal": get_sessionmaker,
+    "AsyncSessionLocal": get_async_sessionmaker,
+}
+
+
+def __getattr__(name: str):
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
 
 
 def get_db() -> Generator[SessionType, None, None]:
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,14 +1,20 @@
 """Entry point for the src.finanbotlication.
 
-Initializes a `PostgresUtils` client from settings, ensures the
-`finanbot` schema exists, and logs available schemas and tables.
+`create_app()` is the API application factory (serve it with
+`uvicorn main:create_app --factory`). Settings, engines and other resources
+are created lazily on first use, so importing this module is cheap.
+
+Run as a script, it initializes a `PostgresUtils` client from settings,
+ensures the `finanbot` schema exists, and logs available schemas and tables.
 """
 
 import logging
 import sys
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 
 from core.config import get_settings
-from utils.postgres import PostgresUtils
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -16,6 +22,30 @@ logging.basicConfig(
 )
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    from db.engines import dispose_engines_async
+
+    await dispose_engines_async()
+
+
+def create_app() -> FastAPI:
+    """Build the API application: v1 routers, request metrics and /metrics."""
+    from api import metrics as metrics_api
+    from api.v1 import classification, forecast, summary, transactions
+    from core.metrics import MetricsMiddleware
+
+    app = FastAPI(title="finanbot", lifespan=_lifespan)
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(transactions.router, prefix="/api/v1")
+    app.include_router(summary.router, prefix="/api/v1")
+    app.include_router(forecast.router, prefix="/api/v1")
+    app.include_router(classification.router, prefix="/api/v1")
+    app.include_router(metrics_api.router)
+    return app
+
+
 def main() -> None:
     """Initialize DB client, ensure schema exists, and list schemas/tables.
 
@@ -29,6 +59,9 @@ def main() -> None:
     - Logs results and attempts to gracefully close the DB client if it exposes
     a `close()` method.
     """
+    # pandas-heavy; only the script path needs it
+    from utils.postgres import PostgresUtils
+
     settings = get_settings()
 
     db = PostgresUtils(
@@ -1,18 +1,24 @@
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from enum import Enum
 from uuid import UUID
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
+    Computed,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
+    MetaData,
     Numeric,
     String,
     Text,
     UniqueConstraint,
     func,
 )
-from sqlalchemy.dialects.postgresql import CHAR
+from sqlalchemy.dialects.postgresql import CHAR, TSVECTOR
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -22,7 +28,9 @@ from sqlalchemy.orm import (
 
 
 class Base(DeclarativeBase):
-    pass
+    # Every table lives in the finances schema; the foreign keys name it, so
+    # the tables must too or the relationships cannot find their join columns.
+    metadata = MetaData(schema="finances")
 
 
 class TransactionType(str, Enum):
@@ -38,6 +46,8 @@ class User(Base):
     username: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
     email: Mapped[str] = mapped_column(String(150), nullable=True, unique=True)
     display_name: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    # passlib hash (core.security); None: no password login
+    password_hash: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -74,7 +84,11 @@ class Account(Base):
     name: Mapped[str] = mapped_column("acc_name", String(50), nullable=False)
     type: Mapped[str] = mapped_column("acc_type", String(50), nullable=False)
     currency: Mapped[str] = mapped_column(CHAR(3), nullable=False, default="BRL")
-    balance: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False, default=0)
+    balance: Mapped[Decimal] = mapped_column(Numeric(18, 2), nullable=False, default=0)
+    # balance = opening_balance + signed sum of the account's transactions
+    opening_balance: Mapped[Decimal] = mapped_column(
+        Numeric(18, 2), nullable=False, default=0
+    )
     details: Mapped[dict[str, object]] = mapped_column(
         JSON, nullable=False, default=dict
     )
@@ -117,6 +131,28 @@ class Category(Base):
     transactions: Mapped[list["Transaction"]] = relationship(back_populates="category")
 
 
+class CategoryClosure(Base):
+    """
+    Every (ancestor, descendant) pair of the category tree, self pairs at
+    depth 0. Maintained by database triggers on finances.categories.
+    """
+
+    __tablename__ = "category_closure"
+    __table_args__ = (
+        Index("idx_category_closure_descendant", "descendant_id", "ancestor_id"),
+    )
+
+    ancestor_id: Mapped[UUID] = mapped_column(
+        ForeignKey("finances.categories.categories_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    descendant_id: Mapped[UUID] = mapped_column(
+        ForeignKey("finances.categories.categories_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    depth: Mapped[int] = mapped_column(nullable=False)
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
@@ -142,7 +178,16 @@ class Transaction(Base):
     currency: Mapped[str] = mapped_column(CHAR(3), nullable=False, default="USD")
     type: Mapped[TransactionType] = mapped_column("tra_type", Text, nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Search document for notes; generated by the database, never loaded by
+    # default (crud.search_transactions_stmt)
+    notes_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('portuguese'::regconfig, coalesce(notes, ''))"),
+        deferred=True,
+    )
     attachment_path: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # sha256 of the statement line a row was imported from (services/import_service)
+    import_hash: Mapped[str | None] = mapped_column(CHAR(64), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -158,6 +203,112 @@ class Transaction(Base):
         return f"<Transaction {self.id} {self.amount} {self.currency}>"
 
 
+# Keyset pagination: match ORDER BY occurred_at DESC, transactions_id DESC and
+# carry every filter column, so filtered id scans are index-only
+# (repositories.transaction_filter)
+_FILTER_COLUMNS = ("account_id", "category_id", "tra_type", "currency", "amount")
+Index(
+    "idx_transactions_user_occurred_cover",
+    Transaction.user_id,
+    Transaction.occurred_at.desc(),
+    Transaction.id.desc(),
+    postgresql_include=list(_FILTER_COLUMNS),
+)
+Index(
+    "idx_transactions_user_account_occurred",
+    Transaction.user_id,
+    Transaction.account_id,
+    Transaction.occurred_at.desc(),
+    Transaction.id.desc(),
+    postgresql_include=[c for c in _FILTER_COLUMNS if c != "account_id"],
+)
+Index(
+    "idx_transactions_user_category_occurred",
+    Transaction.user_id,
+    Transaction.category_id,
+    Transaction.occurred_at.desc(),
+    Transaction.id.desc(),
+    postgresql_include=[c for c in _FILTER_COLUMNS if c != "category_id"],
+)
+# Backlog of the reclassification job, walked in primary-key order
+Index(
+    "idx_transactions_user_uncategorized",
+    Transaction.user_id,
+    Transaction.id,
+    postgresql_where=Transaction.category_id.is_(None),
+)
+# Notes search: full text on the generated column, trigrams for fuzzy matches
+Index("idx_transactions_notes_tsv", Transaction.notes_tsv, postgresql_using="gin")
+Index(
+    "idx_transactions_notes_trgm",
+    Transaction.notes,
+    postgresql_using="gin",
+    postgresql_ops={"notes": "gin_trgm_ops"},
+)
+# Statement import dedup: ON CONFLICT target of crud.import_transactions
+Index(
+    "uq_transactions_user_import_hash",
+    Transaction.user_id,
+    Transaction.import_hash,
+    unique=True,
+    postgresql_where=Transaction.import_hash.is_not(None),
+)
+
+
+class MonthlyRollup(Base):
+    """
+    Per-month totals, maintained by the crud write paths (see db.aggregates).
+    `total` is the plain sum of `amount`; split by `type` for signed views.
+    A deleted category's rows are folded into the uncategorized ones by a
+    trigger on finances.categories (migration 0011).
+    """
+
+    __tablename__ = "monthly_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "month",
+            "category_id",
+            "tra_type",
+            "currency",
+            name="uq_monthly_rollups_key",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column("monthly_rollups_id", primary_key=True)
+    user_id: Mapped[UUID] = mapped_column(
+        ForeignKey("finances.users.users_id", ondelete="CASCADE"), nullable=False
+    )
+    month: Mapped[date] = mapped_column(Date, nullable=False)
+    category_id: Mapped[UUID | None] = mapped_column(
+        ForeignKey("finances.categories.categories_id", ondelete="CASCADE"),
+        nullable=True,
+    )
+    type: Mapped[TransactionType] = mapped_column("tra_type", Text, nullable=False)
+    currency: Mapped[str] = mapped_column(CHAR(3), nullable=False)
+    total: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False, default=0)
+    tx_count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class UserDataVersion(Base):
+    """
+    Per-user change counter, bumped by statement triggers on transactions and
+    accounts (migration 0013); the watermark keying derived-data caches and
+    list ETags. No row: the user has not changed anything yet.
+    """
+
+    __tablename__ = "user_data_versions"
+
+    user_id: Mapped[UUID] = mapped_column(
+        ForeignKey("finances.users.users_id", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
 class Setting(Base):
     __tablename__ = "settings"
 
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 from uuid import UUID
 
@@ -7,7 +7,7 @@ from pydantic import BaseModel, ConfigDict
 
 class TransactionCreate(BaseModel):
     account_id: UUID
-    category_id: UUID
+    category_id: Optional[UUID] = None
     occurred_at: datetime
     amount: float
     currency: str = "BRL"
@@ -39,4 +39,77 @@ class TransactionUpdate(BaseModel):
     currency: Optional[str] = None
     type: Optional[str] = None
     notes: Optional[str] = None
-    attachment_path: Optional[str] = None
+
+
+class BulkRowError(BaseModel):
+    index: int
+    detail: str
+
+
+class TransactionBulkResult(BaseModel):
+    inserted: int
+    errors: list[BulkRowError]
+
+
+class MonthlySummaryRow(BaseModel):
+    month: date
+    category_id: Optional[UUID]
+    type: str
+    currency: str
+    total: float
+    tx_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CategorySummaryRow(BaseModel):
+    category_id: UUID
+    type: str
+    currency: str
+    total: float
+    tx_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ForecastPoint(BaseModel):
+    day: date
+    balance: float
+
+
+class RecurringItem(BaseModel):
+    category_id: Optional[UUID]
+    type: str
+    amount: float
+    day_of_month: int
+
+
+class AccountForecast(BaseModel):
+    account_id: UUID
+    currency: str
+    current_balance: float
+    points: list[ForecastPoint]
+    recurring: list[RecurringItem]
+
+
+class ForecastRead(BaseModel):
+    as_of: date
+    horizon_days: int
+    accounts: list[AccountForecast]
+
+
+class CategorySuggestion(BaseModel):
+    transaction_id: UUID
+    category_id: UUID
+    confidence: float
+
+
+class ReclassifyResult(BaseModel):
+    scanned: int
+    assigned: int
+
+
+class StatementImportResult(BaseModel):
+    read: int
+    inserted: int
+    duplicates: int
@@ -5,14 +5,22 @@ It’s where you implement business logic, validation, and orchestration that go
 simple CRUD
 """
 
+from typing import Any
 from uuid import UUID
 
 from fastapi import UploadFile
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from attachments import storage
+from core.config import get_settings
 from db import crud
-from models.schemas import TransactionCreate, TransactionUpdate
+from models.schemas import (
+    BulkRowError,
+    TransactionBulkResult,
+    TransactionCreate,
+    TransactionUpdate,
+)
 
 
 def create_transaction_with_attachment(
@@ -21,12 +29,32 @@ def create_transaction_with_attachment(
     transaction_data: TransactionCreate,
     attachment: UploadFile | None = None,
 ):
-    transaction = crud.create_transaction(db, user_id, transaction_data)
-
-    if attachment:
-        path = storage.save_attachment(attachment, transaction.id)
-        crud.update_transaction(db, transaction.id, {"attachment_path": path})
-
+    """
+    One INSERT and one commit. The upload is staged first so its final path
+    goes into the row; the file is committed right before the database and
+    released again if the database commit fails.
+    """
+    staged = storage.stage_attachment(attachment) if attachment else None
+    committed = None
+    transaction = None
+    try:
+        transaction = crud.create_transaction(
+            db,
+            user_id,
+            transaction_data,
+            attachment_path=staged.path if staged else None,
+            commit=False,
+        )
+        if staged:
+            committed = storage.commit_attachment(staged, transaction.id)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        if committed and transaction is not None:
+            storage.release_attachment(committed, transaction.id)
+        elif staged:
+            storage.discard_attachment(staged)
+        raise
     return transaction
 
 
@@ -36,18 +64,78 @@ def update_transaction_with_attachment(
     patch_data: TransactionUpdate,
     attachment: UploadFile | None = None,
 ):
-    patch_dict = patch_data.dict(exclude_unset=True)
+    """
+    Same unit of work as creation; the replaced attachment is released only
+    after the new row state is committed.
+    """
+    patch_dict = patch_data.model_dump(exclude_unset=True)
+    staged = storage.stage_attachment(attachment) if attachment else None
+    committed = None
+    previous_path = None
+    try:
+        if staged:
+            current = crud.get_transaction(db, tx_id)
+            previous_path = current.attachment_path if current else None
+            patch_dict["attachment_path"] = staged.path
 
-    if attachment:
-        path = storage.save_attachment(attachment, tx_id)
-        patch_dict["attachment_path"] = path
+        updated = crud.update_transaction(db, tx_id, patch_dict, commit=False)
+        if updated is not None and staged:
+            committed = storage.commit_attachment(staged, tx_id)
+        elif staged:
+            storage.discard_attachment(staged)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        # Re-uploading the current content shares the old reference; keep it
+        if committed and committed != previous_path:
+            storage.release_attachment(committed, tx_id)
+        elif staged and not committed:
+            storage.discard_attachment(staged)
+        raise
 
-    updated = crud.update_transaction(db, tx_id, patch_dict)
+    if previous_path and previous_path != patch_dict.get("attachment_path"):
+        storage.release_attachment(previous_path, tx_id)
     return updated
 
 
 def delete_transaction_and_attachment(db: Session, tx_id: UUID):
+    """The file goes only once the row deletion is committed."""
     deleted = crud.delete_transaction(db, tx_id)
     if deleted:
-        storage.delete_attachment(tx_id)
+        storage.delete_attachment(tx_id, deleted.attachment_path)
     return deleted
+
+
+def bulk_create_transactions(
+    db: Session,
+    user_id: UUID,
+    payloads: list[dict[str, Any]],
+    batch_size: int | None = None,
+) -> TransactionBulkResult:
+    """
+    Validate a batch of raw payloads and insert the valid ones in batches.
+    Invalid payloads and rows rejected by the database are reported by their
+    index in `payloads`; the rest of the batch is still written.
+    """
+    valid: list[TransactionCreate] = []
+    positions: list[int] = []
+    errors: list[BulkRowError] = []
+
+    for index, payload in enumerate(payloads):
+        try:
+            valid.append(TransactionCreate.model_validate(payload))
+            positions.append(index)
+        except ValidationError as err:
+            errors.append(BulkRowError(index=index, detail=str(err)))
+
+    inserted, db_errors = crud.create_transactions_bulk(
+        db,
+        user_id,
+        valid,
+        batch_size=batch_size or get_settings().bulk_insert_batch_size,
+    )
+    errors.extend(
+        BulkRowError(index=positions[pos], detail=detail) for pos, detail in db_errors
+    )
+    errors.sort(key=lambda e: e.index)
+    return TransactionBulkResult(inserted=inserted, errors=errors)
@@ -1,14 +1,27 @@
-import shutil
+import argparse
+import hashlib
+import json
+import os
 import subprocess
+import zipfile
 from datetime import datetime
 from pathlib import Path
 
-from src.finanbot.core.config import get_settings
+from core.config import get_settings
 
-settings = get_settings()
+# Attachment backups form chains: one full backup followed by incrementals.
+# Each backup writes an archive with only the files it had to copy, plus a
+# manifest of the complete tree state (path -> size, mtime, sha256) and the
+# paths deleted since its parent (tombstones).
+MANIFEST_SUFFIX = ".manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Skipped while scanning: in-flight uploads and the store's lock files
+# (attachments.storage TMP_DIR and LOCKS_DIR)
+EXCLUDED_DIRS = {"tmp", "locks"}
 
 
 def backup_database() -> Path:
+    settings = get_settings()
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"db_backup_{timestamp}.sql"
     backup_path = Path(settings.backup_dir) / filename
@@ -34,20 +47,157 @@ def backup_database() -> Path:
     return backup_path
 
 
-def backup_attachments() -> Path:
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    archive_name = f"attachments_{timestamp}.zip"
-    archive_path = Path(settings.backup_dir) / archive_name
+def _sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with path.open("rb") as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _scan(root: Path, previous: dict[str, dict]) -> dict[str, dict]:
+    """
+    Current state of `root`. Files whose size and mtime match the previous
+    manifest keep their recorded hash; only new or touched files are read.
+    Files deleted while the scan runs are left out.
+    """
+    state: dict[str, dict] = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        if Path(dirpath) == root:
+            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+        for name in filenames:
+            path = Path(dirpath) / name
+            rel = path.relative_to(root).as_posix()
+            try:
+                st = path.stat()
+                prev = previous.get(rel)
+                if (
+                    prev is not None
+                    and prev["size"] == st.st_size
+                    and prev["mtime_ns"] == st.st_mtime_ns
+                ):
+                    state[rel] = prev
+                else:
+                    state[rel] = {
+                        "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns,
+                        "sha256": _sha256(path),
+                    }
+            except FileNotFoundError:
+                continue
+    return state
+
+
+def _manifests(backup_dir: Path) -> list[Path]:
+    return sorted(backup_dir.glob(f"attachments_*{MANIFEST_SUFFIX}"))
+
 
-    shutil.make_archive(
-        base_name=str(archive_path).replace(".zip", ""),
-        format="zip",
-        root_dir=settings.attachments_dir,
+def _load_manifest(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def backup_attachments(incremental: bool = True) -> Path:
+    """
+    Back up the attachments directory and return the archive path.
+
+    With `incremental`, only files that are new or changed since the latest
+    backup are archived, so time and size scale with churn rather than total
+    storage. A full backup is taken when no previous manifest exists.
+    """
+    settings = get_settings()
+    backup_dir = Path(settings.backup_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    root = Path(settings.attachments_dir)
+
+    existing = _manifests(backup_dir)
+    parent = _load_manifest(existing[-1]) if incremental and existing else None
+    previous = parent["files"] if parent else {}
+
+    state = _scan(root, previous)
+    changed = sorted(
+        rel
+        for rel, meta in state.items()
+        if rel not in previous or previous[rel]["sha256"] != meta["sha256"]
+    )
+
+    kind = "incremental" if parent else "full"
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    name = f"attachments_{timestamp}_{kind}"
+    archive_path = backup_dir / f"{name}.zip"
+
+    # Receipts are already-compressed PDFs/images; storing avoids wasted CPU
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for rel in changed:
+            try:
+                zf.write(root / rel, arcname=rel)
+            except FileNotFoundError:
+                # Released since the scan: record it as gone, not as archived
+                del state[rel]
+    deleted = sorted(set(previous) - set(state))
+
+    manifest = {
+        "kind": kind,
+        "created_at": datetime.now().isoformat(),
+        "parent": existing[-1].name if parent else None,
+        "archive": archive_path.name,
+        "files": state,
+        "deleted": deleted,
+    }
+    (backup_dir / f"{name}{MANIFEST_SUFFIX}").write_text(
+        json.dumps(manifest), encoding="utf-8"
     )
     return archive_path
 
 
+def restore_attachments(target_dir: Path, manifest_name: str | None = None) -> Path:
+    """
+    Rebuild the attachments tree in `target_dir` as of `manifest_name` (the
+    latest backup by default) by replaying its full backup and every
+    incremental up to it, applying tombstones along the way.
+    """
+    backup_dir = Path(get_settings().backup_dir)
+    if manifest_name is None:
+        existing = _manifests(backup_dir)
+        if not existing:
+            raise FileNotFoundError(f"No attachment backups in {backup_dir}")
+        manifest_name = existing[-1].name
+
+    chain: list[dict] = []
+    current: str | None = manifest_name
+    while current:
+        manifest = _load_manifest(backup_dir / current)
+        chain.append(manifest)
+        current = manifest["parent"]
+    chain.reverse()
+
+    target_dir.mkdir(parents=True, exist_ok=True)
+    for manifest in chain:
+        for rel in manifest["deleted"]:
+            (target_dir / rel).unlink(missing_ok=True)
+        with zipfile.ZipFile(backup_dir / manifest["archive"]) as zf:
+            zf.extractall(target_dir)
+    return target_dir
+
+
 def run_backup() -> tuple[Path, Path]:
     db_path = backup_database()
     attachments_path = backup_attachments()
     return db_path, attachments_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Attachment backups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backup_cmd = sub.add_parser("backup", help="take an attachment backup")
+    backup_cmd.add_argument(
+        "--full", action="store_true", help="start a new chain with a full backup"
+    )
+    restore_cmd = sub.add_parser("restore", help="replay a backup chain")
+    restore_cmd.add_argument("target", type=Path)
+    restore_cmd.add_argument("--manifest", default=None)
+    args = parser.parse_args()
+
+    if args.command == "backup":
+        print(backup_attachments(incremental=not args.full))
+    else:
+        print(restore_attachments(args.target, args.manifest))
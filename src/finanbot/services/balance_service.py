@@ -0,0 +1,106 @@
+"""
+Reconciliation of the incrementally maintained account balances.
+
+The crud write paths keep `accounts.balance` current; this job recomputes every
+balance from scratch in one set-based query, reports accounts that drifted and
+(optionally) corrects them.
+"""
+
+import argparse
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from db import aggregates
+from models.orm_models import Account
+from models.orm_models import Transaction as TransactionModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BalanceDrift:
+    account_id: UUID
+    stored: Decimal
+    expected: Decimal
+
+    @property
+    def difference(self) -> Decimal:
+        return self.stored - self.expected
+
+
+def _expected_balances():
+    totals = (
+        select(
+            TransactionModel.account_id,
+            func.sum(aggregates.signed_amount_expr()).label("total"),
+        )
+        .group_by(TransactionModel.account_id)
+        .subquery()
+    )
+    return (
+        select(
+            Account.id.label("account_id"),
+            Account.balance.label("stored"),
+            (Account.opening_balance + func.coalesce(totals.c.total, 0)).label(
+                "expected"
+            ),
+        )
+        .outerjoin(totals, totals.c.account_id == Account.id)
+        .subquery()
+    )
+
+
+def reconcile_balances(db: Session, fix: bool = True) -> list[BalanceDrift]:
+    """
+    Compare every stored balance with opening_balance + signed transaction sum.
+
+    Runs at REPEATABLE READ so that a transaction written concurrently makes
+    the fix fail with a serialization error instead of silently overwriting a
+    balance with a stale total; simply re-run the job in that case.
+    """
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    expected = _expected_balances()
+    rows = db.execute(
+        select(expected).where(expected.c.stored != expected.c.expected)
+    ).all()
+    drifts = [BalanceDrift(r.account_id, r.stored, r.expected) for r in rows]
+
+    if drifts and fix:
+        db.execute(
+            update(Account)
+            .where(Account.id == expected.c.account_id)
+            .where(expected.c.stored != expected.c.expected)
+            .values(balance=expected.c.expected)
+        )
+    db.commit()
+
+    for drift in drifts:
+        logger.warning(
+            "Balance drift on account %s: stored=%s expected=%s (%s)",
+            drift.account_id,
+            drift.stored,
+            drift.expected,
+            "fixed" if fix else "not fixed",
+        )
+    return drifts
+
+
+if __name__ == "__main__":
+    from db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Reconcile account balances")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="report drift without fixing it"
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        found = reconcile_balances(session, fix=not args.dry_run)
+    print(f"{len(found)} account(s) drifted")
@@ -0,0 +1,220 @@
+"""
+Automatic expense classification ("classificação automática de despesas").
+
+A per-user naive Bayes model (analytics.classifier) is fitted on the user's
+categorized transactions and applied to the uncategorized ones:
+
+- `suggest_categories` returns the best guess and its confidence for the
+  newest uncategorized rows, without writing anything;
+- `reclassify_uncategorized` walks the whole backlog in primary-key batches,
+  predicts each batch in one vectorized pass and assigns every prediction at
+  or above the confidence threshold with crud.assign_categories (one UPDATE
+  and one commit per batch, rollups adjusted in the same transaction).
+
+Fitted models are cached per user, keyed on crud.get_user_watermark like the
+forecasts, and evicted by LRU/TTL.
+"""
+
+import argparse
+import logging
+import time
+from collections import Counter
+from functools import lru_cache
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import BigInteger, func, select
+from sqlalchemy.orm import Session
+
+from analytics import classifier
+from core.config import get_settings
+from db import crud
+from models.orm_models import Transaction as TransactionModel
+from models.schemas import CategorySuggestion, ReclassifyResult
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Below this many categorized rows there is nothing worth learning
+MIN_TRAINING_ROWS = 20
+# Categories with fewer examples are left out of the model; with fewer than
+# two categories left no model is fitted (one class always wins at 100%)
+MIN_CATEGORY_ROWS = 5
+
+_FEATURE_COLUMNS = (
+    TransactionModel.notes,
+    func.round(TransactionModel.amount * 100).cast(BigInteger),
+    TransactionModel.account_id,
+    TransactionModel.type,
+)
+
+
+def training_stmt(user_id: UUID):
+    return select(*_FEATURE_COLUMNS, TransactionModel.category_id).where(
+        TransactionModel.user_id == user_id,
+        TransactionModel.category_id.is_not(None),
+    )
+
+
+def _uncategorized(user_id: UUID):
+    return select(TransactionModel.id, *_FEATURE_COLUMNS).where(
+        TransactionModel.user_id == user_id,
+        TransactionModel.category_id.is_(None),
+    )
+
+
+def uncategorized_stmt(user_id: UUID, limit: int, after: UUID | None = None):
+    """Backlog page in primary-key order (idx_transactions_user_uncategorized)."""
+    stmt = _uncategorized(user_id).order_by(TransactionModel.id).limit(limit)
+    if after is not None:
+        stmt = stmt.where(TransactionModel.id > after)
+    return stmt
+
+
+def _featurize(rows) -> classifier.FeatureBatch:
+    notes, cents, accounts, types = (list(c) for c in zip(*rows, strict=True))
+    return classifier.featurize(notes, np.array(cents, dtype=np.int64), accounts, types)
+
+
+def train(db: Session, user_id: UUID) -> classifier.CategoryModel | None:
+    rows = db.execute(training_stmt(user_id)).all()
+    counts = Counter(row[-1] for row in rows)
+    categories = [
+        c for c, n in counts.items() if c is not None and n >= MIN_CATEGORY_ROWS
+    ]
+    codes: dict[UUID | None, int] = {c: i for i, c in enumerate(categories)}
+    training = [row for row in rows if row[-1] in codes]
+    if len(categories) < 2 or len(training) < MIN_TRAINING_ROWS:
+        return None
+    labels = np.fromiter(
+        (codes[row[-1]] for row in training), dtype=np.int64, count=len(training)
+    )
+    batch = _featurize([row[:-1] for row in training])
+    return classifier.fit(batch, labels, categories)
+
+
+@lru_cache(maxsize=None)
+def _model_cache() -> TTLCache[tuple, classifier.CategoryModel]:
+    """(user, watermark) -> fitted model"""
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.classifier_cache_size,
+        ttl=settings.classifier_cache_ttl_seconds,
+    )
+
+
+def get_model(db: Session, user_id: UUID) -> classifier.CategoryModel | None:
+    key = (user_id, crud.get_user_watermark(db, user_id))
+    cache = _model_cache()
+    model = cache.get(key)
+    if model is None:
+        model = train(db, user_id)
+        if model is not None:
+            cache.set(key, model)
+    return model
+
+
+def suggest_categories(
+    db: Session, user_id: UUID, limit: int = 100
+) -> list[CategorySuggestion]:
+    model = get_model(db, user_id)
+    if model is None:
+        return []
+    newest = _uncategorized(user_id).order_by(
+        TransactionModel.occurred_at.desc(), TransactionModel.id.desc()
+    )
+    rows = db.execute(newest.limit(limit)).all()
+    if not rows:
+        return []
+    best, confidence = model.predict(_featurize([row[1:] for row in rows]))
+    return [
+        CategorySuggestion(
+            transaction_id=row[0],
+            category_id=model.categories[code],
+            confidence=round(p, 4),
+        )
+        for row, code, p in zip(rows, best.tolist(), confidence.tolist(), strict=True)
+    ]
+
+
+def reclassify_uncategorized(
+    db: Session,
+    user_id: UUID,
+    min_confidence: float | None = None,
+    batch_size: int | None = None,
+    dry_run: bool = False,
+) -> ReclassifyResult:
+    """
+    Categorize the user's uncategorized transactions the model is confident
+    about. One model fit for the whole run; each batch is committed on its
+    own, so an interrupted run keeps its progress.
+    """
+    settings = get_settings()
+    if min_confidence is None:
+        min_confidence = settings.classifier_min_confidence
+    batch_size = batch_size or settings.classifier_batch_size
+
+    model = get_model(db, user_id)
+    if model is None:
+        return ReclassifyResult(scanned=0, assigned=0)
+
+    scanned = assigned = 0
+    after = None
+    started = time.perf_counter()
+    while True:
+        rows = db.execute(uncategorized_stmt(user_id, batch_size, after)).all()
+        if not rows:
+            break
+        after = rows[-1][0]
+        scanned += len(rows)
+
+        best, confidence = model.predict(_featurize([row[1:] for row in rows]))
+        sure = np.flatnonzero(confidence >= min_confidence)
+        assignments = [
+            (rows[i][0], model.categories[code])
+            for i, code in zip(sure.tolist(), best[sure].tolist(), strict=True)
+        ]
+        if dry_run:
+            assigned += len(assignments)
+        else:
+            assigned += crud.assign_categories(db, assignments)
+        if len(rows) < batch_size:
+            break
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "reclassified %d/%d uncategorized transactions of %s in %.1f s",
+        assigned,
+        scanned,
+        user_id,
+        elapsed,
+    )
+    return ReclassifyResult(scanned=scanned, assigned=assigned)
+
+
+if __name__ == "__main__":
+    from db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(
+        description="Assign categories to uncategorized transactions"
+    )
+    parser.add_argument("user_id", type=UUID)
+    parser.add_argument(
+        "--min-confidence", type=float, help="default: CLASSIFIER_MIN_CONFIDENCE"
+    )
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="count assignments, write nothing"
+    )
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        result = reclassify_uncategorized(
+            session,
+            args.user_id,
+            min_confidence=args.min_confidence,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+    print(f"{result.assigned} of {result.scanned} transaction(s) categorized")
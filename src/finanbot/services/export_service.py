@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import AsyncIterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import Row
+
+EXPORT_FIELDS = [
+    "id",
+    "occurred_at",
+    "account_id",
+    "category_id",
+    "type",
+    "amount",
+    "currency",
+    "notes",
+]
+
+
+def _to_text(value: object) -> object:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+async def csv_chunks(partitions: AsyncIterator[Sequence[Row]]) -> AsyncIterator[str]:
+    """Render row chunks as CSV text, one string per chunk, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue()
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_to_text(v) for v in row] for row in rows)
+        yield buffer.getvalue()
+
+
+async def ndjson_chunks(
+    partitions: AsyncIterator[Sequence[Row]],
+) -> AsyncIterator[str]:
+    """Render row chunks as newline-delimited JSON, one string per chunk."""
+    async for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_to_text, row), strict=True))) + "\n"
+            for row in rows
+        )
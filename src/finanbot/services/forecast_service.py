@@ -0,0 +1,354 @@
+"""
+Balance forecasting ("previsão de saldo futuro").
+
+Every account of a user is projected day by day, `horizon_days` ahead, from
+the columnar history (analytics.columnar). All accounts are fitted together
+with array operations; nothing loops over transactions or accounts.
+
+- Recurring items: (account, category, type) series that show up about once
+  a month with a stable amount (salary, rent, subscriptions) are replayed on
+  their usual day of the month.
+- Residual flow: everything else, as a monthly amount per account blending
+  the same calendar month in past years (seasonality) with the trailing
+  months' mean, spread evenly over the days of the month.
+
+Forecasts are cached per user and keyed on crud.get_user_watermark, so
+dashboard reloads reuse the fit until a transaction or account changes.
+"""
+
+import argparse
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from analytics.columnar import TYPES, TransactionColumns, load_transactions
+from core.config import get_settings
+from db import crud
+from models.orm_models import Account
+from models.schemas import (
+    AccountForecast,
+    ForecastPoint,
+    ForecastRead,
+    RecurringItem,
+)
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Recurring detection runs over this many full months before the current one
+RECURRING_WINDOW = 6
+RECURRING_MIN_MONTHS = 4
+# occurrences per month present; above this it is frequent spending, not a bill
+RECURRING_MAX_PER_MONTH = 1.25
+# coefficient of variation of the monthly amount
+RECURRING_MAX_CV = 0.25
+TRAILING_MONTHS = 3
+SEASONAL_WEIGHT = 0.5
+
+
+@dataclass(frozen=True)
+class RecurringSeries:
+    account: np.ndarray  # index into the accounts being forecast
+    category: np.ndarray  # category code, NO_CATEGORY = -1
+    type: np.ndarray
+    amount_cents: np.ndarray  # signed, mean per month
+    day: np.ndarray  # usual day of the month
+    seen_this_month: np.ndarray
+    member: np.ndarray  # per history row: belongs to a recurring series
+
+
+def _month_starts(first: int, last: int) -> np.ndarray:
+    """Day index of the first day of months first..last (datetime64[M] ints)."""
+    months = np.arange(first, last + 1).astype("datetime64[M]")
+    return months.astype("datetime64[D]").astype(np.int64)
+
+
+def _days_in_month(months: np.ndarray) -> np.ndarray:
+    starts = months.astype("datetime64[M]").astype("datetime64[D]")
+    ends = (months + 1).astype("datetime64[M]").astype("datetime64[D]")
+    return (ends - starts).astype(np.int64)
+
+
+def detect_recurring(
+    cols: TransactionColumns,
+    account: np.ndarray,
+    signed: np.ndarray,
+    current_month: int,
+) -> RecurringSeries:
+    """
+    Find monthly, stable-amount series among the rows of the last
+    RECURRING_WINDOW full months. `account` and `signed` are per row.
+    """
+    months = cols.months()
+    days = cols.days()
+    n_types = len(TYPES)
+    n_categories = len(cols.categories) + 1
+
+    # One integer per (account, category, type); category shifted past -1
+    flat = (account * n_categories + cols.category + 1) * n_types + cols.type
+    recent = (months >= current_month - RECURRING_WINDOW) & (months < current_month)
+    series, inverse = np.unique(flat[recent], return_inverse=True)
+    n = len(series)
+
+    # Per (series, month): amount and number of rows
+    month_start = months.astype("datetime64[M]").astype("datetime64[D]")
+    day_of_month = days - month_start.astype(np.int64) + 1
+    rel_month = months[recent] - (current_month - RECURRING_WINDOW)
+    cell = inverse * RECURRING_WINDOW + rel_month
+    cell_sum = np.bincount(
+        cell, weights=signed[recent], minlength=n * RECURRING_WINDOW
+    ).reshape(n, RECURRING_WINDOW)
+    cell_count = np.bincount(cell, minlength=n * RECURRING_WINDOW).reshape(
+        n, RECURRING_WINDOW
+    )
+
+    present = cell_count > 0
+    months_present = present.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = cell_sum.sum(axis=1) / months_present
+        spread = np.sqrt(
+            (np.where(present, cell_sum - mean[:, None], 0.0) ** 2).sum(axis=1)
+            / months_present
+        )
+        cv = spread / np.abs(mean)
+        per_month = cell_count.sum(axis=1) / months_present
+        day = np.bincount(inverse, weights=day_of_month[recent], minlength=n) / (
+            cell_count.sum(axis=1)
+        )
+    keep = (
+        (months_present >= RECURRING_MIN_MONTHS)
+        & (per_month <= RECURRING_MAX_PER_MONTH)
+        & (cv <= RECURRING_MAX_CV)
+        & (mean != 0)
+    )
+
+    chosen = series[keep]
+    acct, category, tx_type = np.unravel_index(
+        chosen, (int(account.max(initial=0)) + 1, n_categories, n_types)
+    )
+    current = months == current_month
+    return RecurringSeries(
+        account=acct,
+        category=category - 1,
+        type=tx_type,
+        amount_cents=np.rint(mean[keep]).astype(np.int64),
+        day=np.clip(np.rint(day[keep]), 1, 31).astype(np.int64),
+        seen_this_month=np.isin(chosen, flat[current]),
+        member=np.isin(flat, chosen),
+    )
+
+
+def _month_matrix(
+    account: np.ndarray,
+    months: np.ndarray,
+    weights: np.ndarray | None,
+    n_accounts: int,
+    first_month: int,
+    current_month: int,
+) -> np.ndarray:
+    """accounts x history months sums (row counts without `weights`)."""
+    n_months = current_month - first_month
+    history = months < current_month
+    cell = account[history] * n_months + (months[history] - first_month)
+    return np.bincount(
+        cell,
+        weights=None if weights is None else weights[history],
+        minlength=n_accounts * n_months,
+    ).reshape(n_accounts, n_months)
+
+
+def _residual_monthly(
+    flow: np.ndarray,
+    active: np.ndarray,
+    first_month: int,
+    current_month: int,
+    forecast_months: np.ndarray,
+) -> np.ndarray:
+    """
+    Expected non-recurring flow (cents) per account and forecast month, from
+    the accounts x months history `flow`; `active` masks out the months
+    before each account's first transaction, which would drag means to zero.
+    """
+    n_months = current_month - first_month
+    active = active.astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overall = np.nan_to_num((flow * active).sum(axis=1) / active.sum(axis=1))
+        tail = slice(max(n_months - TRAILING_MONTHS, 0), n_months)
+        trailing = (flow[:, tail] * active[:, tail]).sum(axis=1) / active[:, tail].sum(
+            axis=1
+        )
+        trailing = np.where(np.isnan(trailing), overall, trailing)
+
+        calendar = np.arange(first_month, current_month) % 12
+        one_hot = (calendar[:, None] == np.arange(12)).astype(np.float64)
+        seasonal_n = active @ one_hot
+        seasonal = np.where(
+            seasonal_n > 0, ((flow * active) @ one_hot) / seasonal_n, overall[:, None]
+        )
+
+    target = seasonal[:, forecast_months % 12]
+    return SEASONAL_WEIGHT * target + (1 - SEASONAL_WEIGHT) * trailing[:, None]
+
+
+def build_forecast(
+    db: Session,
+    user_id: UUID,
+    horizon_days: int = 90,
+    lookback_months: int = 24,
+    today: date | None = None,
+) -> ForecastRead:
+    today = today or datetime.now(timezone.utc).date()
+    accounts = db.execute(
+        select(Account.id, Account.currency, Account.balance)
+        .where(Account.user_id == user_id)
+        .order_by(Account.name)
+    ).all()
+    if not accounts:
+        return ForecastRead(as_of=today, horizon_days=horizon_days, accounts=[])
+
+    current_month = int(np.datetime64(today, "M").astype(np.int64))
+    first_month = current_month - lookback_months
+    cols = load_transactions(
+        db,
+        user_id,
+        date_from=datetime.combine(
+            np.datetime64(first_month, "M").astype(date), time(), timezone.utc
+        ),
+        date_to=datetime.combine(today + timedelta(days=1), time(), timezone.utc),
+    )
+
+    position = {row.id: i for i, row in enumerate(accounts)}
+    to_position = np.array([position.get(a, -1) for a in cols.accounts], np.int64)
+    account = to_position[cols.account] if len(cols) else np.empty(0, np.int64)
+    owned = account >= 0
+    cols, account = cols.take(owned), account[owned]
+    signed = cols.signed_cents().astype(np.float64)
+    months = cols.months()
+
+    n_accounts = len(accounts)
+    start = np.datetime64(today, "D").astype(np.int64)
+    horizon = np.arange(start, start + horizon_days)
+    horizon_months = horizon.astype("datetime64[D]").astype("datetime64[M]")
+    forecast_months = np.arange(current_month, int(horizon_months[-1].astype(int)) + 1)
+    month_of_day = horizon_months.astype(np.int64) - current_month
+
+    recurring = detect_recurring(cols, account, signed, current_month)
+    window = (n_accounts, first_month, current_month)
+    residual = np.where(recurring.member, 0.0, signed)
+    flow = _month_matrix(account, months, residual, *window)
+    active = np.cumsum(_month_matrix(account, months, None, *window), axis=1) > 0
+    monthly = _residual_monthly(
+        flow, active, first_month, current_month, forecast_months
+    )
+    month_days = _days_in_month(forecast_months.astype("datetime64[M]"))
+    daily = monthly[:, month_of_day] / month_days[month_of_day]
+
+    # Recurring hits: series x forecast month grid, clipped to short months
+    starts = _month_starts(forecast_months[0], forecast_months[-1])
+    hit = starts[None, :] + np.minimum(recurring.day[:, None], month_days) - 1
+    due = np.ones_like(hit, dtype=bool)
+    due[:, 0] = ~recurring.seen_this_month
+    # Not seen yet this month although its day passed: expect it today
+    hit[:, 0] = np.maximum(hit[:, 0], start)
+    due &= (hit >= start) & (hit < start + horizon_days)
+    rows, _ = np.nonzero(due)
+    np.add.at(
+        daily,
+        (recurring.account[rows], hit[due] - start),
+        recurring.amount_cents[rows],
+    )
+
+    current = np.array([float(row.balance) * 100 for row in accounts])
+    balances = np.round(current[:, None] + np.cumsum(daily, axis=1)) / 100
+    days = horizon.astype("datetime64[D]").astype(date).tolist()
+
+    result = []
+    for i, row in enumerate(accounts):
+        mine = recurring.account == i
+        result.append(
+            AccountForecast(
+                account_id=row.id,
+                currency=row.currency,
+                current_balance=float(row.balance),
+                points=[
+                    ForecastPoint(day=d, balance=b)
+                    for d, b in zip(days, balances[i].tolist(), strict=True)
+                ],
+                recurring=[
+                    RecurringItem(
+                        category_id=cols.categories[c] if c >= 0 else None,
+                        type=TYPES[t],
+                        amount=a / 100,
+                        day_of_month=d,
+                    )
+                    for c, t, a, d in zip(
+                        recurring.category[mine].tolist(),
+                        recurring.type[mine].tolist(),
+                        recurring.amount_cents[mine].tolist(),
+                        recurring.day[mine].tolist(),
+                        strict=True,
+                    )
+                ],
+            )
+        )
+    return ForecastRead(as_of=today, horizon_days=horizon_days, accounts=result)
+
+
+@lru_cache(maxsize=None)
+def _forecast_cache() -> TTLCache[tuple, ForecastRead]:
+    """(user, horizon, lookback, day, watermark) -> forecast"""
+    settings = get_settings()
+    return TTLCache(
+        maxsize=settings.forecast_cache_size,
+        ttl=settings.forecast_cache_ttl_seconds,
+    )
+
+
+def get_forecast(
+    db: Session,
+    user_id: UUID,
+    horizon_days: int = 90,
+    lookback_months: int = 24,
+    today: date | None = None,
+) -> ForecastRead:
+    """
+    Cached `build_forecast`. The key includes the user's watermark, so any
+    write to their transactions or accounts makes the next call refit.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    watermark = crud.get_user_watermark(db, user_id)
+    key = (user_id, horizon_days, lookback_months, today, watermark)
+    cache = _forecast_cache()
+    forecast = cache.get(key)
+    if forecast is None:
+        forecast = build_forecast(db, user_id, horizon_days, lookback_months, today)
+        cache.set(key, forecast)
+    return forecast
+
+
+if __name__ == "__main__":
+    from db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Forecast a user's balances")
+    parser.add_argument("user_id", type=UUID)
+    parser.add_argument("--horizon-days", type=int, default=90)
+    parser.add_argument("--lookback-months", type=int, default=24)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        forecast = build_forecast(
+            session, args.user_id, args.horizon_days, args.lookback_months
+        )
+    for acc in forecast.accounts:
+        end = acc.points[-1]
+        print(
+            f"{acc.account_id} {acc.currency} {acc.current_balance:.2f} -> "
+            f"{end.balance:.2f} on {end.day} ({len(acc.recurring)} recurring)"
+        )
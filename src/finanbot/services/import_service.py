@@ -0,0 +1,314 @@
+"""
+Bank statement import (OFX and CSV).
+
+The pipeline is a chain of generators, so a statement is never held in
+memory as a whole:
+
+    parse_ofx / parse_csv   text -> StatementLine
+    normalize               StatementLine -> (TransactionCreate, import_hash)
+    import_statement        batches of `batch_size` -> crud.import_transactions
+
+import_hash is sha256 over (account, date, amount, memo) plus the line's
+occurrence number among identical lines, so two equal coffees on the same day
+are both kept while re-importing the same statement matches every line to
+its earlier copy. Known hashes are skipped by the database (ON CONFLICT DO
+NOTHING on the unique index), which makes a re-import cost one insert
+statement per batch and no writes. Each batch is committed on its own; an
+interrupted import is simply run again.
+"""
+
+import argparse
+import csv
+import hashlib
+import html
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import IO, Iterable, Iterator, Literal, NamedTuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from core.config import get_settings
+from db import crud
+from models.orm_models import TransactionType
+from models.schemas import StatementImportResult, TransactionCreate
+
+logger = logging.getLogger(__name__)
+
+StatementFormat = Literal["ofx", "csv"]
+READ_SIZE = 64 * 1024
+
+
+class StatementParseError(ValueError):
+    """A statement line that cannot be read; carries its position."""
+
+
+class UnknownAccountError(LookupError):
+    """The target account does not exist or belongs to another user."""
+
+
+class StatementLine(NamedTuple):
+    occurred_at: datetime
+    amount: Decimal  # signed: negative = money out
+    memo: str
+    currency: str | None = None
+
+
+# -- OFX -----------------------------------------------------------------------
+
+# DTPOSTED: YYYYMMDD[HHMMSS[.XXX]][[offset[:TZ]]]
+_OFX_DATE = re.compile(
+    r"(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::\w+)?\])?"
+)
+
+
+def _ofx_tokens(stream: IO[str]) -> Iterator[tuple[str, str]]:
+    """
+    (TAG, text) pairs from SGML (OFX 1.x, unclosed leaf tags) or XML (2.x)
+    markup, read in fixed-size chunks whatever the line layout.
+    """
+    pending = ""
+    while chunk := stream.read(READ_SIZE):
+        pending += chunk
+        *complete, pending = pending.split("<")
+        for piece in complete:
+            tag, _, text = piece.partition(">")
+            if tag:
+                yield tag.strip().upper(), text.strip()
+    tag, _, text = pending.partition(">")
+    if tag:
+        yield tag.strip().upper(), text.strip()
+
+
+def _ofx_date(value: str) -> datetime:
+    match = _OFX_DATE.match(value)
+    if not match:
+        raise ValueError(f"bad OFX date {value!r}")
+    day, clock, offset = match.groups()
+    moment = datetime.strptime(day + (clock or "120000"), "%Y%m%d%H%M%S")
+    hours = float(offset) if offset else 0.0
+    return moment.replace(tzinfo=timezone(timedelta(hours=hours)))
+
+
+def _ofx_line(fields: dict[str, str], currency: str | None) -> StatementLine:
+    return StatementLine(
+        occurred_at=_ofx_date(fields["DTPOSTED"]),
+        amount=Decimal(fields["TRNAMT"].replace(",", ".")),
+        memo=fields.get("MEMO") or fields.get("NAME") or "",
+        currency=currency,
+    )
+
+
+def parse_ofx(stream: IO[str]) -> Iterator[StatementLine]:
+    currency = None
+    current: dict[str, str] | None = None
+    count = 0
+    for tag, text in _ofx_tokens(stream):
+        # A new STMTTRN or the end of the list also closes a sloppy,
+        # unterminated one
+        if current is not None and tag in ("STMTTRN", "/STMTTRN", "/BANKTRANLIST"):
+            count += 1
+            try:
+                yield _ofx_line(current, currency)
+            except (KeyError, ValueError, InvalidOperation) as err:
+                raise StatementParseError(f"transaction {count}: {err}") from err
+            current = None
+        if tag == "CURDEF":
+            currency = text.upper()[:3]
+        elif tag == "STMTTRN":
+            current = {}
+        elif current is not None and not tag.startswith("/"):
+            current[tag] = html.unescape(text)
+
+
+# -- CSV -----------------------------------------------------------------------
+
+# Accepted header names (lowercased, accents kept as banks write them)
+_CSV_COLUMNS = {
+    "date": ("date", "data", "data lançamento", "data lancamento", "data movimento"),
+    "amount": ("amount", "valor", "valor (r$)"),
+    "memo": (
+        "memo",
+        "description",
+        "descrição",
+        "descricao",
+        "histórico",
+        "historico",
+        "lançamento",
+        "lancamento",
+    ),
+}
+_CSV_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%Y-%m-%dT%H:%M:%S")
+
+
+def _csv_amount(value: str) -> Decimal:
+    """
+    1.234,56 and 1,234.56 alike: the last of `.` / `,` is the decimal
+    separator, the other one groups thousands. A lone separator followed by
+    exactly three digits (1.234, 1,234) could be either and is rejected.
+    """
+    text = value.strip().replace("R$", "").replace(" ", "")
+    last = max(text.rfind("."), text.rfind(","))
+    if last < 0:
+        return Decimal(text)
+    decimal_mark = text[last]
+    grouping = "," if decimal_mark == "." else "."
+    if text.count(decimal_mark) > 1:
+        # 1.234.567: the only separator repeats, so it groups thousands
+        return Decimal(text.replace(decimal_mark, ""))
+    if grouping not in text and len(text) - last - 1 == 3:
+        raise ValueError(f"ambiguous amount {value!r}")
+    return Decimal(text.replace(grouping, "").replace(decimal_mark, "."))
+
+
+def _csv_date(value: str) -> datetime:
+    text = value.strip()
+    for fmt in _CSV_DATE_FORMATS:
+        try:
+            moment = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if moment.hour == moment.minute == 0:
+            moment = moment.replace(hour=12)
+        return moment.replace(tzinfo=timezone.utc)
+    raise ValueError(f"bad date {value!r}")
+
+
+def parse_csv(stream: IO[str]) -> Iterator[StatementLine]:
+    """
+    Bank CSV with a header row; `,` or `;` separated, decimal point or
+    comma amounts (see _csv_amount), ISO or dd/mm/yyyy dates.
+    """
+    header = stream.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    names = [h.strip().lower() for h in next(csv.reader([header], delimiter=delimiter))]
+    positions = {}
+    for field, aliases in _CSV_COLUMNS.items():
+        found = [i for i, name in enumerate(names) if name in aliases]
+        if not found:
+            raise StatementParseError(f"no {field} column in header {names}")
+        positions[field] = found[0]
+
+    for line_no, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield StatementLine(
+                occurred_at=_csv_date(row[positions["date"]]),
+                amount=_csv_amount(row[positions["amount"]]),
+                memo=row[positions["memo"]].strip(),
+            )
+        except (IndexError, ValueError, InvalidOperation) as err:
+            raise StatementParseError(f"line {line_no}: {err}") from err
+
+
+# -- pipeline ------------------------------------------------------------------
+
+
+def import_hash(line: StatementLine, account_id: UUID, occurrence: int) -> str:
+    key = "|".join(
+        (
+            str(account_id),
+            line.occurred_at.date().isoformat(),
+            f"{line.amount:.2f}",
+            " ".join(line.memo.lower().split()),
+            str(occurrence),
+        )
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def normalize(
+    lines: Iterable[StatementLine], account_id: UUID, currency: str = "BRL"
+) -> Iterator[tuple[TransactionCreate, str]]:
+    """
+    Statement lines as transactions: negative amounts are expenses, the rest
+    incomes, stored unsigned. Zero-amount lines are informational and skipped.
+    """
+    # Occurrences per (date, amount, memo); only a short digest per distinct
+    # line is kept, not the lines themselves
+    seen: dict[bytes, int] = {}
+    for line in lines:
+        if not line.amount:
+            continue
+        first = import_hash(line, account_id, 0)
+        key = bytes.fromhex(first)[:16]
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        tx = TransactionCreate(
+            account_id=account_id,
+            occurred_at=line.occurred_at,
+            amount=float(abs(line.amount)),
+            currency=line.currency or currency,
+            type=(
+                TransactionType.EXPENSE.value
+                if line.amount < 0
+                else TransactionType.INCOME.value
+            ),
+            notes=line.memo or None,
+        )
+        if occurrence:
+            yield tx, import_hash(line, account_id, occurrence)
+        else:
+            yield tx, first
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_statement(
+    db: Session,
+    user_id: UUID,
+    account_id: UUID,
+    stream: IO[str],
+    fmt: StatementFormat,
+    currency: str = "BRL",
+    batch_size: int | None = None,
+) -> StatementImportResult:
+    if not crud.owns_account(db, user_id, account_id):
+        raise UnknownAccountError(f"Account {account_id} not found")
+    batch_size = batch_size or get_settings().bulk_insert_batch_size
+    lines = parse_ofx(stream) if fmt == "ofx" else parse_csv(stream)
+    read = inserted = 0
+    for batch in _batches(normalize(lines, account_id, currency), batch_size):
+        read += len(batch)
+        inserted += crud.import_transactions(db, user_id, batch)
+    logger.info(
+        "imported %d of %d statement lines into account %s", inserted, read, account_id
+    )
+    return StatementImportResult(
+        read=read, inserted=inserted, duplicates=read - inserted
+    )
+
+
+if __name__ == "__main__":
+    from db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Import a bank statement")
+    parser.add_argument("user_id", type=UUID)
+    parser.add_argument("account_id", type=UUID)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ofx", "csv"])
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--currency", default="BRL")
+    args = parser.parse_args()
+
+    fmt = args.format or ("ofx" if args.path.lower().endswith(".ofx") else "csv")
+    with (
+        open(args.path, encoding=args.encoding, errors="replace", newline="") as fh,
+        SessionLocal() as session,
+    ):
+        result = import_statement(
+            session, args.user_id, args.account_id, fh, fmt, args.currency
+        )
+    print(
+        f"{result.inserted} new, {result.duplicates} already imported "
+        f"({result.read} read)"
+    )
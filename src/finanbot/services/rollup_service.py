@@ -0,0 +1,84 @@
+"""
+Full rebuild of finances.monthly_rollups from the transactions table.
+
+The crud write paths keep the rollups current incrementally, and deleting a
+category folds its rows into the uncategorized ones (migration 0011); a
+rebuild is only needed after transaction writes that bypass crud (manual SQL).
+"""
+
+import argparse
+import logging
+from typing import cast
+from uuid import UUID
+
+from sqlalchemy import CursorResult, delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from db import aggregates
+from models.orm_models import MonthlyRollup
+from models.orm_models import Transaction as TransactionModel
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_monthly_rollups(db: Session, user_id: UUID | None = None) -> int:
+    """
+    Recompute rollups (for one user, or everyone) in a single transaction.
+
+    The table is locked against concurrent writers first: in-flight writes
+    finish before the snapshot is taken, later ones wait and then apply their
+    deltas on top of the rebuilt totals.
+    """
+    month = aggregates.month_expr()
+    source = select(
+        TransactionModel.user_id,
+        month,
+        TransactionModel.category_id,
+        TransactionModel.type,
+        TransactionModel.currency,
+        func.sum(TransactionModel.amount),
+        func.count(),
+    ).group_by(
+        TransactionModel.user_id,
+        month,
+        TransactionModel.category_id,
+        TransactionModel.type,
+        TransactionModel.currency,
+    )
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        source = source.where(TransactionModel.user_id == user_id)
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+
+    db.execute(text("LOCK TABLE finances.monthly_rollups IN EXCLUSIVE MODE"))
+    db.execute(clear)
+    result = db.execute(
+        insert(MonthlyRollup).from_select(
+            [
+                MonthlyRollup.user_id,
+                MonthlyRollup.month,
+                MonthlyRollup.category_id,
+                MonthlyRollup.type,
+                MonthlyRollup.currency,
+                MonthlyRollup.total,
+                MonthlyRollup.tx_count,
+            ],
+            source,
+        )
+    )
+    rows = cast(CursorResult, result).rowcount
+    db.commit()
+    logger.info("Rebuilt %s monthly rollup row(s)", rows)
+    return rows
+
+
+if __name__ == "__main__":
+    from db.session import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild monthly rollups")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    with SessionLocal() as session:
+        rebuild_monthly_rollups(session, user_id=args.user_id)
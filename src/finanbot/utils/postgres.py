@@ -1,9 +1,18 @@
+import importlib.util
+import io
 import logging
+from typing import Iterable, Iterator, cast
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine, text
+import psycopg2
+from psycopg2 import sql
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 
+from db.engines import get_engine
+
 # 🎯 Configuração de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -12,6 +21,48 @@ logging.basicConfig(
 )
 
 
+# Defaults for compact_dtypes, matching the finances schema column names
+CATEGORICAL_COLUMNS = ("currency", "tra_type", "acc_type", "kind")
+CENTS_COLUMNS = ("amount", "balance", "opening_balance", "total")
+
+
+def _string_dtype() -> str:
+    # Arrow-backed strings when pyarrow is installed (optional dependency)
+    if importlib.util.find_spec("pyarrow") is not None:
+        return "string[pyarrow]"
+    return "string"
+
+
+def compact_dtypes(
+    df: pd.DataFrame,
+    categorical: Iterable[str] = CATEGORICAL_COLUMNS,
+    cents: Iterable[str] = CENTS_COLUMNS,
+) -> pd.DataFrame:
+    """
+    Return a copy of `df` without object columns where possible:
+    low-cardinality text becomes `category`, money becomes integer cents
+    (a Decimal object costs ~100 bytes, an int64 costs 8) and other text
+    becomes a string dtype.
+    """
+    string_dtype = _string_dtype()
+    categorical, cents = set(categorical), set(cents)
+    out = {}
+    for name, column in df.items():
+        if name in cents:
+            numeric = pd.Series(pd.to_numeric(column), index=column.index)
+            values = np.rint(numeric.astype("float64") * 100)
+            out[name] = values.astype("Int64" if column.isna().any() else "int64")
+        elif name in categorical:
+            out[name] = column.astype("category")
+        elif column.dtype == object:
+            first = column.dropna().head(1)
+            is_text = not first.empty and isinstance(first.iloc[0], str)
+            out[name] = column.astype(string_dtype) if is_text else column
+        else:
+            out[name] = column
+    return pd.DataFrame(out, index=df.index)
+
+
 class PostgresUtils:
     def __init__(self, host, port, user, password, database, schema="public"):
         self.host = host
@@ -27,11 +78,10 @@ class PostgresUtils:
 
     @property
     def engine(self):
+        # Shared with every other user of the same database/schema; see
+        # db.engines for pool sizing and stats
         if self._engine is None:
-            self._engine = create_engine(
-                self.get_connection_string(),
-                connect_args={"options": f"-c search_path={self.schema}"},
-            )
+            self._engine = get_engine(self.get_connection_string(), self.schema)
         return self._engine
 
     def test_connection(self):
@@ -54,26 +104,176 @@ class PostgresUtils:
         except SQLAlchemyError as e:
             logging.error(f"❌ Erro ao criar schema '{schema_name}': {e}")
 
-    def save_dataframe(self, df: pd.DataFrame, table_name: str):
+    def save_dataframe(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        method: str = "copy",
+        chunksize: int = 50_000,
+        upsert_on: list[str] | None = None,
+    ):
+        """
+        Append `df` to `table_name`.
+
+        method="copy" streams the frame through COPY ... FROM STDIN in CSV
+        chunks of `chunksize` rows; if that fails the frame is written with
+        DataFrame.to_sql instead. With `upsert_on` (the conflict key columns)
+        rows are staged in a temporary table and merged with
+        INSERT ... ON CONFLICT DO UPDATE; keys must be unique within `df`.
+        """
+        if method == "copy":
+            try:
+                self._copy_dataframe(df, table_name, chunksize, upsert_on)
+                logging.info(
+                    f"✅ {len(df)} linhas copiadas para '{table_name}' "
+                    f"no schema '{self.schema}'."
+                )
+                return
+            except (SQLAlchemyError, psycopg2.Error) as e:
+                logging.warning(f"⚠️ COPY falhou, usando to_sql: {e}")
+
         try:
-            with self.engine.connect() as connection:
-                df.to_sql(table_name, connection, if_exists="append", index=False)
+            with self.engine.begin() as connection:
+                df.to_sql(
+                    table_name,
+                    connection,
+                    schema=self.schema,
+                    if_exists="append",
+                    index=False,
+                    chunksize=chunksize,
+                    method=self._upsert_method(upsert_on) if upsert_on else None,
+                )
             logging.info(
                 f"✅ Dados salvos na tabela '{table_name}' no schema '{self.schema}'."
             )
         except SQLAlchemyError as e:
             logging.error(f"❌ Erro ao salvar dados na tabela '{table_name}': {e}")
 
-    def fetch_dataframe(self, query: str) -> pd.DataFrame:
+    def _copy_dataframe(
+        self,
+        df: pd.DataFrame,
+        table_name: str,
+        chunksize: int,
+        upsert_on: list[str] | None,
+    ):
+        target = sql.Identifier(self.schema, table_name)
+        columns = sql.SQL(", ").join(map(sql.Identifier, df.columns))
+        destination = target
+        if upsert_on:
+            destination = sql.Identifier(f"_stage_{table_name}")
+
+        raw = self.engine.raw_connection()
+        try:
+            # COPY needs the psycopg2 cursor, not the DB-API surface
+            with cast(psycopg2.extensions.cursor, raw.cursor()) as cur:
+                if upsert_on:
+                    cur.execute(
+                        sql.SQL(
+                            "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) "
+                            "ON COMMIT DROP"
+                        ).format(destination, target)
+                    )
+                copy = (
+                    sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)")
+                    .format(destination, columns)
+                    .as_string(cur)
+                )
+                buffer = io.StringIO()
+                for start in range(0, len(df), chunksize):
+                    buffer.seek(0)
+                    buffer.truncate()
+                    df.iloc[start : start + chunksize].to_csv(
+                        buffer, index=False, header=False
+                    )
+                    buffer.seek(0)
+                    cur.copy_expert(copy, buffer)
+                if upsert_on:
+                    updates = [c for c in df.columns if c not in upsert_on]
+                    action = (
+                        sql.SQL("DO UPDATE SET {}").format(
+                            sql.SQL(", ").join(
+                                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(c))
+                                for c in updates
+                            )
+                        )
+                        if updates
+                        else sql.SQL("DO NOTHING")
+                    )
+                    cur.execute(
+                        sql.SQL(
+                            "INSERT INTO {} ({}) SELECT {} FROM {} ON CONFLICT ({}) {}"
+                        ).format(
+                            target,
+                            columns,
+                            columns,
+                            destination,
+                            sql.SQL(", ").join(map(sql.Identifier, upsert_on)),
+                            action,
+                        )
+                    )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    @staticmethod
+    def _upsert_method(upsert_on: list[str]):
+        """pandas to_sql `method` issuing INSERT ... ON CONFLICT DO UPDATE."""
+
+        def upsert(table, connection, keys, data_iter):
+            rows = [dict(zip(keys, row, strict=True)) for row in data_iter]
+            stmt = pg_insert(table.table).values(rows)
+            updates = {k: stmt.excluded[k] for k in keys if k not in upsert_on}
+            if updates:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=upsert_on, set_=updates
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=upsert_on)
+            return connection.execute(stmt).rowcount
+
+        return upsert
+
+    def fetch_dataframe(self, query: str, compact: bool = False) -> pd.DataFrame:
         try:
             with self.engine.connect() as connection:
                 df = pd.read_sql(query, connection)
             logging.info("✅ Dados carregados com sucesso.")
-            return df
+            return compact_dtypes(df) if compact else df
         except SQLAlchemyError as e:
             logging.error(f"❌ Erro ao executar query: {e}")
             return pd.DataFrame()
 
+    def iter_dataframes(
+        self,
+        query: str,
+        chunksize: int = 50_000,
+        compact: bool = False,
+        params: dict | None = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yield the result of `query` in DataFrames of at most `chunksize` rows,
+        read from a server-side cursor so only one chunk is held in memory.
+        With `compact`, each chunk goes through compact_dtypes(). Database
+        errors are logged and re-raised, even after some chunks were yielded.
+        """
+        try:
+            with self.engine.connect() as connection:
+                connection = connection.execution_options(
+                    stream_results=True, max_row_buffer=chunksize
+                )
+                for chunk in pd.read_sql(
+                    text(query), connection, params=params, chunksize=chunksize
+                ):
+                    yield compact_dtypes(chunk) if compact else chunk
+        except SQLAlchemyError as e:
+            # Chunks may already be out: ending quietly would pass a truncated
+            # read off as a complete one
+            logging.error(f"❌ Erro ao executar query em blocos: {e}")
+            raise
+
     def list_schemas(self):
         try:
             with self.engine.connect() as connection:
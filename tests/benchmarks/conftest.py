@@ -0,0 +1,291 @@
+"""
+Benchmark harness for the data layer and the /transactions API.
+
+Opt-in and destructive to its target database, so it needs both:
+    BENCH_DATABASE_URL  psycopg2 URL of a disposable database that already has
+                        the finances schema (init scripts + alembic upgrade)
+    -m benchmark        the suite is deselected by default (see pyproject)
+
+The usual settings (.env) must also be loadable; pool sizing and attachment
+paths come from them.
+
+Run from repo root:
+    BENCH_DATABASE_URL=postgresql://... pytest -m benchmark tests/benchmarks
+
+Knobs (environment):
+    BENCH_SIZES            transactions per dataset, ascending (10000,100000,1000000)
+    BENCH_ROUNDS           timed calls per benchmark (20)
+    BENCH_TOLERANCE        allowed median slowdown vs baseline (0.25 = +25%)
+    BENCH_UPDATE_BASELINE  set to 1 to rewrite baseline.json from this run
+
+Every run writes results.json next to this file; baseline.json is the
+committed reference a run is compared against. Timings only compare on the
+machine that recorded them, so the baseline is not shipped: record one on the
+benchmark host before the first comparison, and commit it from there,
+
+    BENCH_DATABASE_URL=postgresql://... BENCH_UPDATE_BASELINE=1 \
+        pytest -m benchmark tests/benchmarks
+
+Without baseline.json every benchmark passes and only results.json is written.
+"""
+
+import asyncio
+import importlib.util
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src" / "finanbot"))
+
+# The default (deselected) run must not fail at collection on a bare install
+if not all(importlib.util.find_spec(m) for m in ("sqlalchemy", "fastapi")):
+    collect_ignore_glob = ["test_*.py"]
+
+HERE = Path(__file__).resolve().parent
+BASELINE_PATH = HERE / "baseline.json"
+RESULTS_PATH = HERE / "results.json"
+
+SIZES = [
+    int(n) for n in os.environ.get("BENCH_SIZES", "10000,100000,1000000").split(",")
+]
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", "20"))
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", "0.25"))
+UPDATE_BASELINE = os.environ.get("BENCH_UPDATE_BASELINE") == "1"
+
+_results: dict[str, dict] = {}
+
+
+def _load_baseline() -> dict[str, dict]:
+    if not BASELINE_PATH.exists():
+        return {}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))["results"]
+
+
+def _summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "rounds": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "median_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    document = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sizes": SIZES,
+        "results": dict(sorted(_results.items())),
+    }
+    payload = json.dumps(document, indent=2) + "\n"
+    RESULTS_PATH.write_text(payload, encoding="utf-8")
+    if UPDATE_BASELINE:
+        BASELINE_PATH.write_text(payload, encoding="utf-8")
+
+
+# -- database -----------------------------------------------------------------
+
+
+@pytest.fixture(scope="session")
+def bench_url() -> str:
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        pytest.skip("BENCH_DATABASE_URL is not set")
+    return url
+
+
+@pytest.fixture(scope="session")
+def engine(bench_url):
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from db.engines import get_engine
+
+    engine = get_engine(bench_url)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as err:
+        pytest.skip(f"benchmark database unreachable: {err.orig}")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def async_engine(bench_url):
+    from sqlalchemy.engine import make_url
+
+    from db.engines import get_async_engine
+
+    url = make_url(bench_url).set(drivername="postgresql+asyncpg")
+    return get_async_engine(url.render_as_string(hide_password=False))
+
+
+@pytest.fixture(scope="session")
+def session_factory(engine):
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+@pytest.fixture(scope="session", params=SIZES, ids=lambda n: f"n{n}")
+def dataset(request, session_factory):
+    """
+    The benchmark user with at least `size` transactions. Rows are topped up
+    in place, so sizes run in ascending order and a rerun reuses them.
+    """
+    from tests.benchmarks import seed
+
+    with session_factory() as db:
+        return seed.ensure_dataset(db, request.param)
+
+
+@pytest.fixture(scope="session")
+def middle_row(dataset, session_factory):
+    """(id, occurred_at) of a transaction halfway down the newest-first list."""
+    from sqlalchemy import select
+
+    from models.orm_models import Transaction as TransactionModel
+
+    stmt = (
+        select(TransactionModel.id, TransactionModel.occurred_at)
+        .where(TransactionModel.user_id == dataset.user_id)
+        .order_by(TransactionModel.occurred_at.desc(), TransactionModel.id.desc())
+        .offset(dataset.size // 2)
+        .limit(1)
+    )
+    with session_factory() as db:
+        return db.execute(stmt).one()
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+# -- API ----------------------------------------------------------------------
+
+
+@pytest.fixture(scope="session")
+def runner():
+    # One loop for the whole run: pooled asyncpg connections are bound to the
+    # loop that opened them.
+    with asyncio.Runner() as runner:
+        yield runner
+
+
+@pytest.fixture(scope="session")
+def client(runner, engine, async_engine):
+    pytest.importorskip("httpx")
+    import httpx
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlalchemy.orm import sessionmaker
+
+    from db.session import get_async_db, get_db
+    from main import create_app
+
+    sync_sessions = sessionmaker(bind=engine, autoflush=False)
+    async_sessions = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+
+    def bench_db():
+        with sync_sessions() as session:
+            yield session
+
+    async def bench_async_db():
+        async with async_sessions() as session:
+            yield session
+
+    app = create_app()
+    app.dependency_overrides[get_db] = bench_db
+    app.dependency_overrides[get_async_db] = bench_async_db
+
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    )
+    yield client
+    runner.run(client.aclose())
+    runner.run(async_engine.dispose())
+
+
+# -- timing -------------------------------------------------------------------
+
+
+class Benchmark:
+    """
+    Times `fn` over ROUNDS calls (after one warm-up) and checks the median
+    against the baseline. `setup`, if given, runs untimed before each call and
+    its return value is passed to `fn` as positional arguments.
+    """
+
+    def __init__(self, name: str, runner: asyncio.Runner | None):
+        self.name = name
+        self.runner = runner
+
+    def _call(self, fn, args):
+        result = fn(*args)
+        if inspect.isawaitable(result):
+            result = self.runner.run(result)
+        return result
+
+    def __call__(self, fn, setup=None, rounds: int | None = None):
+        rounds = rounds or ROUNDS
+        self._call(fn, setup() if setup else ())
+
+        samples = []
+        for _ in range(rounds):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            result = self._call(fn, args)
+            samples.append(time.perf_counter() - start)
+
+        stats = _summarize(samples)
+        _results[self.name] = stats
+
+        baseline = _load_baseline().get(self.name)
+        if baseline and not UPDATE_BASELINE:
+            limit = baseline["median_ms"] * (1 + TOLERANCE)
+            assert stats["median_ms"] <= limit, (
+                f"{self.name}: median {stats['median_ms']:.2f} ms exceeds "
+                f"baseline {baseline['median_ms']:.2f} ms by more than "
+                f"{TOLERANCE:.0%}"
+            )
+        return result
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    runner = (
+        request.getfixturevalue("runner") if "client" in request.fixturenames else None
+    )
+    # e.g. "test_crud.py::test_get_transaction[n10000]"
+    return Benchmark(request.node.nodeid.rsplit("/", 1)[-1], runner)
@@ -0,0 +1,169 @@
+"""
+Benchmark dataset: one user with a handful of accounts, a two-level category
+tree and N transactions spread over ten years.
+
+The user is the fixed id the /transactions routes currently serve, so the
+same rows back both the crud and the API benchmarks. Transactions are
+generated server-side (INSERT ... SELECT generate_series), which seeds a
+million rows in seconds; balances and rollups are then rebuilt in bulk.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from models.orm_models import Transaction as TransactionModel
+from models.schemas import TransactionCreate
+from services.balance_service import reconcile_balances
+from services.rollup_service import rebuild_monthly_rollups
+
+BENCH_USER_ID = UUID("00000000-0000-0000-0000-000000000000")
+ACCOUNTS = (
+    ("Conta corrente", "checking"),
+    ("Poupança", "savings"),
+    ("Cartão de crédito", "credit_card"),
+    ("Carteira", "cash"),
+)
+# parent -> children; kinds must satisfy the categories CHECK constraint
+CATEGORY_TREE = {
+    ("Casa", "housing"): (("Aluguel", "housing"), ("Contas", "utilities")),
+    ("Alimentação", "food"): (("Mercado", "food"), ("Restaurantes", "food")),
+    ("Transporte", "transportation"): (
+        ("Combustível", "transportation"),
+        ("Aplicativos", "transportation"),
+    ),
+    ("Renda", "income"): (("Salário", "income"), ("Freelas", "income")),
+}
+NOTES = ("mercado", "uber", "salario", "aluguel", "farmacia", "cinema", "pix")
+
+_INSERT_TRANSACTIONS = text(
+    """
+    WITH pool AS (
+        SELECT CAST(:accounts AS uuid[]) AS accounts,
+               CAST(:categories AS uuid[]) AS categories,
+               CAST(:notes AS text[]) AS notes
+    )
+    INSERT INTO finances.transactions
+        (user_id, account_id, category_id, occurred_at, amount, currency,
+         tra_type, notes)
+    SELECT
+        CAST(:user_id AS uuid),
+        accounts[1 + g % cardinality(accounts)],
+        categories[1 + (g * 7) % cardinality(categories)],
+        timestamptz '2015-01-01 00:00+00' + random() * interval '10 years',
+        round((random() * 800 + 1)::numeric, 2),
+        'BRL',
+        (ARRAY['expense', 'expense', 'expense', 'income', 'transfer'])[1 + g % 5],
+        notes[1 + g % cardinality(notes)] || ' #' || g
+    FROM pool, generate_series(:start, :stop) AS g
+    """
+)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    size: int
+    user_id: UUID
+    account_ids: list[UUID]
+    category_ids: list[UUID]
+
+
+def _ensure_owner(db: Session) -> tuple[list[UUID], list[UUID]]:
+    db.execute(
+        text(
+            "INSERT INTO finances.users (users_id, username, display_name) "
+            "VALUES (:id, 'bench', 'Benchmark user') ON CONFLICT DO NOTHING"
+        ),
+        {"id": str(BENCH_USER_ID)},
+    )
+    for name, acc_type in ACCOUNTS:
+        db.execute(
+            text(
+                "INSERT INTO finances.accounts (user_id, acc_name, acc_type) "
+                "VALUES (:user_id, :name, :type) ON CONFLICT DO NOTHING"
+            ),
+            {"user_id": str(BENCH_USER_ID), "name": name, "type": acc_type},
+        )
+
+    upsert_category = text(
+        "INSERT INTO finances.categories (user_id, cat_name, kind, parent_id) "
+        "VALUES (:user_id, :name, :kind, :parent_id) "
+        "ON CONFLICT (user_id, cat_name, kind) DO UPDATE SET parent_id = "
+        "EXCLUDED.parent_id RETURNING categories_id"
+    )
+
+    def category(name: str, kind: str, parent_id: UUID | None = None) -> UUID:
+        params = {
+            "user_id": str(BENCH_USER_ID),
+            "name": name,
+            "kind": kind,
+            "parent_id": str(parent_id) if parent_id else None,
+        }
+        return db.execute(upsert_category, params).scalar_one()
+
+    category_ids = []
+    for (name, kind), children in CATEGORY_TREE.items():
+        parent_id = category(name, kind)
+        category_ids.append(parent_id)
+        for child, child_kind in children:
+            category_ids.append(category(child, child_kind, parent_id))
+
+    account_ids = list(
+        db.execute(
+            text(
+                "SELECT accounts_id FROM finances.accounts "
+                "WHERE user_id = :user_id ORDER BY acc_name"
+            ),
+            {"user_id": str(BENCH_USER_ID)},
+        ).scalars()
+    )
+    db.commit()
+    return account_ids, category_ids
+
+
+def ensure_dataset(db: Session, size: int) -> Dataset:
+    """Top the benchmark user up to at least `size` transactions."""
+    account_ids, category_ids = _ensure_owner(db)
+    existing = db.execute(
+        select(func.count()).where(TransactionModel.user_id == BENCH_USER_ID)
+    ).scalar_one()
+
+    if existing < size:
+        db.execute(
+            _INSERT_TRANSACTIONS,
+            {
+                "user_id": str(BENCH_USER_ID),
+                "accounts": [str(a) for a in account_ids],
+                "categories": [str(c) for c in category_ids],
+                "notes": list(NOTES),
+                "start": existing + 1,
+                "stop": size,
+            },
+        )
+        db.commit()
+        rebuild_monthly_rollups(db, user_id=BENCH_USER_ID)
+        reconcile_balances(db, fix=True)
+        db.execute(text("ANALYZE finances.transactions"))
+        db.commit()
+
+    return Dataset(
+        size=size,
+        user_id=BENCH_USER_ID,
+        account_ids=account_ids,
+        category_ids=category_ids,
+    )
+
+
+def make_transaction(dataset: Dataset, i: int = 0) -> TransactionCreate:
+    """A valid new transaction for the benchmark user."""
+    return TransactionCreate(
+        account_id=dataset.account_ids[i % len(dataset.account_ids)],
+        category_id=dataset.category_ids[i % len(dataset.category_ids)],
+        occurred_at=datetime(2024, 6, 1, tzinfo=timezone.utc) + timedelta(hours=i),
+        amount=round(10 + (i % 500) * 1.37, 2),
+        type="expense",
+        notes=f"bench write {i}",
+    )
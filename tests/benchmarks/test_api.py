@@ -0,0 +1,201 @@
+"""
+/transactions route benchmarks through an in-process ASGI client, at every
+dataset size. Timings include routing, validation and serialization.
+"""
+
+from itertools import count
+
+import pytest
+
+from api import conditional
+from api.v1 import transactions
+from db import crud
+from db.pagination import encode_cursor
+from tests.benchmarks.seed import make_transaction
+
+pytestmark = pytest.mark.benchmark
+
+BASE = "/api/v1/transactions"
+_ids = count(1_000_000)
+
+COVERED = {
+    ("POST", "/transactions/"): "test_post_transaction",
+    ("POST", "/transactions/bulk"): "test_post_bulk",
+    ("POST", "/transactions/import"): "test_import_statement",
+    ("GET", "/transactions/export"): "test_export",
+    ("GET", "/transactions/search"): "test_search",
+    ("GET", "/transactions/{tx_id}"): "test_get_transaction / test_get_not_modified",
+    ("GET", "/transactions/"): "test_list_keyset / test_list_offset / "
+    "test_list_not_modified / test_list_filtered",
+    ("PATCH", "/transactions/{tx_id}"): "test_patch_transaction",
+    ("DELETE", "/transactions/{tx_id}"): "test_delete_transaction",
+    ("GET", "/transactions/{tx_id}/attachment"): "test_download_attachment",
+}
+
+
+def _payload(dataset) -> dict:
+    return make_transaction(dataset, next(_ids)).model_dump(mode="json")
+
+
+def _cold() -> tuple:
+    # Read benchmarks measure the database path, not the response cache
+    conditional.response_cache().clear()
+    return ()
+
+
+def test_every_route_is_benchmarked():
+    routes = {
+        (method, route.path)
+        for route in transactions.router.routes
+        for method in route.methods
+    }
+    assert routes <= set(COVERED), f"no benchmark for {routes - set(COVERED)}"
+
+
+def test_post_transaction(benchmark, client, dataset):
+    response = benchmark(lambda: client.post(f"{BASE}/", json=_payload(dataset)))
+    assert response.status_code == 201
+
+
+def test_post_bulk(benchmark, client, dataset):
+    def batch():
+        return ([_payload(dataset) for _ in range(1000)],)
+
+    response = benchmark(
+        lambda rows: client.post(f"{BASE}/bulk", json=rows), setup=batch, rounds=5
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("statement", ["new", "reimport"])
+def test_import_statement(benchmark, client, dataset, statement):
+    # 1000-line CSV; "reimport" sends the same file every round
+    def csv_body():
+        n = next(_ids)
+        lines = "".join(
+            f"2024-{1 + i % 12:02d}-{1 + i % 28:02d},bench import {n} {i},-{i}.25\n"
+            for i in range(1000)
+        )
+        return ("date,memo,amount\n" + lines,)
+
+    known = csv_body()
+    response = benchmark(
+        lambda body: client.post(
+            f"{BASE}/import",
+            params={"account_id": str(dataset.account_ids[0])},
+            content=body,
+        ),
+        setup=csv_body if statement == "new" else lambda: known,
+        rounds=5,
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export(benchmark, client, dataset, fmt):
+    # Full body, so this is the whole streamed export of `dataset.size` rows
+    response = benchmark(
+        lambda: client.get(f"{BASE}/export", params={"format": fmt}), rounds=3
+    )
+    assert response.status_code == 200
+
+
+def test_get_transaction(benchmark, client, middle_row):
+    response = benchmark(lambda: client.get(f"{BASE}/{middle_row.id}"), setup=_cold)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("depth", ["first", "middle"])
+def test_list_keyset(benchmark, client, middle_row, depth):
+    params = {"limit": 100}
+    if depth == "middle":
+        params["cursor"] = encode_cursor(middle_row.occurred_at, middle_row.id)
+    response = benchmark(lambda: client.get(f"{BASE}/", params=params), setup=_cold)
+    assert response.status_code == 200
+
+
+def test_get_not_modified(benchmark, client, middle_row):
+    etag = client.get(f"{BASE}/{middle_row.id}").headers["ETag"]
+    response = benchmark(
+        lambda: client.get(f"{BASE}/{middle_row.id}", headers={"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+
+
+def test_list_not_modified(benchmark, client, dataset):
+    # Only the watermark query runs; no rows are read or serialized
+    etag = client.get(f"{BASE}/", params={"limit": 100}).headers["ETag"]
+    response = benchmark(
+        lambda: client.get(
+            f"{BASE}/", params={"limit": 100}, headers={"If-None-Match": etag}
+        )
+    )
+    assert response.status_code == 304
+
+
+def test_search(benchmark, client, dataset):
+    response = benchmark(
+        lambda: client.get(f"{BASE}/search", params={"q": "farmacia", "limit": 50})
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("filters", ["account", "category_amount"])
+def test_list_filtered(benchmark, client, dataset, filters):
+    # Index-only id scan plus one primary-key fetch per returned row
+    params = {"limit": 100}
+    if filters == "account":
+        params["account_id"] = str(dataset.account_ids[0])
+    else:
+        params |= {"category_id": str(dataset.category_ids[0]), "amount_min": 500}
+    response = benchmark(lambda: client.get(f"{BASE}/", params=params), setup=_cold)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("depth", ["first", "middle"])
+def test_list_offset(benchmark, client, dataset, depth):
+    # offset=0 falls through to keyset paging, so "first" starts at 1
+    offset = 1 if depth == "first" else dataset.size // 2
+    response = benchmark(
+        lambda: client.get(f"{BASE}/", params={"limit": 100, "offset": offset}),
+        setup=_cold,
+    )
+    assert response.status_code == 200
+
+
+def test_patch_transaction(benchmark, client, middle_row):
+    response = benchmark(
+        lambda: client.patch(
+            f"{BASE}/{middle_row.id}", json={"amount": next(_ids) % 1000 + 0.5}
+        )
+    )
+    assert response.status_code == 200
+
+
+def test_delete_transaction(benchmark, client, db, dataset):
+    def victim():
+        tx = crud.create_transaction(
+            db, dataset.user_id, make_transaction(dataset, next(_ids))
+        )
+        return (tx.id,)
+
+    response = benchmark(lambda tx_id: client.delete(f"{BASE}/{tx_id}"), setup=victim)
+    assert response.status_code == 200
+
+
+@pytest.fixture(scope="module")
+def receipt(tmp_path_factory):
+    path = tmp_path_factory.mktemp("attachments") / "receipt.pdf"
+    path.write_bytes(b"%PDF-1.7\n" + bytes(1024 * 1024))
+    return path
+
+
+def test_download_attachment(benchmark, client, db, dataset, receipt):
+    tx = crud.create_transaction(
+        db, dataset.user_id, make_transaction(dataset, next(_ids))
+    )
+    crud.update_transaction(db, tx.id, {"attachment_path": str(receipt)})
+
+    response = benchmark(lambda: client.get(f"{BASE}/{tx.id}/attachment"))
+    assert response.status_code == 200
+    assert len(response.content) == receipt.stat().st_size
@@ -0,0 +1,182 @@
+"""db/crud.py benchmarks, one per public function, at every dataset size."""
+
+import inspect
+from datetime import date
+from itertools import count
+
+import pytest
+
+from db import crud
+from db.pagination import encode_cursor
+from tests.benchmarks.seed import make_transaction
+
+pytestmark = pytest.mark.benchmark
+
+_ids = count()
+
+# crud functions taking a session -> benchmarks covering them. apply_effects
+# runs inside every write benchmark.
+COVERED = {
+    "apply_effects": "test_create_transaction",
+    "create_transaction": "test_create_transaction",
+    "create_transactions_bulk": "test_create_transactions_bulk",
+    "get_transaction": "test_get_transaction",
+    "list_transactions": "test_list_transactions_offset",
+    "list_transactions_page": "test_list_transactions_page",
+    "update_transaction": "test_update_transaction",
+    "delete_transaction": "test_delete_transaction",
+    "get_account_balance": "test_get_account_balance",
+    "monthly_summary": "test_monthly_summary",
+    "category_summary": "test_category_summary",
+    "get_user_watermark": "test_get_user_watermark",
+    "assign_categories": "test_assign_categories",
+    "import_transactions": "test_import_transactions",
+    "search_transactions": "test_search_transactions",
+}
+
+
+def test_every_crud_function_is_benchmarked():
+    public = {
+        name
+        for name, fn in inspect.getmembers(crud, inspect.isfunction)
+        if fn.__module__ == crud.__name__
+        and not name.startswith("_")
+        and next(iter(inspect.signature(fn).parameters), None) == "db"
+    }
+    assert public <= set(COVERED), f"no benchmark for {public - set(COVERED)}"
+
+
+def test_create_transaction(benchmark, db, dataset):
+    benchmark(
+        lambda: crud.create_transaction(
+            db, dataset.user_id, make_transaction(dataset, next(_ids))
+        )
+    )
+
+
+def test_create_transactions_bulk(benchmark, db, dataset):
+    def batch():
+        return ([make_transaction(dataset, next(_ids)) for _ in range(1000)],)
+
+    benchmark(
+        lambda rows: crud.create_transactions_bulk(db, dataset.user_id, rows),
+        setup=batch,
+        rounds=5,
+    )
+
+
+def test_get_transaction(benchmark, db, middle_row):
+    benchmark(lambda: crud.get_transaction(db, middle_row.id))
+
+
+@pytest.mark.parametrize("depth", ["first", "middle"])
+def test_list_transactions_offset(benchmark, db, dataset, depth):
+    offset = 0 if depth == "first" else dataset.size // 2
+    benchmark(
+        lambda: crud.list_transactions(db, dataset.user_id, limit=100, offset=offset)
+    )
+
+
+@pytest.mark.parametrize("depth", ["first", "middle"])
+def test_list_transactions_page(benchmark, db, dataset, middle_row, depth):
+    cursor = (
+        None
+        if depth == "first"
+        else encode_cursor(middle_row.occurred_at, middle_row.id)
+    )
+    benchmark(
+        lambda: crud.list_transactions_page(
+            db, dataset.user_id, limit=100, cursor=cursor
+        )
+    )
+
+
+@pytest.mark.parametrize("patch", ["notes", "amount"])
+def test_update_transaction(benchmark, db, middle_row, patch):
+    # notes skips the aggregate bookkeeping, amount goes through it
+    def change():
+        n = next(_ids)
+        return ({"notes": f"bench {n}"} if patch == "notes" else {"amount": n},)
+
+    benchmark(lambda p: crud.update_transaction(db, middle_row.id, p), setup=change)
+
+
+def test_delete_transaction(benchmark, db, dataset):
+    def victim():
+        tx = crud.create_transaction(
+            db, dataset.user_id, make_transaction(dataset, next(_ids))
+        )
+        return (tx.id,)
+
+    benchmark(lambda tx_id: crud.delete_transaction(db, tx_id), setup=victim)
+
+
+def test_get_account_balance(benchmark, db, dataset):
+    benchmark(lambda: crud.get_account_balance(db, dataset.account_ids[0]))
+
+
+def test_monthly_summary(benchmark, db, dataset):
+    benchmark(
+        lambda: crud.monthly_summary(
+            db, dataset.user_id, date(2020, 1, 1), date(2020, 12, 1)
+        )
+    )
+
+
+def test_category_summary(benchmark, db, dataset):
+    benchmark(
+        lambda: crud.category_summary(
+            db, dataset.user_id, date(2020, 1, 1), date(2020, 12, 1)
+        )
+    )
+
+
+def test_get_user_watermark(benchmark, db, dataset):
+    # Two index probes; checked on every forecast request
+    benchmark(lambda: crud.get_user_watermark(db, dataset.user_id))
+
+
+def test_assign_categories(benchmark, db, dataset):
+    # One reclassification batch: uncategorized rows get a category back
+    def uncategorized():
+        pairs = []
+        for _ in range(100):
+            tx = crud.create_transaction(
+                db, dataset.user_id, make_transaction(dataset, next(_ids))
+            )
+            crud.update_transaction(db, tx.id, {"category_id": None})
+            pairs.append((tx.id, dataset.category_ids[0]))
+        return (pairs,)
+
+    benchmark(
+        lambda pairs: crud.assign_categories(db, pairs), setup=uncategorized, rounds=5
+    )
+
+
+@pytest.mark.parametrize("batch", ["new", "reimport"])
+def test_import_transactions(benchmark, db, dataset, batch):
+    # "reimport" sends lines that are all known: conflicts only, no writes
+    def lines():
+        start = next(_ids) * 1000
+        return (
+            [
+                (make_transaction(dataset, start + i), f"{start + i:064x}")
+                for i in range(1000)
+            ],
+        )
+
+    known = lines()
+    benchmark(
+        lambda rows: crud.import_transactions(db, dataset.user_id, rows),
+        setup=lines if batch == "new" else lambda: known,
+        rounds=5,
+    )
+
+
+@pytest.mark.parametrize("query", ["farmacia", "farmcia"])
+def test_search_transactions(benchmark, db, dataset, query):
+    # "farmcia" has no lexeme match and is found by trigram similarity only
+    rows, _ = benchmark(
+        lambda: crud.search_transactions(db, dataset.user_id, query, limit=50)
+    )
+    assert rows
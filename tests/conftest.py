@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Application modules are imported from their own root (models.*, db.*, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "finanbot"))
@@ -0,0 +1,140 @@
+"""Balance and rollup deltas of transaction writes (db.aggregates)."""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from db.aggregates import (
+    TxSnapshot,
+    balance_deltas,
+    rollup_deltas,
+    rollup_month,
+    signed_amount,
+)
+
+USER = uuid4()
+CHECKING, SAVINGS = uuid4(), uuid4()
+FOOD, RENT = uuid4(), uuid4()
+JANUARY, FEBRUARY = date(2024, 1, 1), date(2024, 2, 1)
+
+
+def _tx(**changes) -> TxSnapshot:
+    tx = TxSnapshot(
+        user_id=USER,
+        account_id=CHECKING,
+        category_id=FOOD,
+        occurred_at=datetime(2024, 1, 15, 12, tzinfo=timezone.utc),
+        amount=Decimal("100.00"),
+        currency="BRL",
+        type="expense",
+    )
+    return tx._replace(**changes)
+
+
+@pytest.mark.parametrize(
+    "tx_type, amount, expected",
+    [
+        ("expense", "100", "-100"),
+        ("expense", "-100", "-100"),
+        ("income", "100", "100"),
+        ("income", "-100", "100"),
+        ("transfer", "-40", "-40"),
+        ("transfer", "40", "40"),
+    ],
+)
+def test_signed_amount(tx_type, amount, expected):
+    assert signed_amount(tx_type, Decimal(amount)) == Decimal(expected)
+
+
+def test_signed_amount_accepts_floats():
+    assert signed_amount("expense", 12.5) == Decimal("-12.5")
+
+
+def test_balance_of_create_and_delete():
+    tx = _tx()
+    assert balance_deltas([(None, tx)]) == {CHECKING: Decimal("-100.00")}
+    assert balance_deltas([(tx, None)]) == {CHECKING: Decimal("100.00")}
+
+
+def test_balance_of_amount_change():
+    old = _tx()
+    new = _tx(amount=Decimal("130.00"))
+    assert balance_deltas([(old, new)]) == {CHECKING: Decimal("-30.00")}
+
+
+def test_balance_of_type_change():
+    old = _tx()
+    new = _tx(type="income")
+    assert balance_deltas([(old, new)]) == {CHECKING: Decimal("200.00")}
+
+
+def test_balance_of_account_change():
+    old = _tx()
+    new = _tx(account_id=SAVINGS)
+    assert balance_deltas([(old, new)]) == {
+        CHECKING: Decimal("100.00"),
+        SAVINGS: Decimal("-100.00"),
+    }
+
+
+def test_balance_ignores_changes_that_cancel_out():
+    tx = _tx()
+    assert balance_deltas([(tx, tx._replace(category_id=RENT))]) == {}
+    assert balance_deltas([(None, tx), (tx, None)]) == {}
+
+
+def _key(month=JANUARY, category=FOOD, tx_type="expense", currency="BRL"):
+    return (USER, month, category, tx_type, currency)
+
+
+def test_rollup_month_is_utc():
+    late = datetime(2024, 1, 31, 23, 30, tzinfo=timezone(timedelta(hours=-3)))
+    assert rollup_month(late) == FEBRUARY
+    assert rollup_month(datetime(2024, 1, 31, 23, 30)) == JANUARY
+
+
+def test_rollup_of_create_and_delete():
+    tx = _tx()
+    assert rollup_deltas([(None, tx)]) == {_key(): (Decimal("100.00"), 1)}
+    assert rollup_deltas([(tx, None)]) == {_key(): (Decimal("-100.00"), -1)}
+
+
+def test_rollup_of_amount_change():
+    old = _tx()
+    new = _tx(amount=Decimal("130.00"))
+    assert rollup_deltas([(old, new)]) == {_key(): (Decimal("30.00"), 0)}
+
+
+@pytest.mark.parametrize(
+    "changes, key",
+    [
+        ({"type": "income"}, _key(tx_type="income")),
+        ({"category_id": RENT}, _key(category=RENT)),
+        ({"category_id": None}, _key(category=None)),
+        ({"currency": "USD"}, _key(currency="USD")),
+        (
+            {"occurred_at": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+            _key(month=FEBRUARY),
+        ),
+    ],
+)
+def test_rollup_moves_between_keys(changes, key):
+    old = _tx()
+    assert rollup_deltas([(old, _tx(**changes))]) == {
+        _key(): (Decimal("-100.00"), -1),
+        key: (Decimal("100.00"), 1),
+    }
+
+
+def test_rollup_ignores_account_change():
+    # Rollups are per category, not per account
+    assert rollup_deltas([(_tx(), _tx(account_id=SAVINGS))]) == {}
+
+
+def test_rollup_folds_a_batch_per_key():
+    first, second = _tx(), _tx(amount=Decimal("50.00"))
+    assert rollup_deltas([(None, first), (None, second)]) == {
+        _key(): (Decimal("150.00"), 2)
+    }
@@ -0,0 +1,94 @@
+"""Reference counting of content-addressed attachments (attachments.storage)."""
+
+import io
+from pathlib import Path
+from threading import Thread
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from attachments import storage
+
+
+@pytest.fixture(autouse=True)
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_root", lambda: tmp_path)
+    monkeypatch.setattr(
+        storage, "get_settings", lambda: SimpleNamespace(attachment_max_bytes=1024)
+    )
+    return tmp_path
+
+
+def _stage(content: bytes) -> storage.StagedAttachment:
+    return storage.stage_attachment(SimpleNamespace(file=io.BytesIO(content)))
+
+
+def test_blob_lives_until_last_reference_is_released():
+    first, second = uuid4(), uuid4()
+    path = storage.commit_attachment(_stage(b"receipt"), first)
+    assert storage.commit_attachment(_stage(b"receipt"), second) == path
+
+    storage.release_attachment(path, first)
+    assert Path(path).read_bytes() == b"receipt"
+
+    storage.release_attachment(path, second)
+    assert not Path(path).exists()
+
+
+def test_too_large_upload_leaves_nothing_behind(root):
+    with pytest.raises(storage.AttachmentTooLargeError):
+        _stage(b"x" * 2048)
+    assert not any((root / storage.TMP_DIR).iterdir())
+
+
+def test_concurrent_commit_and_release_never_drop_a_referenced_blob():
+    errors = []
+
+    def worker():
+        for _ in range(200):
+            tx_id = uuid4()
+            path = storage.commit_attachment(_stage(b"same content"), tx_id)
+            if not Path(path).exists():
+                errors.append(tx_id)
+            storage.release_attachment(path, tx_id)
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_resolve_serves_only_store_files(root, tmp_path_factory):
+    tx_id = uuid4()
+    path = storage.commit_attachment(_stage(b"receipt"), tx_id)
+    assert storage.resolve_attachment(path, tx_id) == Path(path)
+
+    outside = tmp_path_factory.mktemp("elsewhere") / "secret"
+    outside.write_text("secret")
+    objects = root / storage.OBJECTS_DIR
+    for stored in (
+        str(outside),
+        "/etc/passwd",
+        str(objects / "ab" / "not-a-digest"),
+        str(objects / ".." / ".." / "secret"),
+        str(root / f"{uuid4()}.pdf"),  # another transaction's legacy file
+    ):
+        assert storage.resolve_attachment(stored, tx_id) is None
+
+
+def test_resolve_legacy_file_and_missing_blob(root):
+    tx_id = uuid4()
+    legacy = storage.get_attachment_path(tx_id)
+    assert storage.resolve_attachment(legacy, tx_id) is None
+    legacy.write_bytes(b"%PDF")
+    assert storage.resolve_attachment(str(legacy), tx_id) == legacy
+
+
+def test_release_never_unlinks_outside_the_store(tmp_path_factory):
+    outside = tmp_path_factory.mktemp("elsewhere") / "keep"
+    outside.write_text("keep")
+    storage.release_attachment(outside, uuid4())
+    assert outside.exists()
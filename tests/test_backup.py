@@ -0,0 +1,120 @@
+"""Incremental attachment backups and restores (services.backup_service)."""
+
+import json
+import os
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from services import backup_service
+
+
+@pytest.fixture
+def dirs(tmp_path, monkeypatch):
+    settings = SimpleNamespace(
+        attachments_dir=tmp_path / "attachments", backup_dir=tmp_path / "backups"
+    )
+    settings.attachments_dir.mkdir()
+    monkeypatch.setattr(backup_service, "get_settings", lambda: settings)
+    return settings
+
+
+def _write(root, rel: str, content: bytes) -> None:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def _tree(root) -> dict[str, bytes]:
+    return {
+        path.relative_to(root).as_posix(): path.read_bytes()
+        for path in root.rglob("*")
+        if path.is_file()
+    }
+
+
+def _manifest(archive) -> dict:
+    name = archive.name.removesuffix(".zip") + backup_service.MANIFEST_SUFFIX
+    return json.loads((archive.parent / name).read_text(encoding="utf-8"))
+
+
+def _archived(archive) -> list[str]:
+    with zipfile.ZipFile(archive) as zf:
+        return sorted(zf.namelist())
+
+
+def test_full_then_incremental_round_trip(dirs, tmp_path):
+    root = dirs.attachments_dir
+    _write(root, "objects/aa/keep", b"unchanged")
+    _write(root, "objects/bb/edit", b"first version")
+    _write(root, "objects/cc/drop", b"to be deleted")
+
+    full = backup_service.backup_attachments()
+    assert _manifest(full)["kind"] == "full"
+    assert _archived(full) == ["objects/aa/keep", "objects/bb/edit", "objects/cc/drop"]
+
+    _write(root, "objects/bb/edit", b"second, longer version")
+    (root / "objects/cc/drop").unlink()
+    _write(root, "objects/dd/new", b"added")
+
+    incremental = backup_service.backup_attachments()
+    manifest = _manifest(incremental)
+    assert manifest["kind"] == "incremental"
+    assert manifest["parent"] == full.name.removesuffix(".zip") + (
+        backup_service.MANIFEST_SUFFIX
+    )
+    assert manifest["deleted"] == ["objects/cc/drop"]
+    assert _archived(incremental) == ["objects/bb/edit", "objects/dd/new"]
+
+    restored = backup_service.restore_attachments(tmp_path / "restored")
+    assert _tree(restored) == _tree(root)
+
+
+def test_restore_an_earlier_backup(dirs, tmp_path):
+    root = dirs.attachments_dir
+    _write(root, "objects/aa/one", b"one")
+    full = backup_service.backup_attachments()
+    (root / "objects/aa/one").unlink()
+    backup_service.backup_attachments()
+
+    name = full.name.removesuffix(".zip") + backup_service.MANIFEST_SUFFIX
+    restored = backup_service.restore_attachments(tmp_path / "restored", name)
+    assert _tree(restored) == {"objects/aa/one": b"one"}
+
+
+def test_scan_reuses_hashes_of_untouched_files(dirs, monkeypatch):
+    root = dirs.attachments_dir
+    _write(root, "objects/aa/keep", b"unchanged")
+    backup_service.backup_attachments()
+
+    def no_hashing(path):
+        raise AssertionError(f"{path} was re-hashed")
+
+    monkeypatch.setattr(backup_service, "_sha256", no_hashing)
+    assert _archived(backup_service.backup_attachments()) == []
+
+
+def test_tmp_and_locks_are_skipped(dirs):
+    root = dirs.attachments_dir
+    _write(root, "objects/aa/blob", b"blob")
+    _write(root, "tmp/upload", b"in flight")
+    _write(root, "locks/aa", b"")
+    assert _archived(backup_service.backup_attachments()) == ["objects/aa/blob"]
+
+
+def test_file_removed_after_the_scan_is_recorded_as_deleted(dirs, monkeypatch):
+    root = dirs.attachments_dir
+    _write(root, "objects/aa/gone", b"released")
+    _write(root, "objects/bb/stays", b"kept")
+    scan = backup_service._scan
+
+    def scan_then_release(root, previous):
+        state = scan(root, previous)
+        os.unlink(root / "objects/aa/gone")
+        return state
+
+    monkeypatch.setattr(backup_service, "_scan", scan_then_release)
+    archive = backup_service.backup_attachments()
+    assert _archived(archive) == ["objects/bb/stays"]
+    assert list(_manifest(archive)["files"]) == ["objects/bb/stays"]
@@ -0,0 +1,143 @@
+"""Naive Bayes category classifier (analytics.classifier), training and assignment."""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from analytics import classifier
+from db import aggregates, crud
+from services import classification_service
+
+ACCOUNT = uuid4()
+GROCERIES, TRANSPORT = uuid4(), uuid4()
+
+# (notes, cents, account, type, category) like classification_service.training_stmt
+TRAINING = [
+    *(
+        (f"supermercado pão de açúcar {i}", 12000 + i, ACCOUNT, "expense", GROCERIES)
+        for i in range(12)
+    ),
+    *(
+        (f"uber viagem centro {i}", 2500 + i, ACCOUNT, "expense", TRANSPORT)
+        for i in range(12)
+    ),
+]
+
+
+def _batch(rows) -> classifier.FeatureBatch:
+    notes, cents, accounts, types = (list(c) for c in zip(*rows, strict=True))
+    return classifier.featurize(notes, np.array(cents), accounts, types)
+
+
+def _model() -> classifier.CategoryModel:
+    labels = np.array([0 if row[-1] == GROCERIES else 1 for row in TRAINING])
+    batch = _batch([row[:-1] for row in TRAINING])
+    return classifier.fit(batch, labels, (GROCERIES, TRANSPORT))
+
+
+def test_tokens_fold_case_and_accents():
+    assert classifier.tokens("Pão de AÇÚCAR 24h") == ["pao", "de", "acucar"]
+    assert classifier.tokens(None) == []
+
+
+def test_fit_then_predict():
+    model = _model()
+    assert model.categories == (GROCERIES, TRANSPORT)
+    assert model.trained_on == len(TRAINING)
+
+    best, confidence = model.predict(
+        _batch(
+            [
+                ("Supermercado do bairro", 9800, ACCOUNT, "expense"),
+                ("uber para o aeroporto", 4100, ACCOUNT, "expense"),
+                # No known word: the amount bucket still decides
+                ("xyz", 2400, ACCOUNT, "expense"),
+            ]
+        )
+    )
+    assert [model.categories[c] for c in best.tolist()] == [
+        GROCERIES,
+        TRANSPORT,
+        TRANSPORT,
+    ]
+    assert ((confidence > 0.5) & (confidence <= 1.0)).all()
+    assert confidence[0] > 0.9
+
+
+def test_predict_with_only_unseen_features_falls_back_to_priors():
+    model = _model()
+    best, confidence = model.predict(_batch([("", 0, uuid4(), "transfer")]))
+    assert best.shape == (1,)
+    assert confidence[0] == pytest.approx(0.5)
+
+
+def test_fit_needs_two_categories():
+    with pytest.raises(ValueError):
+        classifier.fit(
+            _batch([("uber", 100, ACCOUNT, "expense")]), np.array([0]), [GROCERIES]
+        )
+
+
+def _train(rows):
+    db = SimpleNamespace(execute=lambda stmt: SimpleNamespace(all=lambda: rows))
+    return classification_service.train(db, uuid4())
+
+
+def test_train_refuses_a_single_category():
+    assert _train([row[:-1] + (GROCERIES,) for row in TRAINING]) is None
+
+
+def test_train_leaves_out_rare_categories():
+    rare = uuid4()
+    rows = [*TRAINING, ("farmacia", 3000, ACCOUNT, "expense", rare)]
+    model = _train(rows)
+    assert model is not None
+    assert set(model.categories) == {GROCERIES, TRANSPORT}
+    assert model.trained_on == len(TRAINING)
+
+    only_one_left = [row for row in rows if row[-1] != TRANSPORT]
+    assert (
+        _train(only_one_left + [("farmacia", 10, ACCOUNT, "expense", rare)] * 2) is None
+    )
+
+
+class _Session:
+    """Records what assign_categories does with its session."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.commits = 0
+
+    def execute(self, stmt):
+        return SimpleNamespace(all=lambda: self.rows)
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.parametrize("commit, commits", [(True, 1), (False, 0)])
+def test_assign_categories_commits_only_when_asked(monkeypatch, commit, commits):
+    effects = []
+    monkeypatch.setattr(
+        crud, "apply_effects", lambda db, changes: effects.extend(changes)
+    )
+    tx_id = uuid4()
+    row = aggregates.TxSnapshot(
+        uuid4(),
+        ACCOUNT,
+        GROCERIES,
+        datetime.now(timezone.utc),
+        Decimal(1),
+        "BRL",
+        "expense",
+    )
+    db = _Session([row])
+
+    assert crud.assign_categories(db, [(tx_id, GROCERIES)], commit=commit) == 1
+    assert db.commits == commits
+    ((old, new),) = effects
+    assert old.category_id is None and new.category_id == GROCERIES
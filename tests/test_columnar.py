@@ -0,0 +1,107 @@
+"""Columnar packing and group-by helpers (analytics.columnar)."""
+
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import numpy as np
+
+from analytics import columnar
+
+ACCOUNT_A, ACCOUNT_B = uuid4(), uuid4()
+FOOD, RENT = uuid4(), uuid4()
+
+
+def _epoch(year: int, month: int, day: int) -> int:
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+# (epoch seconds, cents, account, category, type, currency, id) as columnar_stmt
+ROWS = [
+    (_epoch(2024, 1, 5), 1500, ACCOUNT_A, FOOD, "expense", "BRL", uuid4()),
+    (_epoch(2024, 1, 9), 250000, ACCOUNT_A, None, "income", "BRL", uuid4()),
+    (_epoch(2024, 1, 20), 90000, ACCOUNT_B, RENT, "expense", "BRL", uuid4()),
+    (_epoch(2024, 2, 3), 2500, ACCOUNT_A, FOOD, "expense", "USD", uuid4()),
+    (_epoch(2024, 2, 7), 700, ACCOUNT_B, None, "expense", "BRL", uuid4()),
+]
+
+
+def _columns(with_ids: bool = False, chunk: int = 2) -> columnar.TransactionColumns:
+    rows = ROWS if with_ids else [row[:6] for row in ROWS]
+    partitions = [rows[i : i + chunk] for i in range(0, len(rows), chunk)]
+    return columnar.from_rows(partitions, with_ids)
+
+
+def test_from_rows_packs_codes_and_lookup_tables():
+    cols = _columns()
+    assert len(cols) == len(ROWS)
+    assert cols.accounts == (ACCOUNT_A, ACCOUNT_B)
+    assert cols.categories == (FOOD, RENT)
+    assert cols.currencies == ("BRL", "USD")
+    assert cols.account.tolist() == [0, 0, 1, 0, 1]
+    assert cols.category.tolist() == [0, columnar.NO_CATEGORY, 1, 0, -1]
+    assert cols.type.tolist() == [
+        columnar.EXPENSE,
+        columnar.INCOME,
+        columnar.EXPENSE,
+        columnar.EXPENSE,
+        columnar.EXPENSE,
+    ]
+    assert cols.amount_cents.tolist() == [row[1] for row in ROWS]
+    assert str(cols.occurred_at[0]) == "2024-01-05T00:00:00"
+    assert cols.ids is None
+
+
+def test_from_rows_keeps_ids_when_asked():
+    cols = _columns(with_ids=True)
+    assert cols.transaction_ids() == [row[6] for row in ROWS]
+    assert cols.take(cols.account == 1).transaction_ids() == [ROWS[2][6], ROWS[4][6]]
+
+
+def test_from_rows_without_rows_is_empty():
+    cols = columnar.from_rows([[]])
+    assert len(cols) == 0
+    assert cols.accounts == ()
+    assert columnar.totals_by_account(cols) == {}
+
+
+def test_group_sum_orders_groups_by_key():
+    keys = [np.array([3, 1, 3, 2, 1]), np.array([0, 1, 0, 0, 1])]
+    (first, second), sums, counts = columnar.group_sum(keys, np.array([1, 2, 3, 4, 5]))
+    assert first.tolist() == [1, 2, 3]
+    assert second.tolist() == [1, 0, 0]
+    assert sums.tolist() == [7, 4, 4]
+    assert sums.dtype == np.int64
+    assert counts.tolist() == [2, 1, 2]
+
+
+def test_group_sum_sparse_keys_match_dense(monkeypatch):
+    keys = [np.array([10**6, 5, 10**6, -7]), np.array([1, 2, 1, 3])]
+    values = np.array([1, 2, 3, 4])
+    dense = columnar.group_sum(keys, values)
+    monkeypatch.setattr(columnar, "_DENSE_LIMIT", 0)
+    sparse = columnar.group_sum(keys, values)
+    for got, expected in zip(sparse[0], dense[0], strict=True):
+        assert got.tolist() == expected.tolist()
+    assert sparse[1].tolist() == dense[1].tolist() == [4, 2, 4]
+    assert sparse[2].tolist() == dense[2].tolist() == [1, 1, 2]
+
+
+def test_group_sum_counts_without_values():
+    (keys,), sums, counts = columnar.group_sum([np.array([2, 2, 5])])
+    assert keys.tolist() == [2, 5]
+    assert sums.tolist() == counts.tolist() == [2, 1]
+
+
+def test_category_totals():
+    cols = _columns()
+    assert columnar.category_totals(cols) == {FOOD: 4000, RENT: 90000, None: 700}
+    assert columnar.category_totals(cols, "income") == {None: 250000}
+    assert columnar.category_totals(cols, "transfer") == {}
+
+
+def test_totals_by_account_are_signed():
+    cols = _columns()
+    assert columnar.totals_by_account(cols) == {
+        ACCOUNT_A: 250000 - 1500 - 2500,
+        ACCOUNT_B: -90000 - 700,
+    }
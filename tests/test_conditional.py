@@ -0,0 +1,99 @@
+"""Conditional GET validators (api.conditional)."""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from starlette.requests import Request
+
+from api import conditional
+from db.crud import Watermark
+
+MODIFIED = datetime(2025, 3, 14, 12, 30, 15, 250_000, tzinfo=timezone.utc)
+ETAG = conditional.make_etag("transactions", 42)
+
+
+def _request(**headers: str) -> Request:
+    raw = [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def _http_date(moment: datetime) -> str:
+    return format_datetime(moment, usegmt=True)
+
+
+def test_etag_is_weak_and_names_the_version():
+    assert ETAG.startswith('W/"') and ETAG.endswith('"')
+    assert ETAG == conditional.make_etag("transactions", 42)
+    assert ETAG != conditional.make_etag("transactions", 43)
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        (ETAG, True),
+        (ETAG[2:], True),  # weak comparison: strong form matches too
+        (f'W/"other", {ETAG}', True),
+        ("*", True),
+        ('W/"other"', False),
+        ("", False),
+    ],
+)
+def test_if_none_match(if_none_match, expected):
+    request = _request(if_none_match=if_none_match)
+    assert conditional.is_not_modified(request, ETAG, MODIFIED) is expected
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = _request(
+        if_none_match='W/"other"', if_modified_since=_http_date(MODIFIED)
+    )
+    assert not conditional.is_not_modified(request, ETAG, MODIFIED)
+
+
+@pytest.mark.parametrize(
+    ("since", "expected"),
+    [
+        (_http_date(MODIFIED), True),  # same second as the last change
+        (_http_date(MODIFIED + timedelta(days=1)), True),
+        (_http_date(MODIFIED - timedelta(seconds=1)), False),
+        ("Fri, 14 Mar 2025 12:30:15", True),  # no zone: UTC
+        ("not a date", False),
+        ("", False),
+    ],
+)
+def test_if_modified_since(since, expected):
+    request = _request(if_modified_since=since)
+    assert conditional.is_not_modified(request, ETAG, MODIFIED) is expected
+
+
+def test_if_modified_since_needs_a_last_modified():
+    request = _request(if_modified_since=_http_date(MODIFIED))
+    assert not conditional.is_not_modified(request, ETAG, None)
+
+
+def test_no_validators_sent():
+    assert not conditional.is_not_modified(_request(), ETAG, MODIFIED)
+
+
+def test_validator_headers():
+    headers = conditional.validators(
+        ETAG, MODIFIED.astimezone(timezone(timedelta(hours=-3)))
+    )
+    assert headers == {
+        "ETag": ETAG,
+        "Cache-Control": "private, no-cache",
+        "Last-Modified": "Fri, 14 Mar 2025 12:30:15 GMT",
+    }
+    assert "Last-Modified" not in conditional.validators(ETAG, None)
+
+
+def test_not_modified_response_keeps_the_validators():
+    response = conditional.not_modified(conditional.validators(ETAG, MODIFIED))
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert response.body == b""
+
+
+def test_watermark_of_a_user_without_writes():
+    assert Watermark.of(None) == Watermark(0, None)
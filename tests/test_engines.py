@@ -0,0 +1,46 @@
+"""Shutdown of the engine registry (db.engines)."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from db import engines  # noqa: E402
+
+
+class _SyncEngine:
+    def __init__(self, log: list[str]):
+        self.log = log
+
+    def dispose(self, close: bool = True) -> None:
+        self.log.append(f"sync close={close}")
+
+
+class _AsyncEngine:
+    def __init__(self, log: list[str]):
+        self.log = log
+        self.sync_engine = _SyncEngine(log)
+
+    async def dispose(self) -> None:
+        self.log.append("async awaited")
+
+
+@pytest.fixture
+def log(monkeypatch) -> list[str]:
+    log: list[str] = []
+    monkeypatch.setattr(engines, "_engines", {("db", None): _SyncEngine(log)})
+    monkeypatch.setattr(engines, "_async_engines", {("db", None): _AsyncEngine(log)})
+    return log
+
+
+def test_dispose_from_the_loop_closes_async_pools(log):
+    asyncio.run(engines.dispose_engines_async())
+    assert log == ["sync close=True", "async awaited"]
+    assert engines._engines == {} and engines._async_engines == {}
+
+
+def test_dispose_outside_the_loop_drops_async_pools(log):
+    engines.dispose_engines()
+    assert log == ["sync close=True", "sync close=False"]
+    assert engines._engines == {} and engines._async_engines == {}
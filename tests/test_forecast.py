@@ -0,0 +1,98 @@
+"""Balance forecast fitting (services.forecast_service), loader stubbed."""
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from analytics import columnar
+from services import forecast_service
+
+ACCOUNT = uuid4()
+SALARY, RENT, STREAMING = uuid4(), uuid4(), uuid4()
+TODAY = date(2025, 1, 20)
+HISTORY_MONTHS = [date(2024, m, 1) for m in range(7, 13)]  # Jul..Dec 2024
+
+
+def _last_day(month: date) -> date:
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(1)
+
+
+def _row(day: date, cents: int, category, tx_type: str) -> tuple:
+    epoch = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+    return (epoch, cents, ACCOUNT, category, tx_type, "BRL")
+
+
+ROWS = sorted(
+    [_row(m.replace(day=5), 500000, SALARY, "income") for m in HISTORY_MONTHS]
+    # Rent is paid on the last day, so 30- and 31-day months alternate
+    + [_row(_last_day(m), 150000, RENT, "expense") for m in HISTORY_MONTHS]
+    + [_row(m.replace(day=10), 3990, STREAMING, "expense") for m in HISTORY_MONTHS]
+    # Already charged this month; the salary is late
+    + [_row(TODAY.replace(day=10), 3990, STREAMING, "expense")]
+)
+
+
+class _Accounts:
+    def execute(self, stmt):
+        row = SimpleNamespace(id=ACCOUNT, currency="BRL", balance=Decimal("1000.00"))
+        return SimpleNamespace(all=lambda: [row])
+
+
+@pytest.fixture
+def forecast(monkeypatch):
+    def load_transactions(db, user_id, date_from, date_to):
+        start, end = date_from.timestamp(), date_to.timestamp()
+        return columnar.from_rows([[r for r in ROWS if start <= r[0] < end]])
+
+    monkeypatch.setattr(forecast_service, "load_transactions", load_transactions)
+    (account,) = forecast_service.build_forecast(
+        _Accounts(), uuid4(), horizon_days=60, today=TODAY
+    ).accounts
+    return account
+
+
+def _changes(account) -> dict[date, float]:
+    previous = account.current_balance
+    changes = {}
+    for point in account.points:
+        if round(point.balance - previous, 2):
+            changes[point.day] = round(point.balance - previous, 2)
+        previous = point.balance
+    return changes
+
+
+def test_detects_the_monthly_series(forecast):
+    found = {
+        (r.category_id, r.type, r.amount, r.day_of_month) for r in forecast.recurring
+    }
+    assert found == {
+        (SALARY, "income", 5000.0, 5),
+        (RENT, "expense", -1500.0, 31),
+        (STREAMING, "expense", -39.9, 10),
+    }
+
+
+def test_replays_recurring_items_on_their_days(forecast):
+    assert forecast.points[0].day == TODAY
+    assert forecast.points[-1].day == TODAY + timedelta(days=59)
+    assert _changes(forecast) == {
+        # Salary not seen this month although day 5 passed: expected today
+        date(2025, 1, 20): 5000.0,
+        date(2025, 1, 31): -1500.0,
+        date(2025, 2, 5): 5000.0,
+        date(2025, 2, 10): -39.9,
+        # Day 31 clipped to the end of February
+        date(2025, 2, 28): -1500.0,
+        date(2025, 3, 5): 5000.0,
+        date(2025, 3, 10): -39.9,
+    }
+    assert forecast.points[-1].balance == pytest.approx(1000 + 15000 - 3000 - 79.8)
+
+
+def test_without_accounts_there_is_nothing_to_forecast():
+    empty = SimpleNamespace(execute=lambda stmt: SimpleNamespace(all=list))
+    result = forecast_service.build_forecast(empty, uuid4(), today=TODAY)
+    assert result.accounts == []
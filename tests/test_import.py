@@ -0,0 +1,235 @@
+"""Statement parsing and import hashes (services.import_service), no database."""
+
+import io
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from services.import_service import (
+    StatementLine,
+    StatementParseError,
+    _csv_amount,
+    import_hash,
+    normalize,
+    parse_csv,
+    parse_ofx,
+)
+
+ACCOUNT = uuid4()
+BRT = timezone(timedelta(hours=-3))
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS>
+<CURDEF>BRL
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250103120000[-3:BRT]
+<TRNAMT>-45,90
+<MEMO>PADARIA S&amp;A
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250105
+<TRNAMT>5000.00
+<NAME>SALARIO
+</BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+OFX_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS>
+  <CURDEF>usd</CURDEF>
+  <BANKTRANLIST>
+    <STMTTRN>
+      <TRNTYPE>DEBIT</TRNTYPE>
+      <DTPOSTED>20250210083000.000[-5:EST]</DTPOSTED>
+      <TRNAMT>-12.50</TRNAMT>
+      <MEMO>Coffee</MEMO>
+    </STMTTRN>
+  </BANKTRANLIST>
+</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_parse_ofx_sgml():
+    first, second = parse_ofx(io.StringIO(OFX_SGML))
+    assert first == StatementLine(
+        datetime(2025, 1, 3, 12, tzinfo=BRT), Decimal("-45.90"), "PADARIA S&A", "BRL"
+    )
+    # No time: noon UTC; NAME stands in for a missing MEMO
+    assert second == StatementLine(
+        datetime(2025, 1, 5, 12, tzinfo=timezone.utc),
+        Decimal("5000.00"),
+        "SALARIO",
+        "BRL",
+    )
+
+
+def test_parse_ofx_xml():
+    (line,) = parse_ofx(io.StringIO(OFX_XML))
+    assert line == StatementLine(
+        datetime(2025, 2, 10, 8, 30, tzinfo=timezone(timedelta(hours=-5))),
+        Decimal("-12.50"),
+        "Coffee",
+        "USD",
+    )
+
+
+def test_parse_ofx_reads_across_chunks(monkeypatch):
+    monkeypatch.setattr("services.import_service.READ_SIZE", 7)
+    assert len(list(parse_ofx(io.StringIO(OFX_SGML)))) == 2
+
+
+def test_parse_ofx_reports_the_bad_transaction():
+    broken = OFX_SGML.replace("<DTPOSTED>20250105", "<DTPOSTED>yesterday")
+    with pytest.raises(StatementParseError, match="transaction 2"):
+        list(parse_ofx(io.StringIO(broken)))
+
+
+def test_parse_csv_pt_br():
+    text = (
+        "Data;Histórico;Valor (R$)\n"
+        "03/01/2025;Padaria;-45,90\n"
+        "\n"
+        "05/01/2025;Salário;R$ 5.000,00\n"
+    )
+    first, second = parse_csv(io.StringIO(text))
+    assert first == StatementLine(
+        datetime(2025, 1, 3, 12, tzinfo=timezone.utc), Decimal("-45.90"), "Padaria"
+    )
+    assert second.amount == Decimal("5000.00")
+    assert second.memo == "Salário"
+
+
+def test_parse_csv_decimal_point():
+    text = 'date,description,amount\n2025-01-03,"Rent, January","-1,234.56"\n'
+    (line,) = parse_csv(io.StringIO(text))
+    assert line.amount == Decimal("-1234.56")
+    assert line.memo == "Rent, January"
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("1.234,56", "1234.56"),
+        ("1,234.56", "1234.56"),
+        ("-45,90", "-45.90"),
+        ("12.5", "12.5"),
+        ("R$ 1.234.567,89", "1234567.89"),
+        ("1.234.567", "1234567"),
+        ("1,234,567.50", "1234567.50"),
+        ("300", "300"),
+    ],
+)
+def test_csv_amount(value, expected):
+    assert _csv_amount(value) == Decimal(expected)
+
+
+@pytest.mark.parametrize("value", ["1.234", "-1,234"])
+def test_csv_amount_rejects_ambiguous_values(value):
+    with pytest.raises(ValueError, match="ambiguous"):
+        _csv_amount(value)
+
+
+def test_parse_csv_reports_the_bad_line():
+    text = "data;historico;valor\n03/01/2025;Padaria;1.234\n"
+    with pytest.raises(StatementParseError, match="line 2"):
+        list(parse_csv(io.StringIO(text)))
+
+
+def test_parse_csv_needs_the_columns():
+    with pytest.raises(StatementParseError, match="no amount column"):
+        list(parse_csv(io.StringIO("date;memo\n")))
+
+
+def _line(memo: str = "Café", amount: str = "-4.50") -> StatementLine:
+    return StatementLine(datetime(2025, 1, 3, 9, tzinfo=BRT), Decimal(amount), memo)
+
+
+def test_import_hash_ignores_memo_case_and_spacing():
+    assert import_hash(_line("Café  da manhã"), ACCOUNT, 0) == import_hash(
+        _line("café da MANHÃ"), ACCOUNT, 0
+    )
+    assert import_hash(_line(), ACCOUNT, 0) != import_hash(_line(), uuid4(), 0)
+    assert import_hash(_line(), ACCOUNT, 0) != import_hash(
+        _line(amount="-4.5"), ACCOUNT, 1
+    )
+
+
+def test_identical_lines_get_distinct_occurrence_hashes():
+    lines = [_line(), _line("Padaria"), _line(), _line(amount="0")]
+    hashes = [h for _, h in normalize(lines, ACCOUNT)]
+    # The zero-amount line is skipped; the two coffees are both kept
+    assert hashes == [
+        import_hash(_line(), ACCOUNT, 0),
+        import_hash(_line("Padaria"), ACCOUNT, 0),
+        import_hash(_line(), ACCOUNT, 1),
+    ]
+    # Re-importing the same statement reproduces every hash
+    assert [h for _, h in normalize(lines, ACCOUNT)] == hashes
+
+
+def test_normalize_signs_and_currency():
+    (expense, _), (income, _) = normalize(
+        [_line(), StatementLine(_line().occurred_at, Decimal("10"), "", "USD")], ACCOUNT
+    )
+    assert (expense.type, expense.amount, expense.currency) == ("expense", 4.5, "BRL")
+    assert (income.type, income.currency, income.notes) == ("income", "USD", None)
+
+
+# -- POST /transactions/import -------------------------------------------------
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import main
+    from core.config import get_settings
+    from db.session import get_db
+
+    for name in ("POSTGRES_HOST", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("SECRET_KEY", "test-secret-key-0123456789")
+    monkeypatch.setenv("IMPORT_MAX_BYTES", "64")
+    get_settings.cache_clear()
+
+    app = main.create_app()
+    app.dependency_overrides[get_db] = lambda: None
+    yield TestClient(app)
+    get_settings.cache_clear()
+
+
+def test_import_rejects_oversized_statements(client, monkeypatch):
+    from services import import_service
+
+    def never_called(*args):
+        raise AssertionError("oversized body reached the importer")
+
+    monkeypatch.setattr(import_service, "import_statement", never_called)
+    response = client.post(
+        f"/api/v1/transactions/import?account_id={ACCOUNT}", content=b"x" * 65
+    )
+    assert response.status_code == 413
+
+
+def test_import_into_a_foreign_account_is_not_found(client, monkeypatch):
+    from db import crud
+
+    owned = []
+    monkeypatch.setattr(
+        crud,
+        "owns_account",
+        lambda db, user_id, account_id: owned.append(account_id) or False,
+    )
+    response = client.post(
+        f"/api/v1/transactions/import?account_id={ACCOUNT}", content=b"data;valor\n"
+    )
+    assert response.status_code == 404
+    assert owned == [ACCOUNT]
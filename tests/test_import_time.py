@@ -0,0 +1,76 @@
+"""
+Cold-import budget for the API.
+
+Importing the application and building it (every router mounted) must not
+load the settings, open engines or pull in pandas; all of that happens lazily
+on first use. The check runs in a fresh
+interpreter so earlier imports in the test session do not hide regressions.
+
+Budget: IMPORT_TIME_BUDGET_MS (default below).
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "src" / "finanbot"
+DEFAULT_BUDGET_MS = 1500
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+main.create_app()
+elapsed_ms = (time.perf_counter() - start) * 1000
+from core.config import get_settings
+from db import engines
+print(json.dumps({
+    "elapsed_ms": elapsed_ms,
+    "settings_loaded": get_settings.cache_info().currsize > 0,
+    "engines": len(engines._engines) + len(engines._async_engines),
+    "pandas": "pandas" in sys.modules,
+}))
+"""
+
+
+@pytest.fixture(scope="module")
+def probe(tmp_path_factory) -> dict:
+    for module in ("fastapi", "sqlalchemy", "pydantic_settings"):
+        pytest.importorskip(module)
+    # Empty cwd and no POSTGRES_* / SECRET_KEY: reading the settings at import
+    # would fail outright instead of just being slow.
+    env = {
+        k: v
+        for k, v in os.environ.items()
+        if not k.startswith("POSTGRES_") and k != "SECRET_KEY"
+    }
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(APP_DIR), os.environ.get("PYTHONPATH")])
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=tmp_path_factory.mktemp("import_time"),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_api_import_is_lazy(probe):
+    assert not probe["settings_loaded"]
+    assert probe["engines"] == 0
+    assert not probe["pandas"]
+
+
+def test_api_import_within_budget(probe):
+    budget = float(os.environ.get("IMPORT_TIME_BUDGET_MS", DEFAULT_BUDGET_MS))
+    assert probe["elapsed_ms"] <= budget, (
+        f"cold import took {probe['elapsed_ms']:.0f} ms (budget {budget:.0f} ms)"
+    )
@@ -0,0 +1,16 @@
+"""ORM mapping of the finances schema (models.orm_models)."""
+
+from sqlalchemy.orm import configure_mappers
+
+from models.orm_models import Base, Transaction, User
+
+
+def test_mappers_configure():
+    configure_mappers()
+    assert User.accounts.property.mapper.class_.__tablename__ == "accounts"
+
+
+def test_tables_are_in_the_finances_schema():
+    assert {table.schema for table in Base.metadata.tables.values()} == {"finances"}
+    (fk,) = Transaction.__table__.c.user_id.foreign_keys
+    assert fk.column.table is User.__table__
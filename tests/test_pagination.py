@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+import pytest
+
+from db.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def _raw(payload) -> str:
+    raw = json.dumps(payload).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def test_round_trip():
+    values = (datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), uuid4(), 0.25, 3)
+    assert decode_cursor(encode_cursor(*values), 4) == values
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime.now(timezone.utc), uuid4())
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not base64!",
+        _raw({"dt": "2024-01-01T00:00:00"}),  # not a list
+        _raw([{"dt": "2024-01-01T00:00:00"}]),  # wrong size
+        _raw([{"dt": "yesterday"}, {"uuid": str(uuid4())}]),
+        _raw([{"dt": "2024-01-01T00:00:00"}, {"uuid": "nope"}]),
+        _raw([{"dt": 5}, {"uuid": 7}]),
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    ],
+)
+def test_malformed(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 2)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["2024-01-01T00:00:00", {"uuid": str(uuid4())}],  # bare string, no "dt"
+        [{"dt": "2024-01-01T00:00:00"}, "not-a-uuid-object"],
+        [1, 2],
+    ],
+)
+def test_page_cursor_checks_types(payload):
+    pytest.importorskip("sqlalchemy")
+    from db.crud import decode_page_cursor
+
+    with pytest.raises(InvalidCursorError):
+        decode_page_cursor(_raw(payload))
+
+
+def test_page_cursor():
+    pytest.importorskip("sqlalchemy")
+    from db.crud import decode_page_cursor
+
+    occurred_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    tx_id = UUID(int=1)
+    assert decode_page_cursor(encode_cursor(occurred_at, tx_id)) == (
+        occurred_at,
+        tx_id,
+    )
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        ["high", {"dt": "2024-01-01T00:00:00"}, {"uuid": str(uuid4())}],
+        [0.5, "2024-01-01T00:00:00", {"uuid": str(uuid4())}],
+        [0.5, {"dt": "2024-01-01T00:00:00"}, "not-a-uuid-object"],
+        [0.5, 1, 2],
+    ],
+)
+def test_search_cursor_checks_types(payload):
+    pytest.importorskip("sqlalchemy")
+    from db.crud import decode_search_cursor, search_transactions_stmt
+
+    with pytest.raises(InvalidCursorError):
+        decode_search_cursor(_raw(payload))
+    with pytest.raises(InvalidCursorError):
+        search_transactions_stmt(uuid4(), "mercado", 10, cursor=_raw(payload))
+
+
+def test_search_cursor():
+    pytest.importorskip("sqlalchemy")
+    from db.crud import decode_search_cursor
+
+    values = (0.25, datetime(2024, 5, 1, tzinfo=timezone.utc), UUID(int=1))
+    assert decode_search_cursor(encode_cursor(*values)) == values
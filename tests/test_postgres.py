@@ -0,0 +1,47 @@
+"""DataFrame dtype compaction of utils.postgres."""
+
+from decimal import Decimal
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("psycopg2")
+
+from utils.postgres import compact_dtypes  # noqa: E402
+
+
+def test_money_becomes_integer_cents():
+    df = pd.DataFrame(
+        {"amount": [Decimal("10.50"), Decimal("-0.07"), Decimal("1234.99")]}
+    )
+    out = compact_dtypes(df)
+    assert out["amount"].dtype == "int64"
+    assert out["amount"].tolist() == [1050, -7, 123499]
+
+
+def test_money_with_nulls_becomes_nullable_cents():
+    df = pd.DataFrame({"balance": [Decimal("1.10"), None]})
+    out = compact_dtypes(df)
+    assert out["balance"].dtype == "Int64"
+    assert out["balance"].iloc[0] == 110
+    assert out["balance"].isna().iloc[1]
+
+
+def test_low_cardinality_text_becomes_categorical():
+    df = pd.DataFrame({"currency": ["BRL", "USD", "BRL"], "tra_type": ["expense"] * 3})
+    out = compact_dtypes(df)
+    assert out["currency"].dtype == "category"
+    assert list(out["currency"].cat.categories) == ["BRL", "USD"]
+    assert out["tra_type"].dtype == "category"
+
+
+def test_other_columns():
+    df = pd.DataFrame(
+        {"notes": ["mercado", None], "ids": [object(), object()], "n": [1, 2]},
+        index=[10, 20],
+    )
+    out = compact_dtypes(df, categorical=(), cents=())
+    assert isinstance(out["notes"].dtype, pd.StringDtype)
+    assert out["ids"].dtype == object
+    assert out["n"].dtype == "int64"
+    assert out.index.tolist() == [10, 20]
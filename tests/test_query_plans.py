@@ -0,0 +1,105 @@
+"""
+Plans of filtered transaction lists (repositories.transaction_filter).
+
+Every filter combination must be answerable by an index-only scan of a
+covering index of migration 0010. Only the inner id scan is explained, with
+sequential, bitmap and plain index scans disabled: the planner falls back to
+a disabled scan when no index covers the query, so a missing or narrowed
+index fails here whatever the table holds. Nothing is written.
+
+Needs TEST_DATABASE_URL, a psycopg2 URL of a database migrated to head;
+skipped without it.
+"""
+
+import os
+from datetime import datetime, timezone
+from decimal import Decimal
+from itertools import combinations
+from uuid import uuid4
+
+import pytest
+
+FIELDS = ("accounts", "category", "types", "currency", "dates", "amounts")
+# Every single field and pair, plus all of them at once
+COMBINATIONS = [
+    *combinations(FIELDS, 1),
+    *combinations(FIELDS, 2),
+    FIELDS,
+]
+
+COVER = "idx_transactions_user_occurred_cover"
+# Indexes leading with a filtered column, usable besides the covering one
+LEADING = {
+    "accounts": "idx_transactions_user_account_occurred",
+    "category": "idx_transactions_user_category_occurred",
+}
+
+
+@pytest.fixture(scope="module")
+def connection():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    sqlalchemy = pytest.importorskip("sqlalchemy")
+    pytest.importorskip("psycopg2")
+
+    engine = sqlalchemy.create_engine(url)
+    try:
+        with engine.connect() as conn:
+            yield conn
+    except sqlalchemy.exc.OperationalError as err:
+        pytest.skip(f"test database unreachable: {err.orig}")
+    finally:
+        engine.dispose()
+
+
+def _filter(fields):
+    from repositories.transaction_filter import TransactionFilter
+
+    values = {
+        "accounts": {"account_ids": (uuid4(), uuid4())},
+        "category": {"category_id": uuid4()},
+        "types": {"types": ("expense",)},
+        "currency": {"currency": "BRL"},
+        "dates": {
+            "date_from": datetime(2020, 1, 1, tzinfo=timezone.utc),
+            "date_to": datetime(2021, 1, 1, tzinfo=timezone.utc),
+        },
+        "amounts": {"amount_min": Decimal("100"), "amount_max": Decimal("500")},
+    }
+    kwargs = {}
+    for field in fields:
+        kwargs.update(values[field])
+    return TransactionFilter(**kwargs)
+
+
+def _scans(plan: dict):
+    if plan.get("Relation Name") == "transactions":
+        yield plan["Node Type"], plan.get("Index Name")
+    for child in plan.get("Plans", ()):
+        yield from _scans(child)
+
+
+@pytest.mark.parametrize("fields", COMBINATIONS, ids="+".join)
+@pytest.mark.parametrize("paged", [False, True], ids=["first", "cursor"])
+def test_filtered_ids_are_index_only(connection, fields, paged):
+    from db.pagination import encode_cursor
+    from repositories.transaction_filter import filtered_ids_stmt
+
+    cursor = encode_cursor(datetime.now(timezone.utc), uuid4()) if paged else None
+    stmt = filtered_ids_stmt(uuid4(), _filter(fields), limit=100, cursor=cursor)
+    sql = stmt.compile(bind=connection, compile_kwargs={"literal_binds": True})
+
+    with connection.begin() as tx:
+        for setting in ("enable_seqscan", "enable_bitmapscan", "enable_indexscan"):
+            connection.exec_driver_sql(f"SET LOCAL {setting} = off")
+        (plan,) = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {sql}"
+        ).scalar_one()
+        tx.rollback()
+
+    expected = {COVER, *(LEADING[f] for f in fields if f in LEADING)}
+    scans = list(_scans(plan["Plan"]))
+    assert scans, plan
+    for node, index in scans:
+        assert node == "Index Only Scan" and index in expected, scans
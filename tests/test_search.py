@@ -0,0 +1,41 @@
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from db.crud import SearchTerms, search_transactions_stmt
+
+
+def _compiled(query: str):
+    stmt = search_transactions_stmt(uuid4(), query, limit=10)
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    return str(compiled), set(compiled.params.values())
+
+
+def test_parse_terms():
+    terms = SearchTerms.parse('mercado "posto ipiranga" -uber -"ifood lanche" or pix')
+    assert terms.words == ["mercado", "pix"]
+    assert terms.phrases == ["posto ipiranga"]
+    assert terms.exclusions == ["uber", "ifood lanche"]
+
+
+def test_parse_unclosed_quote_and_bare_dash():
+    terms = SearchTerms.parse('- "padaria central')
+    assert terms == SearchTerms([], ["padaria central"], [])
+
+
+def test_similarity_keeps_phrases_and_exclusions():
+    sql, params = _compiled('mercado -uber -"ifood lanche" "posto shell"')
+    # Fuzzy matching only sees the plain words...
+    assert "mercado" in params
+    assert "<%" in sql and "word_similarity" in sql
+    # ...and its rows must still hold the phrase and none of the exclusions
+    assert '"posto shell"' in params
+    assert '"uber" or "ifood lanche"' in params
+    assert "AND NOT (finances.transactions.notes_tsv @@" in sql
+
+
+def test_no_plain_words_is_full_text_only():
+    sql, params = _compiled('"posto shell" -uber')
+    assert "<%" not in sql
+    assert "word_similarity" not in sql
+    assert params >= {'"posto shell" -uber'}
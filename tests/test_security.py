@@ -0,0 +1,126 @@
+"""Verified-token cache of core.security and its invalidation on user writes."""
+
+from uuid import uuid4
+
+import pytest
+
+pytest.importorskip("jose")
+pytest.importorskip("passlib")
+
+from sqlalchemy import create_engine, update  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from core import metrics, security  # noqa: E402
+from core.config import get_settings  # noqa: E402
+from models.orm_models import User  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch):
+    for name in ("POSTGRES_HOST", "POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_DB"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setenv("SECRET_KEY", "test-secret-key-0123456789")
+    _clear_caches()
+    yield get_settings()
+    _clear_caches()
+
+
+def _clear_caches() -> None:
+    get_settings.cache_clear()
+    security.get_pwd_context.cache_clear()
+    security._token_cache.cache_clear()
+
+
+@pytest.fixture
+def db():
+    # SQLite has no schemas; the users table is created unqualified
+    engine = create_engine(
+        "sqlite://", execution_options={"schema_translate_map": {"finances": None}}
+    )
+    User.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _login(db: Session, username: str = "ana") -> tuple[User, str]:
+    user = User(id=uuid4(), username=username, email=f"{username}@example.com")
+    db.add(user)
+    db.commit()
+    token = security.create_access_token_for_user(user.id)
+    assert security.get_current_user(token, db).username == username
+    return user, token
+
+
+def test_repeat_lookups_are_served_from_the_cache(db):
+    _, token = _login(db)
+    security.get_current_user(token, db)
+    assert security.token_cache_stats()["hits"] == 1
+
+
+def test_user_update_evicts_cached_tokens(db):
+    user, token = _login(db)
+    _, other_token = _login(db, "bia")
+
+    user.display_name = "Ana"
+    db.commit()
+
+    assert security._token_cache().get(token) is None
+    assert security._token_cache().get(other_token) is not None
+
+
+def test_token_cache_is_exported_once_built(db):
+    assert "token_cache_hits_total" not in metrics.render()
+    _login(db)
+    assert "token_cache_entries 1" in metrics.render()
+
+
+def test_login_upgrades_a_legacy_cost_hash(db, monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "5")
+    _clear_caches()
+    legacy = security.get_pwd_context().hash("s3cret", rounds=4)
+    user = User(id=uuid4(), username="ana", password_hash=legacy)
+    db.add(user)
+    db.commit()
+
+    assert security.authenticate_user(db, "ana", "wrong") is None
+    assert user.password_hash == legacy
+
+    assert security.authenticate_user(db, "ana", "s3cret") is user
+    db.expire_all()
+    upgraded = db.get(User, user.id).password_hash
+    assert upgraded != legacy
+    assert not security.get_pwd_context().needs_update(upgraded)
+    assert security.authenticate_user(db, "ana", "s3cret") is not None
+
+
+def test_unknown_user_costs_a_dummy_verify(db, monkeypatch):
+    calls = []
+    context = security.get_pwd_context()
+    monkeypatch.setattr(context, "dummy_verify", lambda: calls.append(1))
+    assert security.authenticate_user(db, "nobody", "s3cret") is None
+    assert calls == [1]
+
+
+def test_login_keeps_a_password_changed_while_verifying(db, monkeypatch):
+    monkeypatch.setenv("BCRYPT_ROUNDS", "5")
+    _clear_caches()
+    context = security.get_pwd_context()
+    user = User(
+        id=uuid4(), username="ana", password_hash=context.hash("s3cret", rounds=4)
+    )
+    db.add(user)
+    db.commit()
+
+    verify = context.verify_and_update
+
+    def change_password_meanwhile(password, stored):
+        result = verify(password, stored)
+        db.execute(update(User).values(password_hash="changed elsewhere"))
+        db.commit()
+        return result
+
+    monkeypatch.setattr(context, "verify_and_update", change_password_meanwhile)
+    assert security.authenticate_user(db, "ana", "s3cret") is user
+    db.expire_all()
+    assert db.get(User, user.id).password_hash == "changed elsewhere"
@@ -0,0 +1,110 @@
+"""
+Compare insert throughput of crud.create_transaction (one INSERT + COMMIT per
+row) against crud.create_transactions_bulk (multi-row INSERTs, one COMMIT).
+
+Uses the database configured in .env. A throwaway user and account are created
+and removed afterwards.
+
+Run from repo root:
+    python tools/bench_bulk_insert.py --rows 5000 --batch-size 1000
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "finanbot"))
+
+from sqlalchemy import text  # noqa: E402
+
+from db import crud  # noqa: E402
+from db.session import SessionLocal  # noqa: E402
+from models.schemas import TransactionCreate  # noqa: E402
+
+
+def make_rows(
+    account_id: uuid.UUID, category_id: uuid.UUID, n: int
+) -> list[TransactionCreate]:
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        TransactionCreate(
+            account_id=account_id,
+            category_id=category_id,
+            occurred_at=start + timedelta(hours=i),
+            amount=-(i % 500) - 0.99,
+            type="expense",
+            notes=f"bench row {i}",
+        )
+        for i in range(n)
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    user_id, account_id, category_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    db = SessionLocal()
+    try:
+        db.execute(
+            text("INSERT INTO finances.users (users_id, username) VALUES (:u, :name)"),
+            {"u": user_id, "name": f"bench-{user_id}"},
+        )
+        db.execute(
+            text(
+                "INSERT INTO finances.accounts (accounts_id, user_id, acc_name, "
+                "acc_type) VALUES (:a, :u, 'bench', 'bank')"
+            ),
+            {"a": account_id, "u": user_id},
+        )
+        db.execute(
+            text(
+                "INSERT INTO finances.categories (categories_id, user_id, cat_name, "
+                "kind) VALUES (:c, :u, 'bench', 'expense')"
+            ),
+            {"c": category_id, "u": user_id},
+        )
+        db.commit()
+
+        rows = make_rows(account_id, category_id, args.rows)
+
+        t0 = time.perf_counter()
+        for row in rows:
+            crud.create_transaction(db, user_id, row)
+        single = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        inserted, errors = crud.create_transactions_bulk(
+            db, user_id, rows, batch_size=args.batch_size
+        )
+        bulk = time.perf_counter() - t0
+
+        print(f"rows:        {args.rows}")
+        print(f"single-row:  {single:8.3f}s  {args.rows / single:10.0f} rows/s")
+        print(
+            f"bulk ({args.batch_size}):"
+            f" {bulk:8.3f}s  {inserted / bulk:10.0f} rows/s"
+            f"  ({len(errors)} errors)"
+        )
+        print(f"speedup:     {single / bulk:8.1f}x")
+    finally:
+        db.rollback()
+        db.execute(
+            text("DELETE FROM finances.transactions WHERE user_id = :u"),
+            {"u": user_id},
+        )
+        db.execute(
+            text("DELETE FROM finances.users WHERE users_id = :u"), {"u": user_id}
+        )
+        db.commit()
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
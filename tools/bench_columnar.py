@@ -0,0 +1,73 @@
+"""
+Compare loading a user's transactions as ORM objects with the columnar
+loader (analytics.columnar): load time, memory and a per-month aggregate.
+
+Uses the database configured in .env.
+
+Run from repo root:
+    python tools/bench_columnar.py --user-id <uuid>
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "finanbot"))
+
+from sqlalchemy import select  # noqa: E402
+
+from analytics import columnar  # noqa: E402
+from db.session import SessionLocal  # noqa: E402
+from models.orm_models import Transaction as TransactionModel  # noqa: E402
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user-id", type=UUID, required=True)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        stmt = select(TransactionModel).where(TransactionModel.user_id == args.user_id)
+        rows, orm_load, orm_peak = _measure(lambda: db.execute(stmt).scalars().all())
+        start = time.perf_counter()
+        by_month = defaultdict(float)
+        for tx in rows:
+            by_month[(tx.occurred_at.year, tx.occurred_at.month, tx.type)] += float(
+                tx.amount
+            )
+        orm_agg = time.perf_counter() - start
+        db.expunge_all()
+
+        cols, col_load, col_peak = _measure(
+            lambda: columnar.load_transactions(db, args.user_id)
+        )
+        start = time.perf_counter()
+        columnar.monthly_totals(cols)
+        col_agg = time.perf_counter() - start
+
+    print(f"rows: {len(cols)}  columnar arrays: {cols.nbytes / 1e6:.2f} MB")
+    print(f"{'loader':<9} {'load s':>8} {'peak MB':>9} {'monthly ms':>11}")
+    for name, load, peak, agg in (
+        ("orm", orm_load, orm_peak, orm_agg),
+        ("columnar", col_load, col_peak, col_agg),
+    ):
+        print(f"{name:<9} {load:>8.2f} {peak / 1e6:>9.1f} {agg * 1e3:>11.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Measure login (password verification) throughput at several concurrency
+levels, comparing blocking verify_password calls on the event loop with the
+thread-pool backed verify_password_async. Also reports the worst event-loop
+stall observed by a heartbeat task, which is what other requests would feel.
+
+Uses BCRYPT_ROUNDS / PASSWORD_HASH_WORKERS from .env.
+
+Run from repo root:
+    python tools/bench_password_hashing.py --logins 64 --concurrency 1 4 16
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "finanbot"))
+
+from core import security  # noqa: E402
+from core.config import get_settings  # noqa: E402
+
+
+async def _heartbeat(stop: asyncio.Event, interval: float = 0.005) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def _run(logins: int, concurrency: int, hashed: str, use_async: bool):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            if use_async:
+                await security.verify_password_async("s3cret-password", hashed)
+            else:
+                security.verify_password("s3cret-password", hashed)
+
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return elapsed, await heartbeat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    settings = get_settings()
+    hashed = security.hash_password("s3cret-password")
+    print(
+        f"bcrypt rounds={settings.bcrypt_rounds}"
+        f" workers={settings.password_hash_workers}"
+    )
+    print(f"{'mode':<6} {'conc':>5} {'logins/s':>10} {'max loop stall':>15}")
+    for concurrency in args.concurrency:
+        for mode, use_async in (("sync", False), ("async", True)):
+            elapsed, stall = asyncio.run(
+                _run(args.logins, concurrency, hashed, use_async)
+            )
+            print(
+                f"{mode:<6} {concurrency:>5} {args.logins / elapsed:>10.1f}"
+                f" {stall * 1000:>12.1f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
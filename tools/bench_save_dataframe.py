@@ -0,0 +1,86 @@
+"""
+Benchmark PostgresUtils.save_dataframe: COPY fast path vs the to_sql
+fallback, on statement-shaped frames of several sizes.
+
+Uses the database configured in .env and a scratch table that is dropped at
+the end. The to_sql path is slow by design; large sizes take minutes.
+
+Run from repo root:
+    python tools/bench_save_dataframe.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "finanbot"))
+
+from core.config import get_settings  # noqa: E402
+from utils.postgres import PostgresUtils  # noqa: E402
+
+TABLE = "bench_save_dataframe"
+
+
+def make_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(
+        {
+            "row_id": np.arange(n, dtype=np.int64),
+            "occurred_at": pd.Timestamp("2020-01-01", tz="UTC")
+            + pd.to_timedelta(rng.integers(0, 5 * 365 * 24 * 3600, n), unit="s"),
+            "amount": rng.normal(-50, 200, n).round(2),
+            "currency": rng.choice(["BRL", "USD", "EUR"], n),
+            "tra_type": rng.choice(["expense", "income", "transfer"], n),
+            "notes": rng.choice(["mercado", "uber", "salario", None], n),
+        }
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = PostgresUtils(
+        host=settings.postgres_host,
+        port=settings.postgres_port,
+        user=settings.postgres_user,
+        password=settings.postgres_password,
+        database=settings.postgres_db,
+        schema=settings.tbl_schema or "public",
+    )
+    ddl = text(
+        f"CREATE TABLE {db.schema}.{TABLE} (row_id BIGINT PRIMARY KEY, "
+        "occurred_at TIMESTAMPTZ, amount NUMERIC(18, 2), currency CHAR(3), "
+        "tra_type TEXT, notes TEXT)"
+    )
+
+    print(f"{'rows':>9} {'method':>7} {'seconds':>9} {'rows/s':>11}")
+    try:
+        for n in args.sizes:
+            df = make_frame(n)
+            for method in ("insert", "copy"):
+                with db.engine.begin() as conn:
+                    conn.execute(text(f"DROP TABLE IF EXISTS {db.schema}.{TABLE}"))
+                    conn.execute(ddl)
+                start = time.perf_counter()
+                db.save_dataframe(df, TABLE, method=method, chunksize=args.chunksize)
+                elapsed = time.perf_counter() - start
+                print(f"{n:>9} {method:>7} {elapsed:>9.2f} {n / elapsed:>11.0f}")
+    finally:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {db.schema}.{TABLE}"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())